@@ -0,0 +1,70 @@
+# Benchmark: per-line parse() (one call + groupdict() + dict per line) vs the
+# columnar parse_batch(), from lines and from a bytes buffer with line spans.
+# "overhead" is time per line beyond the bare format regex (pattern.match on
+# each line), i.e. what the parse API itself costs; "retained" is the memory
+# held by the parsed results per line.
+#
+# Usage:
+#   python -m benchmarks.bench_parse_batch --lines 200000 --batch 200
+
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.bench_parsers import SAMPLES, make_lines
+from services.ingestion_service.parser.batch import join_lines
+from services.ingestion_service.parser.registry import get_parser
+
+
+def best_of(repeat, fn):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def retained_bytes(fn):
+    tracemalloc.start()
+    result = fn()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--lines", type=int, default=200_000)
+    ap.add_argument("--batch", type=int, default=200, help="lines per parse_batch() call (pipeline batch size)")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'format':<16}{'regex':>8}{'parse() overhead':>18}{'batch overhead':>16}{'bytes overhead':>16}"
+          f"{'retained dicts':>16}{'retained batch':>16}   (ns/line, bytes/line)")
+    for name, samples in SAMPLES.items():
+        parser = get_parser(name)
+        lines = make_lines(samples, args.lines)
+        blocks = [lines[i:i + args.batch] for i in range(0, len(lines), args.batch)]
+        raw_blocks = []
+        for block in blocks:
+            text, spans = join_lines(block)
+            data = text.encode("utf-8")  # sample lines are ASCII, so char spans == byte spans
+            raw_blocks.append((data, spans))
+
+        match = parser.PATTERN.match
+        t_regex = best_of(args.repeat, lambda: [[match(line) for line in b] for b in blocks])
+        t_dicts = best_of(args.repeat, lambda: [[parser.parse(line) for line in b] for b in blocks])
+        t_batch = best_of(args.repeat, lambda: [parser.parse_batch(b) for b in blocks])
+        t_bytes = best_of(args.repeat, lambda: [parser.parse_batch(buf=d, spans=s) for d, s in raw_blocks])
+        m_dicts = retained_bytes(lambda: [[parser.parse(line) for line in b] for b in blocks])
+        m_batch = retained_bytes(lambda: [parser.parse_batch(b) for b in blocks])
+
+        per = lambda t: t / args.lines * 1e9
+        print(f"{name:<16}{per(t_regex):>8,.0f}{per(t_dicts - t_regex):>18,.0f}{per(t_batch - t_regex):>16,.0f}"
+              f"{per(t_bytes - t_regex):>16,.0f}{m_dicts / args.lines:>16,.0f}{m_batch / args.lines:>16,.0f}")
+
+if __name__ == "__main__":
+    main()
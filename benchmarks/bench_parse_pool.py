@@ -0,0 +1,66 @@
+# Benchmark: read+filter+parse of one local file in the pipeline thread vs
+# ParsePool with an increasing number of worker processes.
+#
+# Usage:
+#   python -m benchmarks.bench_parse_pool --lines 2000000 --workers 1 2 4 8 16
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.bench_local_ingestor import EXCLUDE, INCLUDE, write_sample
+from services.ingestion_service.ingestors.local_ingestor import LocalIngestor
+from services.ingestion_service.parse_pool import DEFAULT_RANGE_BYTES, ParsePool
+from services.ingestion_service.parser.registry import get_parser
+
+PARSER = "apache_regex"
+
+
+def in_thread(path, batch_size=200):
+    parser, lines, n = get_parser(PARSER), [], 0
+    for line, _ in LocalIngestor().incremental_read(path, 0, INCLUDE, EXCLUDE):
+        lines.append(line)
+        if len(lines) >= batch_size:
+            n += len(parser.parse_batch(lines))
+            lines = []
+    return n + (len(parser.parse_batch(lines)) if lines else 0)
+
+
+def pooled(pool, path):
+    return sum(len(b) for b, _ in pool.iter_batches(path, 0, os.path.getsize(path), PARSER, INCLUDE, EXCLUDE))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--lines", type=int, default=2_000_000)
+    ap.add_argument("--error-ratio", type=float, default=0.3)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    ap.add_argument("--range-bytes", type=int, default=DEFAULT_RANGE_BYTES)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "error.log")
+        write_sample(path, args.lines, args.error_ratio)
+        print(f"{args.lines:,} lines, {os.path.getsize(path) / 2**20:.0f} MiB, {os.cpu_count()} CPU(s)")
+
+        t0 = time.perf_counter()
+        parsed = in_thread(path)
+        base = time.perf_counter() - t0
+        print(f"{'in-thread':<12}{base:8.2f}s  {args.lines / base:>12,.0f} lines/s  parsed={parsed}")
+
+        for n in args.workers:
+            pool = ParsePool(n, args.range_bytes)
+            try:
+                pooled(pool, path)  # warm up: spawn the workers
+                t0 = time.perf_counter()
+                parsed = pooled(pool, path)
+                elapsed = time.perf_counter() - t0
+            finally:
+                pool.close()
+            print(f"{f'{n} worker(s)':<12}{elapsed:8.2f}s  {args.lines / elapsed:>12,.0f} lines/s  "
+                  f"parsed={parsed}  speedup={base / elapsed:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
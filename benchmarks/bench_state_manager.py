@@ -0,0 +1,113 @@
+# Benchmark: MySQL round trips per ingestion cycle in StateManager.
+#
+# Compares the old access pattern (new connection per call, one SELECT and one
+# upsert per unit) with the pooled snapshot mode (one SELECT at begin_cycle, one
+# batched upsert at end_cycle). Uses an in-process fake connection, so it counts
+# round trips rather than timing a real server.
+#
+# Usage:
+#   python -m benchmarks.bench_state_manager --units 300 --files 2
+
+import argparse
+import tempfile
+
+from services.ingestion_service.state_manager import StateManager
+
+
+class Counter:
+    def __init__(self):
+        self.connects = 0
+        self.statements = 0
+        self.commits = 0
+
+    @property
+    def round_trips(self):
+        # a connect is several packets (handshake + auth); count it as 3
+        return self.connects * 3 + self.statements + self.commits
+
+
+class FakeCursor:
+    def __init__(self, counter):
+        self.counter = counter
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.counter.statements += 1
+
+    def executemany(self, sql, rows):
+        self.counter.statements += 1  # rewritten into one multi-row INSERT
+
+    def fetchone(self):
+        return None
+
+    def fetchall(self):
+        return []
+
+
+class FakeConnection:
+    def __init__(self, counter):
+        self.counter = counter
+        counter.connects += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def cursor(self):
+        return FakeCursor(self.counter)
+
+    def commit(self):
+        self.counter.commits += 1
+
+    def close(self):
+        pass
+
+
+class CountingStateManager(StateManager):
+    def __init__(self, counter, **kwargs):
+        self.counter = counter
+        super().__init__({}, log_dir=tempfile.gettempdir(), **kwargs)
+
+    def _connect(self):
+        return FakeConnection(self.counter)
+
+
+def run_cycle(sm, units, files, snapshot):
+    if snapshot:
+        sm.begin_cycle()
+    for u in range(units):
+        sm.get_file_states("cluster", f"type-{u}")
+        for f in range(files):
+            sm.upsert_offset("cluster", f"type-{u}", f"file-{f}.log", 1000, "0:0:10:abc")
+    if snapshot:
+        sm.end_cycle()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="StateManager round trips per cycle")
+    ap.add_argument("--units", type=int, default=300)
+    ap.add_argument("--files", type=int, default=1, help="files read per unit")
+    args = ap.parse_args()
+
+    results = {}
+    for name, pool_size, snapshot in (("before", 0, False), ("after", 5, True)):
+        counter = Counter()
+        sm = CountingStateManager(counter, pool_size=pool_size)
+        setup = counter.round_trips
+        run_cycle(sm, args.units, args.files, snapshot)
+        results[name] = counter.round_trips - setup
+        print(f"{name:<7} connects={counter.connects:<6} statements={counter.statements:<6} "
+              f"commits={counter.commits:<6} round_trips/cycle={results[name]}")
+    print(f"reduction: {results['before'] / max(results['after'], 1):.0f}x")
+
+
+if __name__ == "__main__":
+    main()
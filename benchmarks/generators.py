@@ -0,0 +1,146 @@
+# Synthetic log generators for the benchmarks.
+#
+# Each generator writes a realistic log of one format (Apache error log, MySQL
+# error log, Laravel with multi-line stack traces, Asterisk) with a given share
+# of error records, to a target number of records or bytes. Output is fully
+# determined by the seed, so runs on different machines see identical input.
+#
+# Usage:
+#   python -m benchmarks.generators laravel /tmp/laravel.log --size-mb 50 --error-ratio 0.2
+
+import argparse
+import datetime
+import random
+from typing import Callable, Dict, Optional
+
+_START = datetime.datetime(2025, 8, 13, 10, 0, 0)
+_WORDS = ("user", "order", "invoice", "session", "cart", "payment", "queue", "report", "token", "upload")
+
+
+def _ip(rnd):
+    return f"10.{rnd.randrange(256)}.{rnd.randrange(256)}.{rnd.randrange(1, 255)}"
+
+
+def _path(rnd):
+    return f"/{rnd.choice(_WORDS)}/{rnd.randrange(10_000)}/{rnd.choice(_WORDS)}.php"
+
+
+def apache(rnd, ts, error):
+    stamp = ts.strftime("%a %b %d %H:%M:%S.") + f"{rnd.randrange(1_000_000):06d} " + ts.strftime("%Y")
+    pid = f"[pid {rnd.randrange(1000, 60000)}:tid {rnd.randrange(10**14, 10**15)}]"
+    client = f"[client {_ip(rnd)}:{rnd.randrange(1024, 65535)}]"
+    if error:
+        msg = rnd.choice((
+            f"AH01071: Got error 'PHP message: PHP Fatal error:  Uncaught Exception: Invalid id {rnd.randrange(10**6)} in {_path(rnd)}:{rnd.randrange(1, 900)}'",
+            f"AH00124: Request exceeded the limit of 10 internal redirects due to probable configuration error",
+            f"AH01630: client denied by server configuration: /var/www{_path(rnd)}",
+            f"AH00037: Symbolic link not allowed or link target not accessible: /var/www/{rnd.choice(_WORDS)}",
+        ))
+        return f"[{stamp}] [{rnd.choice(('core', 'php7', 'proxy_fcgi', 'authz_core'))}:error] {pid} {client} {msg}\n"
+    msg = rnd.choice((
+        f"AH00094: Command line: '/usr/sbin/apache2'",
+        f"AH00163: Apache/2.4.57 (Debian) configured -- resuming normal operations",
+        f"AH01276: Cannot serve directory /var/www/{rnd.choice(_WORDS)}/: No matching DirectoryIndex",
+    ))
+    return f"[{stamp}] [{rnd.choice(('core', 'mpm_prefork', 'autoindex'))}:notice] {pid} {msg}\n"
+
+
+def mysql(rnd, ts, error):
+    stamp = ts.strftime("%Y-%m-%dT%H:%M:%S.") + f"{rnd.randrange(1_000_000):06d}Z"
+    thread = rnd.randrange(0, 5000)
+    if error:
+        code, sub, msg = rnd.choice((
+            ("MY-012592", "InnoDB", "Operating system error number 28 in a file operation."),
+            ("MY-010119", "Server", "Aborting"),
+            ("MY-013183", "InnoDB", f"Assertion failure: btr0pcur.cc:{rnd.randrange(100, 900)} thread {rnd.randrange(10**12)}"),
+            ("MY-010584", "Repl", f"Slave SQL for channel '': Error 'Duplicate entry '{rnd.randrange(10**6)}' for key 'PRIMARY'' on query."),
+        ))
+        return f"{stamp} {thread} [ERROR] [{code}] [{sub}] {msg}\n"
+    code, sub, msg = rnd.choice((
+        ("MY-010931", "Server", "/usr/sbin/mysqld: ready for connections. Version: '8.0.36'"),
+        ("MY-011323", "Server", "X Plugin ready for connections."),
+        ("MY-013072", "InnoDB", f"Buffer pool(s) load completed at {ts:%y%m%d %H:%M:%S}"),
+    ))
+    return f"{stamp} {thread} [{rnd.choice(('System', 'Note', 'Warning'))}] [{code}] [{sub}] {msg}\n"
+
+
+def laravel(rnd, ts, error):
+    stamp = ts.strftime("%Y-%m-%d %H:%M:%S")
+    if not error:
+        return f"[{stamp}] production.INFO: {rnd.choice(_WORDS)} {rnd.randrange(10**6)} processed in {rnd.randrange(1, 900)}ms\n"
+    level = rnd.choice(("ERROR", "ERROR", "ERROR", "CRITICAL"))
+    msg = rnd.choice((
+        f"SQLSTATE[HY000] [2002] Connection refused (SQL: select * from `{rnd.choice(_WORDS)}s` where `id` = {rnd.randrange(10**6)} limit 1)",
+        f"Call to a member function getKey() on null",
+        f"Allowed memory size of 134217728 bytes exhausted (tried to allocate {rnd.randrange(4096, 10**6)} bytes)",
+        f"Undefined array key \"{rnd.choice(_WORDS)}\"",
+    ))
+    frames = "".join(
+        f"#{i} /var/www/html/vendor/laravel/framework/src/Illuminate/{rnd.choice(('Database', 'Routing', 'Pipeline', 'Queue'))}"
+        f"/{rnd.choice(('Connection', 'Router', 'Pipeline', 'Worker'))}.php({rnd.randrange(10, 900)}): "
+        f"Illuminate\\{rnd.choice(('Database', 'Routing'))}\\{rnd.choice(('Connection', 'Router'))}->run()\n"
+        for i in range(rnd.randrange(3, 25)))
+    return (f"[{stamp}] production.{level}: {msg} {{\"exception\":\"[object] (Exception(code: 0): {msg} "
+            f"at /var/www/html/app/Http/Controllers/{rnd.choice(_WORDS).title()}Controller.php:{rnd.randrange(10, 500)})\n"
+            f"[stacktrace]\n{frames}#{len(frames.splitlines())} {{main}}\n\"}}\n")
+
+
+def asterisk(rnd, ts, error):
+    stamp = ts.strftime("%b %d %H:%M:%S")
+    lwp = rnd.randrange(1000, 40000)
+    if error:
+        return rnd.choice((
+            f"[{stamp}] ERROR[{lwp}][C-{rnd.randrange(16**8):08x}] chan_sip.c: Failed to authenticate device <sip:{rnd.randrange(100, 999)}@{_ip(rnd)}>\n",
+            f"[{stamp}] ERROR[{lwp}] res_pjsip.c:{rnd.randrange(1000, 5000)} ast_sip_create_dialog_uac: Endpoint '{rnd.randrange(100, 999)}': Could not create dialog\n",
+            f"[{stamp}] WARNING[{lwp}] res_rtp_asterisk.c:{rnd.randrange(1000, 8000)} ast_rtp_read: RTP Read error on port {rnd.randrange(10000, 20000)}\n",
+        ))
+    return rnd.choice((
+        f"[{stamp}] VERBOSE[{lwp}][C-{rnd.randrange(16**8):08x}] pbx.c: Executing [{rnd.randrange(100, 999)}@from-internal:1] Dial(\"PJSIP/{rnd.randrange(100, 999)}\")\n",
+        f"[{stamp}] NOTICE[{lwp}] chan_sip.c: Registration from '<sip:{rnd.randrange(100, 999)}@{_ip(rnd)}>' succeeded\n",
+    ))
+
+
+GENERATORS: Dict[str, Callable] = {"apache": apache, "mysql": mysql, "laravel": laravel, "asterisk": asterisk}
+
+# The parser each format is read with (see parser/registry.py)
+PARSERS = {"apache": "apache_regex", "mysql": "mysql_regex", "laravel": "laravel", "asterisk": "asterisk_regex"}
+
+
+def generate(fmt: str, path: str, records: Optional[int] = None, size_bytes: Optional[int] = None,
+             error_ratio: float = 0.1, seed: int = 42) -> int:
+    """
+    Write records of format fmt to path until `records` records or `size_bytes`
+    bytes (whichever is given; both: whichever comes first). Returns the number
+    of records written.
+    """
+    if records is None and size_bytes is None:
+        raise ValueError("give records and/or size_bytes")
+    make = GENERATORS[fmt]
+    rnd = random.Random(seed)
+    ts, written, n = _START, 0, 0
+    with open(path, "w", encoding="utf-8") as f:
+        while (records is None or n < records) and (size_bytes is None or written < size_bytes):
+            ts += datetime.timedelta(milliseconds=rnd.randrange(1, 2000))
+            text = make(rnd, ts, rnd.random() < error_ratio)
+            f.write(text)
+            written += len(text.encode("utf-8"))
+            n += 1
+    return n
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Write a synthetic log file")
+    ap.add_argument("format", choices=sorted(GENERATORS))
+    ap.add_argument("path")
+    ap.add_argument("--records", type=int)
+    ap.add_argument("--size-mb", type=float)
+    ap.add_argument("--error-ratio", type=float, default=0.1)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+    size = int(args.size_mb * 2**20) if args.size_mb else None
+    n = generate(args.format, args.path, args.records, size, args.error_ratio, args.seed)
+    print(f"wrote {n:,} {args.format} records to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
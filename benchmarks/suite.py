@@ -0,0 +1,296 @@
+# Reproducible benchmark suite.
+#
+# Generates synthetic Apache, MySQL, Laravel (multi-line) and Asterisk logs and
+# times the ingestion building blocks on them: LocalIngestor.incremental_read,
+# RegexParser, LaravelParser, Enricher, and a full process_unit cycle (every
+# unit of a local cluster, through make_job() with a fake LLM and an in-memory
+# state store, so no MySQL or OpenAI is needed). Each case reports the best of
+# --repeat runs. Results are written as JSON; --compare checks them against a
+# stored baseline and exits non-zero when a case got slower than --threshold.
+#
+# Usage:
+#   python -m benchmarks.suite --size-mb 20 --out bench.json
+#   python -m benchmarks.suite --size-mb 20 --compare bench_baseline.json
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import yaml
+
+from benchmarks.generators import PARSERS, generate
+
+INCLUDE = r"(ERROR|CRITICAL|FATAL|Exception)"
+
+
+# ---------------------------------------------------------------------------
+# Fakes for the full-cycle case
+# ---------------------------------------------------------------------------
+class FakeLLM:
+    model = "bench-fake"
+
+    def __init__(self):
+        self.calls = 0
+
+    def analyze_many(self, event_groups, context=None):
+        self.calls += len(event_groups)
+        return [json.dumps({"message": "synthetic", "summary": "n/a", "fix_suggestion": "n/a"})
+                for _ in event_groups]
+
+
+class MemoryStateStore:
+    """
+    The part of StateManager that make_job() uses, kept in a dict.
+    """
+
+    def __init__(self):
+        self.offsets: Dict[Tuple[str, str], Dict[str, Tuple[int, Optional[str]]]] = {}
+
+    def get_file_states(self, cluster_name, log_type):
+        return dict(self.offsets.get((cluster_name, log_type), {}))
+
+    def upsert_offset(self, cluster_name, log_type, file_key, offset_val, fingerprint=None):
+        files = self.offsets.setdefault((cluster_name, log_type), {})
+        files[file_key] = (offset_val, fingerprint or files.get(file_key, (0, None))[1])
+
+    def delete_offsets(self, cluster_name, log_type, file_keys):
+        for key in file_keys:
+            self.offsets.get((cluster_name, log_type), {}).pop(key, None)
+
+    def flush(self):
+        pass
+
+    def begin_cycle(self):
+        pass
+
+    def end_cycle(self):
+        pass
+
+    @contextlib.contextmanager
+    def unit_cycle(self, cluster_name, log_type):
+        yield
+
+
+# ---------------------------------------------------------------------------
+# Cases
+# ---------------------------------------------------------------------------
+def best_of(repeat: int, fn: Callable[[], int], setup: Optional[Callable[[], None]] = None) -> Tuple[float, int]:
+    best, items = None, 0
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        items = fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, items
+
+
+def case_incremental_read(files, repeat):
+    from services.ingestion_service.ingestors.local_ingestor import LocalIngestor
+
+    path = files["apache"]
+    ingestor = LocalIngestor()
+    seconds, items = best_of(repeat, lambda: sum(1 for _ in ingestor.incremental_read(path, 0, INCLUDE, None)))
+    return seconds, items, os.path.getsize(path)
+
+
+def case_regex_parser(files, repeat):
+    from services.ingestion_service.parser.regex_parser import RegexParser
+
+    path = files["apache"]
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    parser = RegexParser()
+    seconds, items = best_of(repeat, lambda: len(parser.parse_batch(lines)))
+    return seconds, items, os.path.getsize(path)
+
+
+def case_laravel_parser(files, repeat):
+    from services.ingestion_service.parser.laravel_parser import LaravelParser
+
+    path = files["laravel"]
+    parser = LaravelParser()
+    seconds, items = best_of(repeat, lambda: sum(1 for _ in parser.parse_file(path, 0)))
+    return seconds, items, os.path.getsize(path)
+
+
+def case_enricher(files, repeat):
+    from services.analysis_service.enricher import Enricher
+    from services.ingestion_service.parser.registry import get_parser
+
+    path = files["mysql"]
+    with open(path, encoding="utf-8") as f:
+        parser = get_parser(PARSERS["mysql"])
+        events = [parser.parse(line) for line in f.read().splitlines()]
+    enricher = Enricher()
+    seconds, items = best_of(repeat, lambda: len(enricher.enrich(events, cluster_name="bench", log_type="mysql")))
+    return seconds, items, os.path.getsize(path)
+
+
+def _cycle_job(files, workdir):
+    from services.analysis_service.analysis_cache import AnalysisCache
+    from services.analysis_service.pipeline import AnalyzerPipeline
+    from services.analysis_service.template_miner import TemplateMiner
+    from services.ingestion_service.main import make_job
+
+    config = {
+        "schedule": {"every_minutes": 5, "parallel": False},
+        "clusters": [{
+            "name": "bench",
+            "type": "local",
+            "log_types": [{"name": fmt, "path": os.path.dirname(path), "file_glob": os.path.basename(path),
+                           "parser": PARSERS[fmt], "include_regex": None if fmt == "laravel" else INCLUDE}
+                          for fmt, path in files.items()],
+        }],
+    }
+    run_dir = tempfile.mkdtemp(dir=workdir)
+    config_path = os.path.join(run_dir, "clusters.yaml")
+    with open(config_path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f)
+    analyzer = AnalyzerPipeline(llm=FakeLLM(), cache=AnalysisCache(os.path.join(run_dir, "cache.sqlite")),
+                                miner=TemplateMiner())
+    return make_job(config_path, state_manager=MemoryStateStore(), analyzer=analyzer,
+                    notifier=None, output_base=os.path.join(run_dir, "out"))
+
+
+def case_process_unit(files, repeat, workdir):
+    """
+    One full pass over every unit from offset 0, then an idle pass (nothing
+    changed) on the same job. Returns both measurements.
+    """
+    total_bytes = sum(os.path.getsize(p) for p in files.values())
+    jobs = []
+    full, lines = best_of(repeat, lambda: _run_and_count(jobs[-1]), setup=lambda: jobs.append(_cycle_job(files, workdir)))
+    idle, _ = best_of(repeat, lambda: _run_and_count(jobs[-1]))
+    return (full, lines, total_bytes), (idle, len(files), 0)
+
+
+def _run_and_count(job):
+    from services.ingestion_service.main import LINES_READ
+
+    before = sum(child.value for child in LINES_READ._children.values())
+    report = job()
+    if report.counts()["error"]:
+        raise RuntimeError(f"benchmark cycle failed: {report.to_dict()}")
+    return int(sum(child.value for child in LINES_READ._children.values()) - before)
+
+
+# ---------------------------------------------------------------------------
+# Running / reporting
+# ---------------------------------------------------------------------------
+def _result(seconds, items, nbytes):
+    return {"seconds": round(seconds, 6), "items": items, "bytes": nbytes,
+            "items_per_s": round(items / seconds, 1) if seconds else None,
+            "mb_per_s": round(nbytes / 2**20 / seconds, 2) if seconds and nbytes else None}
+
+
+def _git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(size_mb: float, error_ratio: float, repeat: int, seed: int = 42,
+              only: Optional[set] = None) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        files = {}
+        for fmt in PARSERS:
+            fmt_dir = os.path.join(workdir, fmt)
+            os.makedirs(fmt_dir)
+            files[fmt] = os.path.join(fmt_dir, f"{fmt}.log")
+            generate(fmt, files[fmt], size_bytes=int(size_mb * 2**20), error_ratio=error_ratio, seed=seed)
+
+        simple = {
+            "incremental_read": case_incremental_read,
+            "regex_parser": case_regex_parser,
+            "laravel_parser": case_laravel_parser,
+            "enricher": case_enricher,
+        }
+        for name, case in simple.items():
+            if only is None or name in only:
+                results[name] = _result(*case(files, repeat))
+        if only is None or "process_unit" in only:
+            full, idle = case_process_unit(files, repeat, workdir)
+            results["process_unit"] = _result(*full)
+            results["process_unit_idle"] = _result(*idle)
+
+    return {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(),
+                 "cpus": os.cpu_count(), "git": _git_rev(), "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "params": {"size_mb": size_mb, "error_ratio": error_ratio, "repeat": repeat, "seed": seed},
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> Tuple[list, list]:
+    """
+    Returns (rows, regressions). A case regresses when it takes more than
+    (1 + threshold) times its baseline time.
+    """
+    rows, regressions = [], []
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None or not base.get("seconds"):
+            rows.append((name, cur["seconds"], None, None, "new"))
+            continue
+        ratio = cur["seconds"] / base["seconds"]
+        status = "REGRESSION" if ratio > 1 + threshold else "faster" if ratio < 1 - threshold else "ok"
+        rows.append((name, cur["seconds"], base["seconds"], ratio, status))
+        if status == "REGRESSION":
+            regressions.append(name)
+    return rows, regressions
+
+
+def print_results(data: dict):
+    print(f"{'case':<20}{'seconds':>10}{'items/s':>14}{'MB/s':>9}")
+    for name, r in data["results"].items():
+        print(f"{name:<20}{r['seconds']:>10.4f}{r['items_per_s'] or 0:>14,.0f}{r['mb_per_s'] or 0:>9.1f}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Ingestion benchmark suite")
+    ap.add_argument("--size-mb", type=float, default=20, help="size of each generated log file")
+    ap.add_argument("--error-ratio", type=float, default=0.1)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--only", nargs="+", help="run only these cases")
+    ap.add_argument("--out", help="write results JSON here")
+    ap.add_argument("--compare", help="baseline JSON to compare against")
+    ap.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown before flagging (0.15 = 15%%)")
+    args = ap.parse_args(argv)
+
+    data = run_suite(args.size_mb, args.error_ratio, args.repeat, args.seed, set(args.only) if args.only else None)
+    print_results(data)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+
+    if not args.compare:
+        return 0
+    with open(args.compare, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("params") != data["params"]:
+        print(f"warning: baseline params {baseline.get('params')} differ from {data['params']}")
+    rows, regressions = compare(data, baseline, args.threshold)
+    print(f"\n{'case':<20}{'now':>10}{'baseline':>10}{'ratio':>8}  status")
+    for name, now, base, ratio, status in rows:
+        print(f"{name:<20}{now:>10.4f}{base or 0:>10.4f}{ratio or 0:>8.2f}  {status}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict
+
+TOUCH_BATCH = 256
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisCache:
+    """
+    Persistent cache of LLM analyses keyed by (error fingerprint, model, prompt version).
+
+    - SQLite file on disk, so analyses survive restarts
+    - in-memory LRU in front of it: hot hits never touch the disk
+    - TTL: entries older than ttl_seconds are misses and get removed
+    - size cap: beyond max_entries the least recently used rows are evicted (memory
+      hits count as uses: their access times are written back in batches)
+    Hit/miss counters cover one run; read them with stats() and reset with reset_stats().
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 7 * 24 * 3600,
+                 max_entries: int = 50000, memory_entries: int = 2048):
+        self.path = path
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._lock = threading.Lock()
+        self._mem: "OrderedDict[str, tuple[float, object]]" = OrderedDict()
+        self._hits = self._misses = self._puts = 0
+        self._touched: Dict[str, float] = {}  # memory hits not yet in last_access
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                cache_key   TEXT PRIMARY KEY,
+                value_json  TEXT NOT NULL,
+                created_at  REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_cache_access ON analysis_cache(last_access)")
+
+    @staticmethod
+    def key(fingerprint: str, model: str, prompt_version: str) -> str:
+        return hashlib.sha1(f"{fingerprint}|{model}|{prompt_version}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """
+        Cached analysis for key, or None on a miss (absent or expired).
+        """
+        now = time.time()
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is not None:
+                created, value = hit
+                if now - created <= self.ttl:
+                    self._mem.move_to_end(key)
+                    self._hits += 1
+                    self._touched[key] = now
+                    if len(self._touched) >= TOUCH_BATCH:
+                        self._write_touches()
+                    return value
+                del self._mem[key]
+
+            row = self._db.execute(
+                "SELECT value_json, created_at FROM analysis_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._db.execute("DELETE FROM analysis_cache WHERE cache_key = ?", (key,))
+                self._misses += 1
+                return None
+            self._db.execute("UPDATE analysis_cache SET last_access = ? WHERE cache_key = ?", (now, key))
+            value = json.loads(row[0])
+            self._remember(key, row[1], value)
+            self._hits += 1
+            return value
+
+    def put(self, key: str, value) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO analysis_cache (cache_key, value_json, created_at, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now),
+            )
+            self._remember(key, now, value)
+            self._puts += 1
+            # Amortised eviction: check the size cap every 100 writes
+            if self._puts % 100 == 0:
+                self._evict(now)
+
+    def _remember(self, key, created, value):
+        self._mem[key] = (created, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.memory_entries:
+            self._mem.popitem(last=False)
+
+    def _write_touches(self):
+        touched, self._touched = self._touched, {}
+        if touched:
+            self._db.executemany("UPDATE analysis_cache SET last_access = ? WHERE cache_key = ?",
+                                 [(t, k) for k, t in touched.items()])
+
+    def _evict(self, now: float):
+        self._write_touches()  # rank by what was really used
+        self._db.execute("DELETE FROM analysis_cache WHERE created_at < ?", (now - self.ttl,))
+        (count,) = self._db.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()
+        if count > self.max_entries:
+            self._db.execute(
+                "DELETE FROM analysis_cache WHERE cache_key IN ("
+                " SELECT cache_key FROM analysis_cache ORDER BY last_access ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+            logger.info("Analysis cache evicted %d LRU entries", count - self.max_entries)
+
+    def evict(self) -> None:
+        with self._lock:
+            self._evict(time.time())
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self._hits + self._misses
+            return {"hits": self._hits, "misses": self._misses,
+                    "hit_ratio": round(self._hits / total, 3) if total else 0.0}
+
+    def reset_stats(self) -> dict:
+        """
+        Return this run's counters and start a new run.
+        """
+        stats = self.stats()
+        with self._lock:
+            self._hits = self._misses = 0
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._write_touches()
+            self._db.close()
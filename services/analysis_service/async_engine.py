@@ -0,0 +1,221 @@
+# Concurrent LLM dispatch on a long-lived asyncio loop.
+#
+# Every analysis in the process goes through one AsyncAnalysisEngine, so the
+# in-flight limit and the requests/tokens-per-minute budget are shared across
+# all ingestion threads. Sync callers (pipeline stages run in threads) submit
+# coroutines to the engine's loop and wait on the result.
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import List, Optional, Sequence
+
+from openai import (APIConnectionError, APIStatusError, APITimeoutError, AsyncOpenAI,
+                    RateLimitError)
+
+from ..observability.metrics import REGISTRY
+from .prompt_batching import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+LLM_SECONDS = REGISTRY.histogram("llm_request_seconds", "LLM request latency (one attempt)")
+LLM_REQUESTS = REGISTRY.counter("llm_requests_total", "LLM request attempts")
+LLM_TOKENS = REGISTRY.counter("llm_tokens_total", "LLM tokens reported by the API", ["kind"])
+LLM_RETRIES = REGISTRY.counter("llm_retries_total", "LLM requests retried")
+LLM_ERRORS = REGISTRY.counter("llm_errors_total", "LLM requests that failed for good", ["reason"])
+
+
+class TokenBucket:
+    """
+    Async token bucket refilled continuously at rate_per_minute.
+    acquire(n) waits until n tokens are available (n larger than the capacity is
+    clamped, so one oversized request cannot block forever).
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1.0):
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def adjust(self, amount: float):
+        """
+        Give back (amount > 0) or charge (amount < 0) tokens once the real cost
+        of an acquired amount is known; a charge can leave the bucket in debt.
+        """
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+_RETRYABLE_ERRORS = (asyncio.TimeoutError, APITimeoutError, APIConnectionError, RateLimitError, APIStatusError)
+
+
+def is_transient(exc: BaseException) -> bool:
+    """
+    True for failures worth retrying later (timeouts, connection errors,
+    429/5xx); False for answers that would fail the same way again (4xx).
+    """
+    if not isinstance(exc, _RETRYABLE_ERRORS):
+        return False
+    status = getattr(exc, "status_code", None)
+    return status is None or status in RETRYABLE_STATUS
+
+
+def retry_after_seconds(exc: Exception) -> Optional[float]:
+    """
+    Server-requested delay from retry-after-ms / retry-after headers, if any.
+    """
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return max(0.0, float(value) * scale)
+        except ValueError:
+            continue  # HTTP-date form: fall back to backoff
+    return None
+
+
+class AsyncAnalysisEngine:
+    """
+    max_in_flight:  concurrent requests
+    rpm / tpm:      requests and tokens per minute (token cost is estimated up front,
+                    with max_output_tokens for the answer, and settled against
+                    the usage the API reports)
+    max_output_tokens: completion cap sent with every request
+    max_retries:    retries on 429/5xx/timeouts, with jittered exponential backoff
+                    that honours Retry-After
+    timeout:        per-request timeout in seconds
+    """
+
+    def __init__(self, model: str, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 max_in_flight: int = 16, rpm: float = 500, tpm: float = 200_000,
+                 max_retries: int = 5, timeout: float = 60.0,
+                 backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 temperature: float = 0.2, max_output_tokens: int = 800):
+        self.model = model
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_in_flight = max_in_flight
+        self.rpm, self.tpm = rpm, tpm
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base, self.backoff_max = backoff_base, backoff_max
+        self.temperature = temperature
+        self.max_output_tokens = max_output_tokens
+        self.stats = {"requests": 0, "retries": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-engine", daemon=True)
+        self._thread.start()
+        # Loop-bound objects are created on the loop itself
+        asyncio.run_coroutine_threadsafe(self._setup(), self._loop).result()
+
+    async def _setup(self):
+        self._client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url,
+                                   max_retries=0, timeout=self.timeout)
+        self._sem = asyncio.Semaphore(self.max_in_flight)
+        self._requests = TokenBucket(self.rpm)
+        self._tokens = TokenBucket(self.tpm)
+
+    # ---------- sync API ----------
+
+    def complete_many(self, prompts: Sequence[str]) -> List[object]:
+        """
+        Run all prompts concurrently; returns a list aligned with prompts holding
+        either the completion text or the exception that ended its retries.
+        """
+        if not prompts:
+            return []
+        return asyncio.run_coroutine_threadsafe(self._complete_many(prompts), self._loop).result()
+
+    def close(self):
+        if self._loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self._client.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    # ---------- async internals ----------
+
+    async def _complete_many(self, prompts):
+        return await asyncio.gather(*(self._complete(p) for p in prompts), return_exceptions=True)
+
+    async def _complete(self, prompt: str) -> str:
+        cost = estimate_tokens(prompt) + self.max_output_tokens
+        attempt = 0
+        while True:
+            await self._requests.acquire(1)
+            await self._tokens.acquire(cost)
+            try:
+                async with self._sem:
+                    self.stats["requests"] += 1
+                    LLM_REQUESTS.inc()
+                    with LLM_SECONDS.time():
+                        resp = await asyncio.wait_for(
+                            self._client.chat.completions.create(
+                                model=self.model,
+                                messages=[{"role": "user", "content": prompt}],
+                                temperature=self.temperature,
+                                max_tokens=self.max_output_tokens,
+                            ),
+                            timeout=self.timeout,
+                        )
+                usage = getattr(resp, "usage", None)
+                if usage is not None:
+                    used = (usage.prompt_tokens or 0) + (usage.completion_tokens or 0)
+                    self._tokens.adjust(cost - used)
+                    self.stats["prompt_tokens"] += usage.prompt_tokens or 0
+                    self.stats["completion_tokens"] += usage.completion_tokens or 0
+                    LLM_TOKENS.labels("prompt").inc(usage.prompt_tokens or 0)
+                    LLM_TOKENS.labels("completion").inc(usage.completion_tokens or 0)
+                return resp.choices[0].message.content.strip()
+            except _RETRYABLE_ERRORS as e:
+                status = getattr(e, "status_code", None)
+                if not is_transient(e) or attempt >= self.max_retries:
+                    self.stats["errors"] += 1
+                    LLM_ERRORS.labels(str(status) if status else type(e).__name__).inc()
+                    raise
+                delay = retry_after_seconds(e)
+                if delay is None:
+                    delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                    delay *= random.uniform(0.5, 1.5)  # jitter: don't retry in lockstep
+                attempt += 1
+                self.stats["retries"] += 1
+                LLM_RETRIES.inc()
+                logger.warning("LLM request failed (%s); retry %d/%d in %.2fs",
+                               status or type(e).__name__, attempt, self.max_retries, delay)
+                await asyncio.sleep(delay)
+
+
+def engine_from_env(model: str, api_key: Optional[str] = None) -> AsyncAnalysisEngine:
+    return AsyncAnalysisEngine(
+        model=model,
+        api_key=api_key,
+        base_url=os.getenv("OPENAI_BASE_URL") or None,
+        max_in_flight=int(os.getenv("LLM_MAX_IN_FLIGHT", "16")),
+        rpm=float(os.getenv("LLM_RPM", "500")),
+        tpm=float(os.getenv("LLM_TPM", "200000")),
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", "5")),
+        timeout=float(os.getenv("LLM_TIMEOUT", "60")),
+    )
@@ -1,9 +1,17 @@
 from typing import List, Dict
 
+from services.ingestion_service.parser.batch import ParsedBatch
+from services.ingestion_service.parser.event import EventBatch, LogEvent
+
 class Enricher:
-    def enrich(self, events: List[Dict], cluster_name: str, log_type: str) -> List[Dict]:
-        # Normalize and tag
-        for e in events:
-            e.setdefault("cluster", cluster_name)
-            e.setdefault("type", log_type)
-        return events
+    def enrich(self, events: List[Dict], cluster_name: str, log_type: str) -> EventBatch:
+        """
+        Tag a batch with its cluster and log type. The tags are stored once on the
+        batch (ParsedBatch / EventBatch), not copied into every event; dict events
+        are converted to compact LogEvents.
+        """
+        if isinstance(events, (ParsedBatch, EventBatch)):
+            events.cluster, events.log_type = cluster_name, log_type
+            return events
+        return EventBatch((e if isinstance(e, LogEvent) else LogEvent.from_dict(e) for e in events),
+                          cluster=cluster_name, log_type=log_type)
@@ -0,0 +1,39 @@
+import hashlib
+import re
+
+# Volatile tokens masked before fingerprinting, most specific first.
+_MASKS = [
+    (re.compile(r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?\b"), "<TS>"),
+    (re.compile(r"\b(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun) (?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec) +\d{1,2} "
+                r"\d{2}:\d{2}:\d{2}(?:\.\d+)? \d{4}\b"), "<TS>"),
+    (re.compile(r"\b\d{2}:\d{2}:\d{2}(?:[.,]\d+)?\b"), "<TIME>"),
+    (re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"), "<UUID>"),
+    (re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}(?::\d+)?\b"), "<IP>"),
+    (re.compile(r"\b(?:[0-9a-fA-F]{1,4}:){2,7}[0-9a-fA-F]{1,4}\b"), "<IP>"),
+    (re.compile(r"\b[\w.+-]+@[\w-]+\.[\w.-]+\b"), "<EMAIL>"),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b"), "<HEX>"),
+    (re.compile(r"\b[0-9a-fA-F]{16,}\b"), "<HEX>"),
+    (re.compile(r"\d+(?:\.\d+)?"), "<NUM>"),
+]
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(message: str) -> str:
+    """
+    Mask timestamps, ids, IPs, hex and numbers so that repeats of the same error
+    normalize to the same text.
+    """
+    for pat, repl in _MASKS:
+        message = pat.sub(repl, message)
+    return _SPACES.sub(" ", message).strip()
+
+
+def error_fingerprint(event: dict) -> str:
+    """
+    Stable fingerprint of an event's error text (level + normalized message).
+    """
+    return fingerprint_text(event.get("level") or "", event.get("msg") or event.get("raw") or "")
+
+
+def fingerprint_text(level: str, text: str) -> str:
+    return hashlib.sha1(f"{level.upper()}|{normalize(text)}".encode("utf-8")).hexdigest()[:20]
@@ -1,13 +1,15 @@
 import os
 import logging
+import threading
 from openai import OpenAI
 
+from .async_engine import AsyncAnalysisEngine, engine_from_env
+from ..observability.log import payload
+from .prompt_batching import (dump_answer, estimate_tokens, normalize_answer, pack, parse_batch_response,
+                              render_entries)
+
 # Configure logger
 logger = logging.getLogger(__name__)
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s - %(message)s"
-)
 
 PROMPT = """You are an on-call engineering assistant.
 Given structured log events and optional context, identify:
@@ -19,6 +21,10 @@ Given structured log events and optional context, identify:
 
 Return concise bullet points.
 """
+# Bump whenever LOG_PROMPT_TEMPLATE changes meaningfully (or the stored answer
+# shape does): cached analyses are keyed by it.
+PROMPT_VERSION = "log-entry-v2"
+
 LOG_PROMPT_TEMPLATE = """
 You are a highly skilled log analysis assistant helping developers troubleshoot and debug backend systems.
 
@@ -75,26 +81,135 @@ Log Entry:
 {log_entry}
 """
 
+# Several entries in one request. Same analysis and fields as LOG_PROMPT_TEMPLATE,
+# returned as a JSON array with one object per entry id.
+BATCH_PROMPT_TEMPLATE = """
+You are a highly skilled log analysis assistant helping developers troubleshoot and debug backend systems
+(MySQL, Apache, NGINX, PHP, Python, Java, Node.js, Laravel, Asterisk, etc.).
+
+Below are several independent log entries, one JSON object per line: {{"id": ..., "log_entry": ...}}.
+Treat every entry as a unique, independent problem. For each entry:
+identify the technology involved, summarize the root cause in developer-friendly language, suggest a
+relevant fix, give a code/config fix example if applicable, say where to look, and list up to 5
+reliable, system-specific resources. A deprecation warning is not a crash; do not invent error types.
+
+Return ONLY a JSON array with exactly one object per entry, in any order:
+
+[
+  {{
+    "id": "<the entry id, unchanged>",
+    "message": "<Brief, human-readable summary of the log error>",
+    "summary": "<Concise root cause explanation>",
+    "fix_suggestion": "<Clear, actionable advice for resolving the issue>",
+    "code_fix": "<Example code/config adjustment with reasoning, if applicable>",
+    "code_location": "<Where to apply or investigate the fix in the code/configuration>",
+    "resources": ["<URL or resource title>", "..."]
+  }}
+]
+
+Log Entries:
+{entries}
+"""
+
 class LLMClient:
-    def __init__(self, api_key: str | None = None, model: str | None = None):
+    def __init__(self, api_key: str | None = None, model: str | None = None,
+                 max_prompt_events: int = 50, engine: AsyncAnalysisEngine | None = None,
+                 batch_token_budget: int | None = None, batch_max_entries: int | None = None):
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         self.model = model or os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-        self.client = OpenAI(api_key=self.api_key)
+        self.base_url = os.getenv("OPENAI_BASE_URL") or None
+        self.client = OpenAI(api_key=self.api_key, base_url=self.base_url)
+        self.max_prompt_events = max_prompt_events
+        self._engine = engine
+        self._engine_lock = threading.Lock()
+        # Prompt-token budget for packing several entries into one request (0 disables packing)
+        self.batch_token_budget = (batch_token_budget if batch_token_budget is not None
+                                   else int(os.getenv("LLM_BATCH_TOKEN_BUDGET", "6000")))
+        self.batch_max_entries = batch_max_entries or int(os.getenv("LLM_BATCH_MAX_ENTRIES", "20"))
+        self._batch_overhead = estimate_tokens(BATCH_PROMPT_TEMPLATE.format(entries=""))
+
+    @property
+    def engine(self) -> AsyncAnalysisEngine:
+        """
+        Shared async dispatcher (created on first use; configured from LLM_* env vars).
+        """
+        with self._engine_lock:
+            if self._engine is None:
+                self._engine = engine_from_env(self.model, api_key=self.api_key)
+            return self._engine
+
+    def build_prompt(self, events) -> str:
+        return LOG_PROMPT_TEMPLATE.format(log_entry=self.format_events(events))
+
+    def analyze_many(self, event_groups, context: str | None = None) -> list:
+        """
+        Analyze several independent event lists concurrently through the async
+        engine (in-flight cap, RPM/TPM limits, retries). Returns one item per
+        group: the analysis text, or the exception that ended its retries.
+
+        With a batch token budget, entries are packed into shared prompts; an
+        entry whose batched answer is missing or invalid is resubmitted alone.
+        """
+        entries = [self.format_events(events) for events in event_groups]
+        if self.batch_token_budget <= 0 or len(entries) < 2:
+            return self._complete_single(entries)
+
+        ids = {f"e{i}": i for i in range(len(entries))}
+        packs = pack([(f"e{i}", e) for i, e in enumerate(entries)], self.batch_token_budget,
+                     self._batch_overhead, self.batch_max_entries)
+        prompts = [BATCH_PROMPT_TEMPLATE.format(entries=render_entries(p)) if len(p) > 1
+                   else LOG_PROMPT_TEMPLATE.format(log_entry=p[0][1]) for p in packs]
+        logger.info("Dispatching %d entries as %d LLM request(s)", len(entries), len(prompts))
+
+        results: list = [None] * len(entries)
+        resubmit = []
+        for p, answer in zip(packs, self.engine.complete_many(prompts)):
+            if len(p) == 1:
+                results[ids[p[0][0]]] = answer if isinstance(answer, Exception) else normalize_answer(answer)
+                continue
+            parsed = {} if isinstance(answer, Exception) else parse_batch_response(answer, [i for i, _ in p])
+            for entry_id, _ in p:
+                idx = ids[entry_id]
+                if entry_id in parsed:
+                    results[idx] = dump_answer(parsed[entry_id])
+                else:
+                    resubmit.append(idx)
+
+        if resubmit:
+            logger.warning("Resubmitting %d entries individually after invalid batched answers", len(resubmit))
+            for idx, answer in zip(resubmit, self._complete_single([entries[i] for i in resubmit])):
+                results[idx] = answer
+        return results
+
+    def _complete_single(self, entries) -> list:
+        # Answers are stored and cached in one shape, whether they came alone or packed
+        answers = self.engine.complete_many([LOG_PROMPT_TEMPLATE.format(log_entry=e) for e in entries])
+        return [a if isinstance(a, Exception) else normalize_answer(a) for a in answers]
+
+    def format_events(self, events) -> str:
+        """
+        One line per distinct (level, message) with a repeat count, capped at
+        max_prompt_events lines, so a burst of identical errors cannot blow the
+        context window.
+        """
+        counts = {}
+        for e in events:
+            line = f"[{e.get('level','?')}] {e.get('msg', e.get('raw',''))}"
+            counts[line] = counts.get(line, 0) + 1
+        lines = [f"- {line}" + (f" (x{n})" if n > 1 else "")
+                 for line, n in list(counts.items())[:self.max_prompt_events]]
+        if len(counts) > self.max_prompt_events:
+            lines.append(f"- ... and {len(counts) - self.max_prompt_events} more distinct events")
+        return "\n".join(lines)
 
     def analyze(self, events, context: str | None):
 
-        logger.info("Analyze Function calling...")
-
-        text_events = "\n".join(f"- [{e.get('level','?')}] {e.get('msg', e.get('raw',''))}" for e in events)
-           
-        logger.info("LLM Raw text events:\n%s", text_events)   
-       # prompt = f"{PROMPT}\n\nContext:\n{context or 'N/A'}\n\nEvents:\n{text_events}\n"
         # Interpolate into prompt
-        prompt = LOG_PROMPT_TEMPLATE.format(log_entry=text_events)
+        prompt = self.build_prompt(events)
 
         # Log payload
-        logger.info("Sending request to LLM...")
-        logger.info("LLM Payload Prompt:\n%s", prompt)
+        logger.info("Sending request to LLM (%d prompt chars)", len(prompt))
+        logger.debug("LLM Payload Prompt:\n%s", payload(prompt))
 
         resp = self.client.chat.completions.create(
             model=self.model,
@@ -107,7 +222,7 @@ class LLMClient:
 
          # Log response
         logger.info("Received response from LLM.")
-        logger.debug("LLM Raw Response:\n%s", llm_response)
+        logger.debug("LLM Raw Response:\n%s", payload(llm_response))
 
         return llm_response
         
@@ -1,20 +1,27 @@
 from typing import List, Dict
 from .retriever import ContextRetriever
 from .enricher import Enricher
-from .llm_client import LLMClient
+from .llm_client import LLMClient, PROMPT_VERSION
+from .analysis_cache import AnalysisCache
+from .async_engine import is_transient
+from .fingerprint import fingerprint_text
+from .template_miner import TemplateMiner
+from services.ingestion_service.parser.batch import ParsedBatch
+from services.ingestion_service.parser.event import EventBatch
 from services.ingestion_service.parser.laravel_parser import LaravelParser
-from services.writer.file_writer import FileWriter
+from services.observability.log import Sampler, payload
+from services.writer.segment_store import open_store
 import logging
 from datetime import datetime
 import os
 from pathlib import Path
 
-# Configure logger once (could also be in a separate logging.py)
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s - %(message)s"
-)
 logger = logging.getLogger(__name__)
+_sample_entry = Sampler()
+
+
+class AnalysisUnavailableError(RuntimeError):
+    """The LLM could not be reached for part of a batch; the batch should be retried."""
 
 OUTPUT_BASE = os.getenv(
     "OUTPUT_BASE",
@@ -23,13 +30,29 @@ OUTPUT_BASE = os.getenv(
 OUTPUT_BASE = Path(os.getenv("OUTPUT_BASE", Path.cwd() / "processed_output"))
 OUTPUT_BASE.mkdir(parents=True, exist_ok=True)  # ensure base exists
 
+ANALYSIS_CACHE_PATH = os.getenv("ANALYSIS_CACHE_PATH", str(OUTPUT_BASE / ".cache" / "analysis_cache.sqlite"))
+ANALYSIS_CACHE_TTL_HOURS = float(os.getenv("ANALYSIS_CACHE_TTL_HOURS", "168"))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "50000"))
+TEMPLATE_MINING = os.getenv("TEMPLATE_MINING", "true").lower() == "true"
+TEMPLATE_STATE_PATH = os.getenv("TEMPLATE_STATE_PATH", str(OUTPUT_BASE / ".cache" / "templates.json"))
+
 class AnalyzerPipeline:
     def __init__(self, retriever: ContextRetriever | None = None,
                  enricher: Enricher | None = None,
-                 llm: LLMClient | None = None):
+                 llm: LLMClient | None = None,
+                 cache: AnalysisCache | None = None,
+                 miner: TemplateMiner | None = None):
         self.retriever = retriever or ContextRetriever()
         self.enricher = enricher or Enricher()
         self.llm = llm or LLMClient()
+        self.cache = cache or AnalysisCache(
+            ANALYSIS_CACHE_PATH,
+            ttl_seconds=ANALYSIS_CACHE_TTL_HOURS * 3600,
+            max_entries=ANALYSIS_CACHE_MAX_ENTRIES,
+        )
+        if miner is None and TEMPLATE_MINING:
+            miner = TemplateMiner(TEMPLATE_STATE_PATH)
+        self.miner = miner
 
     def run(self, events: List[Dict], cluster_name: str, log_type: str, source_file: str) -> str:
         """
@@ -51,11 +74,11 @@ class AnalyzerPipeline:
         out_dir.mkdir(parents=True, exist_ok=True)
         output_file = out_dir / file_path.name
 
-        logger.info("ctx Display:\n%s", ctx)
+        logger.debug("ctx Display:\n%s", payload(ctx))
         # Step 2: enrich events (normalize fields, add tags)
         logger.info("Enriching %d events", len(events))
         enriched = self.enricher.enrich(events, cluster_name=cluster_name, log_type=log_type)
-        logger.info("Enriching  enriched events=%s ", enriched)
+        logger.debug("Enriched %d events: %s", len(enriched), payload(enriched))
 
          # Now delegate to file-based analyzer
         return self.analyze_log_file(
@@ -85,29 +108,120 @@ class AnalyzerPipeline:
         logger.info("Pipeline finished successfully")
         return result
     
-    def analyze_log_file(self, file_path: Path, log_type: str, enriched, output_file: Path) -> str:
+    def analyze_batch(self, events: List[Dict], cluster_name: str, log_type: str) -> List[Dict]:
         """
-        Parse log file -> analyze entries one by one -> write results to output file.
+        Analyze one micro-batch of enriched events (dicts or a columnar ParsedBatch).
+        Events are collapsed into log templates (or, without a miner, into error
+        fingerprints) and only one representative per group is analyzed; a cached
+        analysis for the same group id/model/prompt version is reused.
+        Returns one record per group, ready for SegmentStore.write_batch():
+        {"log_entry", "fingerprint", "template", "count", "first_ts", "last_ts",
+         "samples", "analysis", "cached"}.
+
+        A group whose analysis failed for good (a 4xx answer) is recorded with an
+        "error". If any group failed transiently (timeouts, 429/5xx after the
+        engine's retries) the batch raises AnalysisUnavailableError instead, so
+        nothing is written and its offset is not committed: the unit run fails
+        and the batch is read again next cycle. Answers that did arrive are
+        cached, so the retry only asks for the failed groups again.
+        """
+        ctx = self.retriever.fetch_context(cluster_name, log_type)
+        results, misses = [], []
+        for group_id, tpl, entry, count, first_ts, last_ts in self._group(events):
+            record = {
+                "log_entry": entry,
+                "fingerprint": group_id,
+                "template": tpl.text if tpl else None,
+                "count": count,
+                "first_ts": first_ts,
+                "last_ts": last_ts,
+                "samples": list(tpl.samples) if tpl else [],
+            }
+            key = AnalysisCache.key(group_id, self.llm.model, PROMPT_VERSION)
+            analysis = self.cache.get(key)
+            record["cached"] = analysis is not None
+            record["analysis"] = analysis
+            if analysis is None:
+                misses.append((key, record))
+            results.append(record)
+
+        # Cache misses go out concurrently (rate limited / retried by the engine)
+        if misses:
+            answers = self.llm.analyze_many([[r["log_entry"]] for _, r in misses], context=ctx)
+            unavailable = []
+            for (key, record), answer in zip(misses, answers):
+                if isinstance(answer, Exception):
+                    logger.error("Error analyzing entry from %s/%s: %s", cluster_name, log_type, answer)
+                    if is_transient(answer):
+                        unavailable.append(answer)
+                    record["error"] = str(answer)
+                    continue
+                record["analysis"] = answer
+                self.cache.put(key, answer)
+            if unavailable:
+                raise AnalysisUnavailableError(
+                    f"{len(unavailable)} of {len(results)} group(s) from {cluster_name}/{log_type} could not be "
+                    f"analyzed: {unavailable[0]}") from unavailable[0]
+        return results
+
+    def _group(self, events):
+        """
+        [(group_id, template_or_None, representative_event, count, first_ts, last_ts), ...]
+        in first-seen order. For a ParsedBatch only each group's representative
+        is turned into a dict.
+        """
+        if isinstance(events, ParsedBatch):
+            text_of = lambda i: events.msg(i) or events.raw(i)
+            level_of, ts_of, event_of = events.level_name, events.ts, events.event
+        else:
+            text_of = lambda i: events[i].get("msg") or events[i].get("raw") or ""
+            level_of = lambda i: events[i].get("level") or ""
+            ts_of = lambda i: events[i].get("ts")
+            event_of = events.event_dict if isinstance(events, EventBatch) else events.__getitem__
+
+        groups: Dict[str, list] = {}  # group id -> [template, first index, count, first ts, last ts]
+        for i in range(len(events)):
+            text, ts = text_of(i), ts_of(i)
+            if self.miner is not None:
+                tpl, _ = self.miner.add_text(text, ts)
+                group_id = tpl.template_id
+            else:
+                tpl, group_id = None, fingerprint_text(level_of(i), text)
+            g = groups.get(group_id)
+            if g is None:
+                g = groups[group_id] = [tpl, i, 0, None, None]
+            g[2] += 1
+            if ts:
+                g[3] = g[3] or ts
+                g[4] = ts
+        return [(group_id, tpl, event_of(i), count, first, last)
+                for group_id, (tpl, i, count, first, last) in groups.items()]
+
+    def analyze_log_file(self, file_path: Path, log_type: str, enriched, output_file: Path,
+                         start_offset: int = 0) -> str:
+        """
+        Stream records of a log file from start_offset -> analyze entries one by one -> buffer the results
+        in the segment store of output_file's directory (source: output_file's name), closed at the end.
         """
         if log_type == "laravel":
             parser = LaravelParser()
         else:
             raise ValueError(f"Unsupported log type: {log_type}")
 
-        writer = FileWriter(str(output_file))
-
-        self.logger.info(f"Parsing log file {file_path} as {log_type}")
-        entries = parser.parse(str(file_path))
-
-        results = []
-        for idx, entry in enumerate(entries, 1):
-            self.logger.info(f"Analyzing entry {idx}/{len(entries)}")
-            try:
-                response = self.llm.analyze(enriched, entry, context={"log_type": log_type})
-                writer.write(entry, response)
-                results.append({"entry": entry, "analysis": response})
-            except Exception as e:
-                self.logger.error(f"Error analyzing entry {idx}: {e}")
-
-        return f"Wrote {len(results)} analyses to {output_file}"
+        store = open_store(output_file.parent)
 
+        logger.info("Parsing log file %s as %s from offset %d", file_path, log_type, start_offset)
+        written = 0
+        try:
+            for idx, entry in enumerate(parser.parse_file(str(file_path), start_offset), 1):
+                if _sample_entry():
+                    logger.debug("Analyzing entry %d", idx)
+                try:
+                    response = self.llm.analyze([entry], context={"log_type": log_type})
+                    store.write(entry.to_dict(log_type=log_type), response, source=output_file.name)
+                    written += 1
+                except Exception as e:
+                    logger.error("Error analyzing entry %d: %s", idx, e)
+        finally:
+            store.close()  # flushes, and lets other writers of the directory in
+        return f"Wrote {written} analyses to {output_file.parent}"
@@ -0,0 +1,111 @@
+# Packing several log entries into one LLM request.
+#
+# The single-entry prompt is mostly boilerplate, so distinct entries are packed
+# into one request up to a token budget and the model is asked for a JSON array
+# with one object per entry id. Responses are validated per entry; anything
+# missing or malformed is handed back to the caller to resubmit on its own.
+
+import json
+import math
+import re
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+REQUIRED_FIELDS = ("message", "summary", "fix_suggestion")
+
+# Rough BPE-style pre-tokenization: letter runs, digit runs, punctuation runs and
+# non-ASCII characters, each with its own chars-per-token ratio. Leading spaces
+# merge into the following piece, as they do in GPT tokenizers.
+_PIECES = re.compile(r"\s*(?:([A-Za-z]+)|(\d+)|([!-/:-@\[-`{-~]+)|([^\x00-\x7f]))|\s+")
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Local token count estimate (no tokenizer download, no network call).
+    Errs slightly high on English text so that packed prompts stay under budget.
+    """
+    n = 0
+    for m in _PIECES.finditer(text):
+        word, digits, punct, other = m.groups()
+        if word:
+            n += math.ceil(len(word) / 5)
+        elif digits:
+            n += math.ceil(len(digits) / 3)
+        elif punct:
+            n += math.ceil(len(punct) / 2)
+        elif other:
+            n += 1
+        else:
+            n += 1 if "\n" in m.group(0) else 0  # bare whitespace run
+    return n
+
+
+def pack(entries: Sequence[Tuple[str, str]], token_budget: int, overhead: int,
+         max_entries: int = 20) -> List[List[Tuple[str, str]]]:
+    """
+    Greedily pack (entry_id, text) pairs, in order, into groups whose estimated
+    prompt size (overhead + rendered entries) stays within token_budget.
+    An entry too large for any group ends up alone in its own group.
+    """
+    packs: List[List[Tuple[str, str]]] = []
+    current: List[Tuple[str, str]] = []
+    used = overhead
+    for entry_id, text in entries:
+        cost = estimate_tokens(render_entries([(entry_id, text)]))
+        if current and (used + cost > token_budget or len(current) >= max_entries):
+            packs.append(current)
+            current, used = [], overhead
+        current.append((entry_id, text))
+        used += cost
+    if current:
+        packs.append(current)
+    return packs
+
+
+def render_entries(entries: Iterable[Tuple[str, str]]) -> str:
+    return "\n".join(json.dumps({"id": entry_id, "log_entry": text}, ensure_ascii=False)
+                     for entry_id, text in entries)
+
+
+def normalize_answer(text: str) -> str:
+    """
+    The stored form of one entry's answer: a JSON object (fenced or not) is
+    re-serialized like a batched entry's result, anything else is kept as is.
+    """
+    try:
+        data = json.loads(_FENCE.sub("", text.strip()))
+    except ValueError:
+        return text
+    return dump_answer(data) if isinstance(data, dict) else text
+
+
+def dump_answer(result: dict) -> str:
+    return json.dumps(result, ensure_ascii=False, indent=2)
+
+
+def parse_batch_response(text: str, expected_ids: Sequence[str]) -> Dict[str, dict]:
+    """
+    Parse a batched answer into {entry_id: result}. Only objects whose id was
+    asked for and which carry every REQUIRED_FIELDS as a string are returned;
+    ids absent from the result need resubmitting.
+    """
+    try:
+        data = json.loads(_FENCE.sub("", text.strip()))
+    except ValueError:
+        return {}
+    if isinstance(data, dict):
+        data = data.get("results", data.get("entries", []))
+    if not isinstance(data, list):
+        return {}
+
+    wanted = set(expected_ids)
+    results: Dict[str, dict] = {}
+    for item in data:
+        if not isinstance(item, dict):
+            continue
+        entry_id = str(item.get("id", ""))
+        if entry_id not in wanted or entry_id in results:
+            continue
+        if all(isinstance(item.get(f), str) and item[f].strip() for f in REQUIRED_FIELDS):
+            results[entry_id] = {k: v for k, v in item.items() if k != "id"}
+    return results
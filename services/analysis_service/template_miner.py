@@ -0,0 +1,173 @@
+# Online log-template mining (a simplified Drain).
+#
+# Events are tokenized after masking volatile tokens, routed by token count and
+# leading tokens to a small leaf list, and merged into the most similar template
+# there; differing positions become <*>. Each template keeps a count, first/last
+# timestamps and a few sample values of its variable positions, so a burst of
+# identical errors is analyzed once and reported as one template with a count.
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from .fingerprint import normalize
+
+logger = logging.getLogger(__name__)
+
+WILDCARD = "<*>"
+
+
+@dataclass
+class Template:
+    template_id: str
+    tokens: List[str]
+    count: int = 0
+    first_ts: Optional[str] = None
+    last_ts: Optional[str] = None
+    samples: List[List[str]] = field(default_factory=list)  # variable values per sample
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.tokens)
+
+
+def _is_variable(token: str) -> bool:
+    # contains a mask from normalize() (<NUM>, <IP>, ...) or a digit
+    return "<" in token or any(c.isdigit() for c in token)
+
+
+class TemplateMiner:
+    """
+    depth:          leading tokens used to route an event to its leaf (Drain's tree depth)
+    sim_threshold:  min fraction of equal tokens to join an existing template
+    max_children:   max templates per leaf; an event matching none of a full leaf gets an
+                    overflow template of its own exact tokens, which is not kept
+    state_path:     JSON file the templates are loaded from / saved to
+    """
+
+    def __init__(self, state_path: Optional[str] = None, depth: int = 2, sim_threshold: float = 0.5,
+                 max_children: int = 100, max_samples: int = 3):
+        self.state_path = state_path
+        self.depth = depth
+        self.sim_threshold = sim_threshold
+        self.max_children = max_children
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._leaves: Dict[Tuple, List[Template]] = {}
+        self._by_id: Dict[str, Template] = {}
+        self._dirty = False
+        if state_path:
+            self.load()
+
+    # ---------- mining ----------
+
+    def add(self, event: dict) -> Tuple[Template, bool]:
+        """
+        Fold one event into the template set. Returns (template, is_new).
+        """
+        return self.add_text(event.get("msg") or event.get("raw") or "", event.get("ts"))
+
+    def add_text(self, text: str, ts: Optional[str] = None) -> Tuple[Template, bool]:
+        tokens = [WILDCARD if _is_variable(t) else t for t in normalize(text).split()]
+        original = text.split()
+        with self._lock:
+            leaf = self._leaves.setdefault(self._route(tokens), [])
+            tpl = self._match(leaf, tokens)
+            is_new = tpl is None
+            if tpl is None:
+                tpl = Template(self._new_id(tokens), list(tokens))
+                if len(leaf) < self.max_children:
+                    leaf.append(tpl)
+                    self._by_id[tpl.template_id] = tpl
+                # else: overflow - the id still groups equal events, but the
+                # template never absorbs (or is absorbed into) a dissimilar one
+            tpl.count += 1
+            if ts:
+                tpl.first_ts = tpl.first_ts or ts
+                tpl.last_ts = ts
+            if len(tpl.samples) < self.max_samples and len(original) == len(tpl.tokens):
+                values = [o for o, t in zip(original, tpl.tokens) if t == WILDCARD]
+                if values and values not in tpl.samples:
+                    tpl.samples.append(values)
+            self._dirty = True
+            return tpl, is_new
+
+    def group(self, events: List[dict]) -> List[Tuple[Template, List[dict], bool]]:
+        """
+        Mine a batch. Returns [(template, events, is_new_template), ...] in first-seen order.
+        """
+        groups: Dict[str, Tuple[Template, List[dict], bool]] = {}
+        for e in events:
+            tpl, is_new = self.add(e)
+            if tpl.template_id in groups:
+                groups[tpl.template_id][1].append(e)
+            else:
+                groups[tpl.template_id] = (tpl, [e], is_new)
+        return list(groups.values())
+
+    def _route(self, tokens: List[str]) -> Tuple:
+        return (len(tokens),) + tuple(tokens[:self.depth])
+
+    def _match(self, leaf: List[Template], tokens: List[str]) -> Optional[Template]:
+        best, best_sim = None, -1.0
+        for tpl in leaf:
+            same = sum(1 for a, b in zip(tpl.tokens, tokens) if a == b or a == WILDCARD)
+            sim = same / max(len(tokens), 1)
+            if sim > best_sim:
+                best, best_sim = tpl, sim
+        if best is not None and best_sim >= self.sim_threshold:
+            best.tokens = [a if a == b else WILDCARD for a, b in zip(best.tokens, tokens)]
+            return best
+        return None
+
+    @staticmethod
+    def _new_id(tokens: List[str]) -> str:
+        return "T" + hashlib.sha1(" ".join(tokens).encode("utf-8")).hexdigest()[:12]
+
+    # ---------- persistence ----------
+
+    def templates(self) -> List[Template]:
+        with self._lock:
+            return list(self._by_id.values())
+
+    def load(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error("Could not load template state %s: %s", self.state_path, e)
+            return
+        with self._lock:
+            for d in raw.get("templates", []):
+                tpl = Template(d["template_id"], d["tokens"], d.get("count", 0),
+                               d.get("first_ts"), d.get("last_ts"), d.get("samples", []))
+                self._leaves.setdefault(self._route(tpl.tokens), []).append(tpl)
+                self._by_id[tpl.template_id] = tpl
+        logger.info("Loaded %d log templates from %s", len(self._by_id), self.state_path)
+
+    def save(self):
+        """
+        Atomically write the template set (no-op if nothing changed).
+        """
+        if not self.state_path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"templates": [{"template_id": t.template_id, "tokens": t.tokens, "count": t.count,
+                                   "first_ts": t.first_ts, "last_ts": t.last_ts, "samples": t.samples}
+                                  for t in self._by_id.values()]}
+            self._dirty = False
+        d = os.path.dirname(self.state_path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, self.state_path)
@@ -1,32 +1,119 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+import threading
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import JSONResponse, Response
 import logging
-from ..ingestion_service.main import make_job
-# Configure logger
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
-)
+from ..ingestion_service.main import OUTPUT_BASE, analysis_index_path, make_job
+from ..ingestion_service.runtime import JobRuntime, UnknownUnitError
+from ..observability.log import setup_logging
+from ..observability.metrics import CONTENT_TYPE, REGISTRY
+from ..writer.analysis_index import InvalidQueryError, open_index
+from ..writer.segment_store import read_block_at
+from .schemas import RunRequest
+
+setup_logging()
 logger = logging.getLogger("api")
 
-app = FastAPI(title="GenAI Error Log Inspector")
+_runtime_lock = threading.Lock()
+
+
+def get_runtime() -> JobRuntime:
+    """
+    The job runtime, built once (config, StateManager, LLM client, caches) and
+    shared by every request. Built at startup; retried here if that failed.
+    """
+    with _runtime_lock:
+        runtime = getattr(app.state, "runtime", None)
+        if runtime is None:
+            logger.info("Creating job runtime...")
+            job = make_job()
+            sched = job.schedule
+            runtime = app.state.runtime = JobRuntime(job, max_workers=sched.max_workers if sched.parallel else 1)
+        return runtime
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        get_runtime()
+    except Exception:
+        logger.exception("Job runtime not available at startup; will retry on first run request")
+    yield
+    runtime = getattr(app.state, "runtime", None)
+    if runtime is not None:
+        runtime.close()
+
+
+app = FastAPI(title="GenAI Error Log Inspector", lifespan=lifespan)
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
-@app.post("/ingest/run")
-def ingest_run():
+@app.get("/metrics")
+def metrics():
+    # Prometheus text format; see services/observability/metrics.py
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+@app.post("/ingest/run", status_code=202)
+def ingest_run(req: RunRequest | None = None):
+    """
+    Enqueue a run and return its id at once; poll GET /ingest/runs/{run_id}.
+    """
     logger.info("Received request: /ingest/run")
-    
     try:
-        logger.info("Creating job...")
-        job = make_job()
-        logger.info("Job created, executing...")
-        
-        job()  # this runs the ingestion task
-        
-        logger.info("Job finished successfully")
-        return {"status": "completed"}
+        runtime = get_runtime()
+        run, coalesced = runtime.trigger(req.units if req else None)
+    except UnknownUnitError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        logger.exception("Error while running job")
-        return {"status": "error", "detail": str(e)}
+        logger.exception("Error while queueing run")
+        return JSONResponse({"status": "error", "detail": str(e)}, status_code=500)
+    logger.info("Run %s: %s", run.run_id, run.status)
+    return {"status": run.status, "run_id": run.run_id, "units": run.units, "coalesced": coalesced}
+
+@app.get("/ingest/runs")
+def ingest_runs(limit: int = 20):
+    return [run.to_dict() for run in get_runtime().recent(limit)]
+
+@app.get("/ingest/runs/{run_id}")
+def ingest_run_status(run_id: str):
+    run = get_runtime().get(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"unknown run {run_id}")
+    return run.to_dict()
+
+
+@app.get("/analyses")
+def search_analyses(q: str | None = None, cluster: str | None = None, log_type: str | None = None,
+                    fingerprint: str | None = None, since: datetime | None = None, until: datetime | None = None,
+                    limit: int = Query(50, ge=1, le=500), cursor: int | None = None):
+    """
+    Search processed analyses, newest first. q is an FTS5 query over message,
+    summary, fix suggestion, template and log text (e.g. `deadlock AND innodb`,
+    `fix_suggestion:restart`); since/until bound the write time. Pass
+    next_cursor back as cursor for the next page.
+    """
+    try:
+        items, next_cursor = open_index(analysis_index_path()).search(
+            q, cluster, log_type, fingerprint,
+            since.timestamp() if since else None, until.timestamp() if until else None,
+            limit, cursor)
+    except InvalidQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
+
+@app.get("/analyses/{analysis_id}")
+def get_analysis(analysis_id: int):
+    """
+    One indexed analysis plus its full record from the output segment.
+    """
+    row = open_index(analysis_index_path()).get(analysis_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"unknown analysis {analysis_id}")
+    records = read_block_at(Path(OUTPUT_BASE) / row["cluster"] / row["log_type"], row["segment"], row["block_offset"])
+    row["record"] = records[row["position"]] if records and row["position"] < len(records) else None
+    return row
@@ -0,0 +1,8 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class RunRequest(BaseModel):
+    # "cluster/log_type" names; omitted or empty = every enabled unit
+    units: Optional[List[str]] = None
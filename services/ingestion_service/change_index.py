@@ -0,0 +1,84 @@
+# services/ingestion_service/change_index.py
+#
+# In-memory change index: what each (cluster, log_type) unit saw when its last
+# run finished. A unit whose listing (names, identities, sizes, mtimes) is
+# unchanged and that had nothing left to read is idle, and process_unit can
+# return before any DB query or file open.
+# For local directories an unchanged directory mtime means no file was added,
+# removed or renamed, so only the known files are re-stat'ed (no glob).
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from .ingestors.base import BaseIngestor, FileInfo
+
+logger = logging.getLogger(__name__)
+
+# A directory mtime this close to the listing time is not trusted: on coarse
+# timestamp filesystems a later create could leave it unchanged.
+RACY_SECONDS = 1.0
+
+
+def _listing_key(files: List[FileInfo]) -> Tuple:
+    return tuple(sorted((f.name, f.dev, f.ino, f.size, f.mtime) for f in files))
+
+
+@dataclass
+class UnitCheck:
+    files: List[FileInfo]       # current listing, to pass on to FileSetTracker.plan()
+    idle: bool
+    dir_signature: Optional[int] = None
+    listed_at: float = 0.0
+
+
+@dataclass
+class UnitState:
+    files: List[FileInfo]
+    dir_signature: Optional[int]
+    listed_at: float
+    offsets: Dict[str, int] = field(default_factory=dict)  # last committed offset per file
+    pending: bool = False       # something was left unread (capped read, held record, ...)
+
+
+class ChangeIndex:
+
+    def __init__(self, racy_seconds: float = RACY_SECONDS):
+        self.racy_seconds = racy_seconds
+        self._lock = threading.Lock()
+        self._units: Dict[str, UnitState] = {}
+        self.stats = {"idle": 0, "changed": 0}
+
+    def check(self, unit: str, ingestor: BaseIngestor, base_path: str, file_glob: str) -> UnitCheck:
+        with self._lock:
+            prev = self._units.get(unit)
+        listed_at = time.time()
+        signature = ingestor.dir_signature(base_path)
+        files = None
+        if (prev is not None and signature is not None and signature == prev.dir_signature
+                and prev.listed_at - signature / 1e9 > self.racy_seconds):
+            files = ingestor.stat_files([f.path for f in prev.files])
+            if files is not None and len(files) != len(prev.files):
+                files = None  # one vanished under an unchanged mtime (clock skew): relist
+        if files is None:
+            files = ingestor.list_files(base_path, file_glob)
+
+        idle = prev is not None and not prev.pending and _listing_key(files) == _listing_key(prev.files)
+        with self._lock:
+            self.stats["idle" if idle else "changed"] += 1
+        return UnitCheck(files, idle, signature, listed_at)
+
+    def record(self, unit: str, check: UnitCheck, offsets: Dict[str, int]):
+        """
+        Remember a finished run. offsets: committed offset of every file that was
+        read (files that were not had nothing new).
+        """
+        pending = any(offsets.get(f.name, f.size) < f.size for f in check.files)
+        with self._lock:
+            self._units[unit] = UnitState(check.files, check.dir_signature, check.listed_at, offsets, pending)
+
+    def forget(self, unit: str):
+        with self._lock:
+            self._units.pop(unit, None)
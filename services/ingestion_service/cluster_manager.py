@@ -11,6 +11,9 @@ import yaml
 from services.ingestion_service.config import AppConfig, Cluster, LogType
 from .ingestors.local_ingestor import LocalIngestor
 from .ingestors.sftp_ingestor import SFTPIngestor
+from .ingestors.sftp_pool import SFTPSessionPool
+from .parser.base_parser import BaseParser
+from .parser.registry import get_parser
 
 class ClusterManager:
     """
@@ -18,6 +21,7 @@ class ClusterManager:
       - Loading and validating cluster configuration (clusters.yaml -> AppConfig)
       - Selecting enabled clusters
       - Producing the correct Ingestor implementation for a cluster
+      - Resolving each log type's parser (once, at load; unknown names fail fast)
       - Resolving base paths per (cluster, log_type) with env-aware behavior
 
     It does NOT perform IO itself (keeps SRP).
@@ -26,7 +30,8 @@ class ClusterManager:
     def __init__(self, config_path: str,
                  *,
                  env: str | None = None,
-                 local_mount: str | None = None):
+                 local_mount: str | None = None,
+                 sftp_pool: SFTPSessionPool | None = None):
         with open(config_path, "r", encoding="utf-8") as f:
             raw = yaml.safe_load(f) or {}
 
@@ -34,6 +39,11 @@ class ClusterManager:
         self.env = (env or os.getenv("ENVIRONMENT", "production")).lower()
         # Where host logs are mounted inside the container (compose volume)
         self.local_mount = local_mount or os.getenv("LOCAL_MOUNT_PATH", "/app/logs")
+        # SFTP sessions are shared by every ingestor this manager hands out
+        # (None -> the process-wide pool)
+        self.sftp_pool = sftp_pool
+        self._parsers = {(c.name, lt.name): get_parser(lt.parser)
+                         for c in self.app_cfg.clusters for lt in c.log_types}
 
     # ---------- Selection ----------
 
@@ -57,11 +67,17 @@ class ClusterManager:
                 port=cluster.port or 22,
                 username=cluster.username,
                 key_path=cluster.key_path,
+                pool=self.sftp_pool,
+                block_size=cluster.read_block_size,
+                max_bytes_per_cycle=cluster.max_bytes_per_cycle,
             )
 
         # Future: add http/syslog implementations here
         raise ValueError(f"Unsupported cluster type: {cluster.type}")
 
+    def parser_for(self, cluster: Cluster, lt: LogType) -> BaseParser:
+        return self._parsers[(cluster.name, lt.name)]
+
     # ---------- Path resolution ----------
 
     def resolve_path(self, cluster: Cluster, lt: LogType) -> str:
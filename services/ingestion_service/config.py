@@ -8,6 +8,14 @@ class LogType(BaseModel):
     include_regex: Optional[str] = None
     exclude_regex: Optional[str] = None
     parser: str = "regex_parser"
+    # Own cadence for this log type (default: schedule.every_minutes)
+    every_minutes: Optional[float] = None
+    # Multi-line records: regex matching the first line of a record (laravel has a
+    # built-in one). A trailing record is emitted once the file has been quiet for
+    # multiline_flush_seconds; lines past max_event_bytes are dropped from a record.
+    multiline_start: Optional[str] = None
+    multiline_flush_seconds: float = 30.0
+    max_event_bytes: int = 1024 * 1024
 
 class Cluster(BaseModel):
     name: str
@@ -17,12 +25,47 @@ class Cluster(BaseModel):
     port: Optional[int] = 22
     username: Optional[str] = None
     key_path: Optional[str] = None
+    # SFTP bulk reads: block size per request window and per-cycle cap (None = no cap)
+    read_block_size: int = 1024 * 1024
+    max_bytes_per_cycle: Optional[int] = 64 * 1024 * 1024
     log_types: List[LogType]
 
 class ScheduleCfg(BaseModel):
-    every_minutes: int = 5
+    every_minutes: float = 5
     parallel: bool = True
+    max_workers: int = 8
+    # Random delay added to each unit's start so units don't fire in lockstep
+    jitter_seconds: float = 10.0
+
+class PipelineCfg(BaseModel):
+    # Lines per micro-batch and batches buffered between stages (backpressure)
+    batch_size: int = 200
+    queue_size: int = 4
+    # Read+parse local files in worker processes (0 = in the pipeline thread);
+    # each worker task covers parse_range_bytes of the file
+    parse_workers: int = 0
+    parse_range_bytes: int = 8 * 1024 * 1024
+
+class FollowCfg(BaseModel):
+    # Follow mode: local units also run as soon as their files change.
+    # mode "auto" uses inotify and polls directories it can't watch; use "poll"
+    # for mounts written from outside this kernel (NFS, Docker Desktop bind mounts).
+    enabled: bool = False
+    mode: str = Field(default="auto", pattern="^(auto|inotify|poll)$")
+    debounce_ms: int = 100
+    max_delay_ms: int = 2000
+    poll_seconds: float = 1.0
+
+class OutputCfg(BaseModel):
+    # Analysis output: one segment store per cluster/log_type under OUTPUT_BASE.
+    # The active segment is closed and gzip-compressed past segment_mb; readers
+    # inflate member_kb of raw output at a time.
+    segment_mb: float = 64
+    member_kb: int = 256
 
 class AppConfig(BaseModel):
     schedule: ScheduleCfg
+    pipeline: PipelineCfg = Field(default_factory=PipelineCfg)
+    follow: FollowCfg = Field(default_factory=FollowCfg)
+    output: OutputCfg = Field(default_factory=OutputCfg)
     clusters: List[Cluster]
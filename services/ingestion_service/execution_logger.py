@@ -1,26 +1,43 @@
 import os
 import json
 import time
+import logging
 import mysql.connector
 from datetime import datetime
-from mysql.connector import Error
+from typing import Optional
+
+from .state_manager import ConnectionPool
+from .write_behind import WriteBehindRecorder, get_recorder
+
+logger = logging.getLogger(__name__)
+
+INSERT_RUN_SQL = """
+INSERT INTO ingestion_runs (run_time, execution_time, execution_interval, status, payload, response)
+VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
 
 class ExecutionLogger:
-    def __init__(self, db_config: dict, log_file: str = "execution.log", debug: bool = False):
+    """
+    Records ingestion runs (DB + file) and, with debug on, every log entry
+    (file). Both are queued on the write-behind recorder and written in
+    batches over one reused connection; call flush() to wait for them.
+    """
+
+    def __init__(self, db_config: dict, log_file: str = "execution.log", debug: bool = False,
+                 recorder: Optional[WriteBehindRecorder] = None):
         self.db_config = db_config
         self.log_file = log_file
         self.debug = debug
+        self.recorder = recorder or get_recorder()
+        # One connection, kept between flushes (dropped and reopened after a DB error)
+        self.pool = ConnectionPool(self._connect_db, size=1)
 
         # Ensure directory exists
-        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+        os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
 
     def _connect_db(self):
-        """Create DB connection (short-lived, per log)."""
-        try:
-            return mysql.connector.connect(**self.db_config)
-        except Error as e:
-            print(f"[ExecutionLogger] DB connection failed: {e}")
-            return None
+        return mysql.connector.connect(**self.db_config)
 
     def log_run(self, start_time: float, payload: dict, response: dict, status: str):
         """Log summary of ingestion run to DB + file."""
@@ -38,30 +55,17 @@ class ExecutionLogger:
         }
 
         # 1. Save to DB
-        conn = self._connect_db()
-        if conn:
-            try:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT INTO ingestion_runs (run_time, execution_time, execution_interval, status, payload, response)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                """, (
-                    record["time"],
-                    record["execution_time"],
-                    record["execution_interval"],
-                    record["status"],
-                    record["payload"],
-                    record["response"],
-                ))
-                conn.commit()
-            except Error as e:
-                print(f"[ExecutionLogger] Failed to insert into DB: {e}")
-            finally:
-                conn.close()
+        self.recorder.add_row(self.pool.get, INSERT_RUN_SQL, (
+            record["time"],
+            record["execution_time"],
+            record["execution_interval"],
+            record["status"],
+            record["payload"],
+            record["response"],
+        ))
 
         # 2. Save to text file
-        with open(self.log_file, "a") as f:
-            f.write(json.dumps(record) + "\n")
+        self.recorder.add_line(self.log_file, json.dumps(record) + "\n")
 
     def log_entry(self, entry: dict):
         """Log every single log entry (only if debug=1)."""
@@ -72,5 +76,12 @@ class ExecutionLogger:
             "time": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
             "entry": entry,
         }
-        with open(self.log_file, "a") as f:
-            f.write(json.dumps(line) + "\n")
+        self.recorder.add_line(self.log_file, json.dumps(line) + "\n")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything logged so far is written."""
+        return self.recorder.flush(timeout)
+
+    def close(self):
+        self.flush()
+        self.pool.close()
@@ -0,0 +1,160 @@
+# services/ingestion_service/file_tracker.py
+#
+# Rotation-aware tracking of the files behind one (cluster, log_type) glob.
+# Files are identified by a fingerprint (device, inode and a hash of the first
+# bytes) rather than by name, so a rotated file keeps its offset under its new
+# name and a truncated/recreated file with the old name starts again from 0.
+
+from __future__ import annotations
+
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from .ingestors.base import BaseIngestor, FileInfo
+
+logger = logging.getLogger(__name__)
+
+HEAD_BYTES = 1024
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    dev: int
+    ino: int
+    head_len: int
+    digest: str
+
+    @classmethod
+    def of(cls, info: FileInfo, head: bytes) -> "Fingerprint":
+        return cls(info.dev, info.ino, len(head), _digest(head))
+
+    @classmethod
+    def parse(cls, value: Optional[str]) -> Optional["Fingerprint"]:
+        if not value:
+            return None
+        try:
+            dev, ino, head_len, digest = value.split(":")
+            return cls(int(dev), int(ino), int(head_len), digest)
+        except ValueError:
+            return None
+
+    def __str__(self) -> str:
+        return f"{self.dev}:{self.ino}:{self.head_len}:{self.digest}"
+
+    def matches(self, info: FileInfo, head: bytes) -> bool:
+        """
+        True if (info, head) is the same file this fingerprint was taken from.
+        The stored hash covers head_len bytes, so a file that was shorter than
+        HEAD_BYTES when first seen is still recognised after it grows.
+        """
+        if self.ino and info.ino and (self.dev, self.ino) != (info.dev, info.ino):
+            return False
+        if len(head) < self.head_len:
+            return False
+        return _digest(head[:self.head_len]) == self.digest
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()[:16]
+
+
+@dataclass
+class WorkItem:
+    info: FileInfo
+    start_offset: int
+    fingerprint: str
+
+
+@dataclass
+class TrackPlan:
+    work: List[WorkItem] = field(default_factory=list)  # oldest first
+    stale: List[str] = field(default_factory=list)      # file keys to forget
+    # Files with nothing to read whose state must still be (re)stored, e.g. a
+    # fully read file rotated to a new name: offset = size under the new key
+    carry: List[WorkItem] = field(default_factory=list)
+
+
+class FileSetTracker:
+    """
+    Decides, for every file in a glob, where reading should resume.
+
+    states maps file_key (the file name) -> (offset, fingerprint string) as
+    stored by StateManager.get_file_states().
+    """
+
+    def __init__(self, ingestor: BaseIngestor, head_bytes: int = HEAD_BYTES):
+        self.ingestor = ingestor
+        self.head_bytes = head_bytes
+
+    def plan(self, base_path: str, file_glob: str,
+             states: Dict[str, Tuple[int, Optional[str]]],
+             files: Optional[List[FileInfo]] = None) -> TrackPlan:
+        """
+        files: the listing, if the caller already has one (else list_files()).
+        """
+        if files is None:
+            files = self.ingestor.list_files(base_path, file_glob)
+        files = sorted(files, key=lambda f: (f.mtime, f.name))
+        names = {f.name for f in files}
+        plan = TrackPlan(stale=[k for k in states if k not in names])
+
+        # Files whose name, identity and size are unchanged need no head read.
+        candidates = []
+        claimed = set()
+        for f in files:
+            st = states.get(f.name)
+            if st is not None:
+                fp = Fingerprint.parse(st[1])
+                if f.size == st[0] and fp is not None and (not fp.ino or (fp.dev, fp.ino) == (f.dev, f.ino)):
+                    claimed.add(f.name)
+                    continue
+            candidates.append(f)
+        if not candidates:
+            return plan
+
+        heads = self.ingestor.read_heads([f.path for f in candidates], self.head_bytes)
+        parsed = {k: (off, Fingerprint.parse(fp)) for k, (off, fp) in states.items()}
+        resolved: Dict[str, Optional[int]] = {}
+
+        # Pass 1: same name, same identity -> resume
+        for f in candidates:
+            head = heads.get(f.path)
+            if head is None:
+                continue  # vanished since listing
+            off, fp = parsed.get(f.name, (None, None))
+            if off is not None and (fp is None or fp.matches(f, head)):
+                resolved[f.name] = off
+                claimed.add(f.name)
+
+        # Pass 2: renamed (rotated) files inherit the offset of the state they came from
+        for f in candidates:
+            head = heads.get(f.path)
+            if head is None or f.name in resolved:
+                continue
+            resolved[f.name] = None
+            for key, (off, fp) in parsed.items():
+                if key not in claimed and fp is not None and fp.matches(f, head):
+                    logger.info("[FileSetTracker] %s continues rotated file %s at offset %d", f.name, key, off)
+                    resolved[f.name] = off
+                    claimed.add(key)
+                    break
+
+        for f in candidates:
+            if f.name not in resolved:
+                continue
+            start = resolved[f.name] or 0
+            if start > f.size:
+                logger.warning("[FileSetTracker] %s shrank below offset %d (truncated); restarting at 0",
+                               f.name, start)
+                start = 0
+            # Empty files are left alone: an empty head would fingerprint as anything.
+            if f.size == 0:
+                continue
+            item = WorkItem(f, start, str(Fingerprint.of(f, heads[f.path])))
+            if f.size > start:
+                plan.work.append(item)
+            elif states.get(f.name) != (start, item.fingerprint):
+                plan.carry.append(item)
+        return plan
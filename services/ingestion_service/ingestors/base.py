@@ -1,7 +1,25 @@
 # services/ingestion_service/ingestors/base.py
 
 from abc import ABC, abstractmethod
-from typing import Iterator, Optional, Tuple
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .line_reader import ReadProgress
+
+
+@dataclass(frozen=True)
+class FileInfo:
+    """
+    Stat snapshot of one candidate log file.
+    dev/ino are 0 where the transport does not expose them (e.g. SFTP).
+    """
+    path: str
+    name: str
+    size: int
+    mtime: float
+    dev: int = 0
+    ino: int = 0
+
 
 class BaseIngestor(ABC):
     """
@@ -16,6 +34,35 @@ class BaseIngestor(ABC):
         """
         pass
 
+    @abstractmethod
+    def list_files(self, base_path: str, file_glob: str) -> List[FileInfo]:
+        """
+        Return a stat snapshot of every file matching file_glob in base_path.
+        """
+        pass
+
+    def dir_signature(self, base_path: str) -> Optional[int]:
+        """
+        Cheap token that changes whenever files are added, removed or renamed in
+        base_path (local: directory mtime in ns). None where no such check exists.
+        """
+        return None
+
+    def stat_files(self, paths: Iterable[str]) -> Optional[List[FileInfo]]:
+        """
+        Stat known files without listing their directory; files that vanished are
+        left out. None where the transport can't do better than list_files().
+        """
+        return None
+
+    @abstractmethod
+    def read_heads(self, file_idents: Iterable[str], n: int) -> Dict[str, bytes]:
+        """
+        Return the first n bytes of each file (fewer if the file is shorter).
+        Used to fingerprint files across rotations.
+        """
+        pass
+
     @abstractmethod
     def incremental_read(
         self,
@@ -23,9 +70,12 @@ class BaseIngestor(ABC):
         start_offset: int,
         include_regex: Optional[str],
         exclude_regex: Optional[str],
+        progress: Optional[ReadProgress] = None,
     ) -> Iterator[Tuple[str, int]]:
         """
         Yield (line, new_offset) pairs starting from start_offset in file_ident,
         applying include/exclude regex filters.
+        If given, progress.offset tracks how far the file was scanned, including
+        lines the filters dropped.
         """
         pass
@@ -0,0 +1,133 @@
+# services/ingestion_service/ingestors/line_reader.py
+#
+# Byte-oriented line splitting shared by the ingestors.
+# Works on raw byte chunks so offsets are exact file positions (no text-mode
+# tell() cookies) and include/exclude filters run before any decoding.
+
+import re
+from typing import BinaryIO, Iterable, Iterator, Optional, Pattern, Tuple
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+
+class ReadProgress:
+    """
+    Offset just past the last complete line *scanned* (matched or not).
+
+    Readers only yield matching lines, so without this a long run of filtered
+    lines would be re-scanned every cycle. Callers checkpoint
+    max(last yielded offset, progress.offset) once the read finishes.
+    """
+
+    __slots__ = ("offset",)
+
+    def __init__(self, offset: int = 0):
+        self.offset = offset
+
+
+# include_regex for "every line, no filter". Unlike None it never stands for a
+# reader's default include (SFTPIngestor keeps only error lines by default).
+MATCH_ALL = "(?:)"
+
+
+def compile_bytes_regex(pattern: Optional[str], flags: int = 0) -> Optional[Pattern[bytes]]:
+    """
+    Compile a str regex from config into a bytes regex (None and MATCH_ALL give None).
+    """
+    if not pattern or pattern == MATCH_ALL:
+        return None
+    return re.compile(pattern.encode("utf-8"), flags)
+
+
+def iter_chunks(fh: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                max_bytes: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Read fh in fixed-size chunks from its current position.
+    Stops after max_bytes when given (the last line crossing the cap is still completed
+    by split_lines, since it only emits whole lines).
+    """
+    remaining = max_bytes
+    while True:
+        size = chunk_size if remaining is None else min(chunk_size, remaining)
+        if size <= 0:
+            return
+        chunk = fh.read(size)
+        if not chunk:
+            return
+        if remaining is not None:
+            remaining -= len(chunk)
+        yield chunk
+
+
+def split_lines(chunks: Iterable[bytes], start_offset: int,
+                progress: Optional[ReadProgress] = None) -> Iterator[Tuple[bytes, int]]:
+    """
+    Split a stream of byte chunks into complete lines.
+
+    Yields (line_without_eol, offset_after_line). A trailing fragment without a
+    newline is NOT emitted: it is usually a line still being written, and the
+    caller's offset stays at its start so the next cycle reads it whole.
+    """
+    offset = start_offset
+    carry = b""
+    for chunk in chunks:
+        parts = (carry + chunk if carry else chunk).split(b"\n")
+        carry = parts.pop()
+        for line in parts:
+            offset += len(line) + 1
+            if line[-1:] == b"\r":
+                line = line[:-1]
+            yield line, offset
+        if progress is not None:
+            progress.offset = offset
+
+
+def scan_lines(chunks: Iterable[bytes], start_offset: int,
+               include_pat: Optional[Pattern[bytes]],
+               exclude_pat: Optional[Pattern[bytes]],
+               encoding: str = "utf-8",
+               progress: Optional[ReadProgress] = None) -> Iterator[Tuple[str, int]]:
+    """
+    Yield (decoded_line, offset_after_line) for complete lines that pass the filters.
+
+    With an include pattern the chunk is scanned with a single regex search per
+    matching line, so non-matching lines are skipped in C without being sliced,
+    split or decoded. include_pat should be compiled with re.MULTILINE so that
+    ^/$ anchor per line (compile_bytes_regex(..., re.MULTILINE)).
+    Only surviving lines are decoded; invalid bytes are replaced, never raised.
+    """
+    if include_pat is None:
+        exc = exclude_pat.search if exclude_pat is not None else None
+        for line, offset in split_lines(chunks, start_offset, progress):
+            if exc is not None and exc(line) is not None:
+                continue
+            yield line.decode(encoding, errors="replace"), offset
+        return
+
+    inc = include_pat.search
+    exc = exclude_pat.search if exclude_pat is not None else None
+    base = start_offset  # file offset of buf[0]
+    carry = b""
+    for chunk in chunks:
+        buf = carry + chunk if carry else chunk
+        end = buf.rfind(b"\n") + 1  # only complete lines are scanned
+        pos = 0
+        while pos < end:
+            m = inc(buf, pos, end)
+            if m is None:
+                break
+            ls = buf.rfind(b"\n", 0, m.start()) + 1
+            le = buf.find(b"\n", m.start())
+            pos = le + 1
+            line = buf[ls:le]
+            if m.end() > le and inc(line) is None:  # match spanned lines
+                continue
+            if line[-1:] == b"\r":
+                line = line[:-1]
+            if exc is not None and exc(line) is not None:
+                continue
+            yield line.decode(encoding, errors="replace"), base + pos
+        base += end
+        carry = buf[end:]
+        if progress is not None:
+            progress.offset = base
@@ -0,0 +1,84 @@
+# services/ingestion_service/ingestors/listing_cache.py
+#
+# Short-lived cache of remote directory listings. Several log types often share
+# one remote directory (different globs over the same path); with this cache a
+# single listdir_attr round trip serves all of them. Concurrent callers for the
+# same directory wait for the one listing in flight instead of issuing their own.
+
+import os
+import threading
+import time
+from typing import Callable, Dict, Hashable, List
+
+DEFAULT_TTL = 5.0
+
+
+class _Entry:
+    __slots__ = ("loaded_at", "value", "ready", "error")
+
+    def __init__(self):
+        self.loaded_at = 0.0
+        self.value = None
+        self.ready = threading.Event()
+        self.error = None
+
+
+class DirListingCache:
+    """
+    ttl: seconds a listing is reused (0 disables caching, in-flight sharing remains)
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, _Entry] = {}
+        self.stats = {"loads": 0, "hits": 0}
+
+    def get(self, key: Hashable, load: Callable[[], List]) -> List:
+        with self._lock:
+            entry = self._entries.get(key)
+            fresh = entry is not None and (not entry.ready.is_set()
+                                           or time.monotonic() - entry.loaded_at < self.ttl)
+            if fresh and entry.error is None:
+                self.stats["hits"] += 1
+            else:
+                entry = self._entries[key] = _Entry()
+                self.stats["loads"] += 1
+                fresh = False
+        if fresh:
+            entry.ready.wait()
+            if entry.error is None:
+                return entry.value
+            return self.get(key, load)  # the shared load failed: try on our own
+
+        try:
+            entry.value = load()
+        except BaseException as e:
+            entry.error = e
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            raise
+        finally:
+            entry.loaded_at = time.monotonic()
+            entry.ready.set()
+        return entry.value
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+_default_cache: DirListingCache | None = None
+_default_lock = threading.Lock()
+
+
+def get_listing_cache() -> DirListingCache:
+    """
+    The process-wide listing cache shared by every SFTPIngestor.
+    """
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = DirListingCache(ttl=float(os.getenv("SFTP_LISTING_TTL", str(DEFAULT_TTL))))
+        return _default_cache
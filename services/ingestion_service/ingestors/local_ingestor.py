@@ -1,7 +1,10 @@
+import os
+import stat
 import re
-from typing import Iterator, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from pathlib import Path
-from .base import BaseIngestor
+from .base import BaseIngestor, FileInfo
+from .line_reader import DEFAULT_CHUNK_SIZE, ReadProgress, compile_bytes_regex, iter_chunks, scan_lines
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,73 +14,110 @@ class LocalIngestor(BaseIngestor):
     Reads logs from a local filesystem incrementally.
     """
 
-    def __init__(self, base_path: str = "/app/logs"):
+    def __init__(self, base_path: str = "/app/logs", chunk_size: int = DEFAULT_CHUNK_SIZE):
         self.base_path = Path(base_path)
-        logger.info(f"[LocalIngestor] Initialized with base_path={self.base_path}")
+        self.chunk_size = chunk_size
+        logger.info("[LocalIngestor] Initialized with base_path=%s", self.base_path)
 
     def latest_file(self, base_path: str, file_glob: str) -> Optional[str]:
         """
         Returns the latest file (by modified time) in base_path matching file_glob.
         """
-        logger.debug(f"[LocalIngestor] latest_file called with base_path={base_path}, file_glob={file_glob}")
+        logger.debug("[LocalIngestor] latest_file called with base_path=%s, file_glob=%s", base_path, file_glob)
         directory = Path(base_path)
-        logger.info(f"[LocalIngestor] latest_file directory with base_path={base_path}, file_glob={file_glob}, directory={directory}")
         if not directory.exists() or not directory.is_dir():
-            logger.warning(f"[LocalIngestor] Directory {base_path} does not exist or is not a dir.")
+            logger.warning("[LocalIngestor] Directory %s does not exist or is not a dir.", base_path)
             return None
 
         files = list(directory.glob(file_glob))
-        logger.info(f"[LocalIngestor] files {files} directory {directory} and file glob {file_glob}")
+        logger.debug("[LocalIngestor] %d file(s) in %s match %s", len(files), directory, file_glob)
         if not files:
-            logger.warning(f"[LocalIngestor] No files found in {base_path} with pattern {file_glob}")
+            logger.warning("[LocalIngestor] No files found in %s with pattern %s", base_path, file_glob)
             return None
 
         latest = max(files, key=lambda f: f.stat().st_mtime)
-        logger.info(f"[LocalIngestor] Latest file selected: {latest}")
-        logger.info(f"[LocalIngestor] latest_file directory2 with base_path={base_path}, file_glob={file_glob}, directory={directory}")
+        logger.info("[LocalIngestor] Latest file selected: %s", latest)
         return str(latest)
 
+    def list_files(self, base_path: str, file_glob: str) -> List[FileInfo]:
+        """
+        Stat every file in base_path matching file_glob (one stat() per file).
+        """
+        directory = Path(base_path)
+        if not directory.is_dir():
+            logger.warning("[LocalIngestor] Directory %s does not exist or is not a dir.", base_path)
+            return []
+
+        infos = []
+        for p in directory.glob(file_glob):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue  # rotated away between glob and stat
+            if not stat.S_ISREG(st.st_mode):
+                continue
+            infos.append(FileInfo(path=str(p), name=p.name, size=st.st_size,
+                                  mtime=st.st_mtime, dev=st.st_dev, ino=st.st_ino))
+        return infos
+
+    def dir_signature(self, base_path: str) -> Optional[int]:
+        try:
+            return os.stat(base_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def stat_files(self, paths: Iterable[str]) -> Optional[List[FileInfo]]:
+        infos = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            infos.append(FileInfo(path=path, name=os.path.basename(path), size=st.st_size,
+                                  mtime=st.st_mtime, dev=st.st_dev, ino=st.st_ino))
+        return infos
+
+    def read_heads(self, file_idents: Iterable[str], n: int) -> Dict[str, bytes]:
+        heads = {}
+        for ident in file_idents:
+            try:
+                with open(ident, "rb") as f:
+                    heads[ident] = f.read(n)
+            except FileNotFoundError:
+                continue
+        return heads
+
     def incremental_read(
         self,
         file_ident: str,
         start_offset: int,
         include_regex: Optional[str],
         exclude_regex: Optional[str],
+        progress: Optional[ReadProgress] = None,
     ) -> Iterator[Tuple[str, int]]:
         """
         Incrementally read a file from start_offset, yielding (line, new_offset) pairs.
         Filters lines using include/exclude regex if provided.
+
+        The file is read in binary mode in large chunks; offsets are exact byte
+        positions, filters run on raw bytes and only matching lines are decoded
+        (invalid UTF-8 is replaced). A trailing line without a newline is left for
+        the next cycle.
         """
-        
-        logger.debug(f"[LocalIngestor] incremental_read called with file={file_ident}, start_offset={start_offset}, "
-                     f"include_regex={include_regex}, exclude_regex={exclude_regex}")
+        logger.debug("[LocalIngestor] incremental_read called with file=%s, start_offset=%s, "
+                     "include_regex=%s, exclude_regex=%s",
+                     file_ident, start_offset, include_regex, exclude_regex)
         file_path = Path(file_ident)
         if not file_path.exists():
-            logger.error(f"[LocalIngestor] File not found: {file_ident}")
+            logger.error("[LocalIngestor] File not found: %s", file_ident)
             return
 
-        include_pat = re.compile(include_regex) if include_regex else None
-        exclude_pat = re.compile(exclude_regex) if exclude_regex else None
+        include_pat = compile_bytes_regex(include_regex, re.MULTILINE)
+        exclude_pat = compile_bytes_regex(exclude_regex)
 
-        with open(file_path, "r", encoding="utf-8") as f:
+        with open(file_path, "rb", buffering=0) as f:
             f.seek(start_offset)  # resume from last offset
-            logger.info(f"[LocalIngestor] Starting read from offset={start_offset} in file={file_ident}")
-
-            while True:
-                line = f.readline()
-                if not line:
-                    logger.debug("[LocalIngestor] Reached EOF")
-                    break  # EOF
-
-                line_stripped = line.rstrip("\n")
-
-                # Apply include/exclude filters
-                if include_pat and not include_pat.search(line_stripped):
-                    logger.debug(f"[LocalIngestor] Line skipped (no match include_regex): {line_stripped}")
-                    continue
-                if exclude_pat and exclude_pat.search(line_stripped):
-                    logger.debug(f"[LocalIngestor] Line skipped (matched exclude_regex): {line_stripped}")
-                    continue
-
-                logger.debug(f"[LocalIngestor] Yielding line='{line_stripped}' at offset={start_offset}")
-                yield line_stripped, f.tell()  # get offset safely with readline()
+            logger.info("[LocalIngestor] Starting read from offset=%s in file=%s", start_offset, file_ident)
+            yield from scan_lines(iter_chunks(f, self.chunk_size), start_offset,
+                                  include_pat, exclude_pat, progress=progress)
+        logger.debug("[LocalIngestor] Reached EOF")
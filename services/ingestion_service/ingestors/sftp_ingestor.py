@@ -1,66 +1,126 @@
-import fnmatch, paramiko, re
+import fnmatch, re, stat
 import logging
-from .base import BaseIngestor
+from .base import BaseIngestor, FileInfo
+from .line_reader import DEFAULT_CHUNK_SIZE, ReadProgress, compile_bytes_regex, scan_lines
+from .listing_cache import DirListingCache, get_listing_cache
+from .sftp_pool import SFTPSessionPool, get_pool
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)  # Or INFO in production
 
-# Optional: if not already configured globally, add console handler
-if not logger.handlers:
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.DEBUG)
-    formatter = logging.Formatter("[%(asctime)s] %(levelname)s - %(message)s")
-    ch.setFormatter(formatter)
-    logger.addHandler(ch)
+DEFAULT_INCLUDE = re.compile(rb"(ERROR|EXCEPTION|FATAL|CRITICAL)", re.I | re.MULTILINE)
+DEFAULT_MAX_BYTES_PER_CYCLE = 64 * 1024 * 1024
+DEFAULT_PIPELINE_DEPTH = 8
+
 
 class SFTPIngestor(BaseIngestor):
-    def __init__(self, host: str, port: int, username: str, key_path: str):
+    def __init__(self, host: str, port: int, username: str, key_path: str,
+                 pool: SFTPSessionPool | None = None,
+                 block_size: int = DEFAULT_CHUNK_SIZE,
+                 max_bytes_per_cycle: int | None = DEFAULT_MAX_BYTES_PER_CYCLE,
+                 pipeline_depth: int = DEFAULT_PIPELINE_DEPTH,
+                 listing_cache: DirListingCache | None = None):
         self.host, self.port, self.username, self.key_path = host, port, username, key_path
-        logger.info(f"SFTPIngestor initialized for host={host}, port={port}, user={username}")
+        self.block_size = block_size
+        # Memory per read is bounded by max_bytes_per_cycle (None = whole backlog)
+        self.max_bytes_per_cycle = max_bytes_per_cycle
+        self.pipeline_depth = pipeline_depth
+        # Sessions come from the process-wide pool, so instances are cheap to create per unit
+        self.pool = pool or get_pool()
+        # Log types sharing a remote directory share one listdir_attr per TTL
+        self.listing_cache = listing_cache or get_listing_cache()
+        logger.info("SFTPIngestor initialized for host=%s, port=%s, user=%s", host, port, username)
+
+    def _session(self):
+        return self.pool.session(self.host, self.port, self.username, self.key_path)
 
-    def _client(self):
-        logger.debug(f"Connecting to SFTP {self.host}:{self.port} with key {self.key_path}")
-        pkey = paramiko.RSAKey.from_private_key_file(self.key_path)
-        transport = paramiko.Transport((self.host, self.port))
-        transport.connect(username=self.username, pkey=pkey)
-        logger.info(f"SFTP connection established to {self.host}:{self.port}")
-        return paramiko.SFTPClient.from_transport(transport), transport
+    def _listdir_attr(self, base_path: str):
+        def load():
+            with self._session() as sftp:
+                return sftp.listdir_attr(base_path)
+        return self.listing_cache.get((self.host, self.port, self.username, base_path), load)
 
     def latest_file(self, base_path: str, file_glob: str):
-        sftp, transport = self._client()
-        logger.debug(f"Fetching latest file from {base_path} matching {file_glob}")
-        try:
-            entries = sftp.listdir_attr(base_path)
-            candidates = [e for e in entries if fnmatch.fnmatch(e.filename, file_glob)]
-            logger.debug(f"Found {len(candidates)} matching files")
-            if not candidates: 
-                logger.warning(f"No matching files found in {base_path} for {file_glob}")
-                return None
-            latest = max(candidates, key=lambda e: e.st_mtime)
-            latest_path = f"{base_path.rstrip('/')}/{latest.filename}"
-            logger.info(f"Latest file: {latest_path} (mtime={latest.st_mtime})")
-            return latest_path
-        finally:
-            logger.debug("Closing SFTP connection after latest_file()")
-            sftp.close(); transport.close()
+        logger.debug("Fetching latest file from %s matching %s", base_path, file_glob)
+        entries = self._listdir_attr(base_path)
+        candidates = [e for e in entries if fnmatch.fnmatch(e.filename, file_glob)]
+        logger.debug("Found %d matching files", len(candidates))
+        if not candidates:
+            logger.warning("No matching files found in %s for %s", base_path, file_glob)
+            return None
+        latest = max(candidates, key=lambda e: e.st_mtime)
+        latest_path = f"{base_path.rstrip('/')}/{latest.filename}"
+        logger.info("Latest file: %s (mtime=%s)", latest_path, latest.st_mtime)
+        return latest_path
+
+    def list_files(self, base_path: str, file_glob: str):
+        entries = self._listdir_attr(base_path)
+        base = base_path.rstrip('/')
+        # SFTP attributes carry no inode/device, so identity relies on the head hash
+        return [
+            FileInfo(path=f"{base}/{e.filename}", name=e.filename,
+                     size=e.st_size or 0, mtime=e.st_mtime or 0)
+            for e in entries
+            if fnmatch.fnmatch(e.filename, file_glob) and stat.S_ISREG(e.st_mode or 0)
+        ]
+
+    def read_heads(self, file_idents, n: int):
+        # One session for all heads instead of one per file
+        heads = {}
+        with self._session() as sftp:
+            for ident in file_idents:
+                try:
+                    with sftp.open(ident, "rb") as fh:
+                        heads[ident] = fh.read(n)
+                except FileNotFoundError:
+                    continue
+            return heads
 
     def incremental_read(self, file_ident: str, start_offset: int,
-                         include_regex: str | None, exclude_regex: str | None):
-        logger.debug(f"Reading file {file_ident} from offset {start_offset}")
-        inc = re.compile(include_regex) if include_regex else re.compile(r"(ERROR|EXCEPTION|FATAL|CRITICAL)", re.I)
-        exc = re.compile(exclude_regex) if exclude_regex else None
+                         include_regex: str | None, exclude_regex: str | None,
+                         progress: ReadProgress | None = None):
+        """
+        Fetch [start_offset, size) in large pipelined blocks and split lines locally.
+
+        At most max_bytes_per_cycle bytes are read per call, so a large backlog is
+        drained in bounded slices over several cycles (the caller checkpoints via
+        progress). A window holding no line end is read on to the next one, so a
+        line longer than the cap still completes. Offsets are exact byte positions.
+        """
+        logger.debug("Reading file %s from offset %d", file_ident, start_offset)
+        # None: the default error filter; MATCH_ALL: every line
+        inc = compile_bytes_regex(include_regex, re.MULTILINE) if include_regex else DEFAULT_INCLUDE
+        exc = compile_bytes_regex(exclude_regex)
+
+        with self._session() as sftp:
+            size = sftp.stat(file_ident).st_size or 0
+            end = size
+            if self.max_bytes_per_cycle:
+                end = min(size, start_offset + self.max_bytes_per_cycle)
+            if end <= start_offset:
+                return
+            with sftp.open(file_ident, "rb") as fh:
+                logger.info("Started incremental read on %s (offset=%d, end=%d, size=%d)", file_ident, start_offset, end, size)
+                blocks = self._read_blocks(fh, start_offset, end, size)
+                yield from scan_lines(blocks, start_offset, inc, exc, progress=progress)
 
-        sftp, transport = self._client()
-        try:
-            with sftp.open(file_ident, "r") as fh:
-                fh.seek(start_offset)
-                logger.info(f"Started incremental read on {file_ident} (offset={start_offset})")
-                for raw in fh:
-                    line = raw.decode("utf-8", errors="ignore") if isinstance(raw, (bytes, bytearray)) else raw
-                    new_offset = fh.tell()
-                    if inc.search(line) and not (exc and exc.search(line)):
-                        logger.debug(f"Matched log line at offset={new_offset}: {line.strip()[:120]}")
-                        yield line.rstrip("\n"), new_offset
-        finally:
-            logger.debug("Closing SFTP connection after incremental_read()")
-            sftp.close(); transport.close()
+    def _read_blocks(self, fh, start: int, end: int, size: int):
+        # readv() issues all requests of a window up front (pipelined), so the
+        # link stays busy instead of paying one round trip per small read.
+        ranges = [(off, min(self.block_size, end - off)) for off in range(start, end, self.block_size)]
+        complete = False
+        for i in range(0, len(ranges), self.pipeline_depth):
+            for block in fh.readv(ranges[i:i + self.pipeline_depth]):
+                complete = complete or b"\n" in block
+                yield block
+        # No line end in the window: the cap cut a single long line. Read on up
+        # to its end, or the offset could never move past it.
+        off = end
+        while not complete and off < size:
+            block = next(iter(fh.readv([(off, min(self.block_size, size - off))])), b"")
+            if not block:
+                return
+            nl = block.find(b"\n")
+            if nl >= 0:
+                block, complete = block[:nl + 1], True
+            off += len(block)
+            yield block
@@ -0,0 +1,191 @@
+# services/ingestion_service/ingestors/sftp_pool.py
+#
+# Process-wide pool of SFTP sessions keyed by (host, port, username).
+# One SSH handshake per host is reused across units and cycles instead of two
+# per unit; sessions are kept alive, health-checked on checkout, evicted when
+# idle, and the number of concurrent sessions per host is capped.
+
+import atexit
+import contextlib
+import logging
+import os
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Tuple
+
+import paramiko
+
+logger = logging.getLogger(__name__)
+
+PoolKey = Tuple[str, int, str]
+
+
+@dataclass
+class _Session:
+    transport: paramiko.Transport
+    sftp: paramiko.SFTPClient
+    last_used: float = field(default_factory=time.monotonic)
+
+    def alive(self) -> bool:
+        channel = self.sftp.get_channel()
+        return self.transport.is_active() and channel is not None and not channel.closed
+
+    def close(self):
+        for closer in (self.sftp.close, self.transport.close):
+            try:
+                closer()
+            except Exception:
+                pass
+
+
+class _HostSlot:
+    def __init__(self, max_sessions: int):
+        self.limit = threading.BoundedSemaphore(max_sessions)
+        self.idle: List[_Session] = []
+
+
+class SFTPSessionPool:
+    """
+    Thread-safe SFTP session pool.
+
+    - max_per_host: concurrent sessions per (host, port, user); callers block beyond it
+    - idle_timeout: idle sessions older than this (seconds) are closed
+    - keepalive:    SSH keepalive interval (seconds) so NAT/firewalls keep idle sessions
+    """
+
+    def __init__(self, max_per_host: int = 4, idle_timeout: float = 300.0,
+                 keepalive: int = 30, connect_timeout: float = 15.0):
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self.keepalive = keepalive
+        self.connect_timeout = connect_timeout
+        self._lock = threading.Lock()
+        self._slots: Dict[PoolKey, _HostSlot] = {}
+        self._keys: Dict[Tuple[str, float], paramiko.PKey] = {}
+        self.stats = {"connects": 0, "reuses": 0, "evictions": 0}
+
+    # ---------- public ----------
+
+    @contextlib.contextmanager
+    def session(self, host: str, port: int, username: str, key_path: str) -> Iterator[paramiko.SFTPClient]:
+        """
+        Borrow an SFTPClient for the duration of the with-block.
+        """
+        key = (host, port, username)
+        slot = self._slot(key)
+        slot.limit.acquire()
+        sess = None
+        try:
+            sess = self._checkout(key, slot, key_path)
+            yield sess.sftp
+        except BaseException:
+            if sess is not None and not sess.alive():
+                sess.close()
+                sess = None
+            raise
+        finally:
+            if sess is not None:
+                sess.last_used = time.monotonic()
+                with self._lock:
+                    slot.idle.append(sess)
+            slot.limit.release()
+
+    def evict_idle(self) -> int:
+        """
+        Close sessions idle for longer than idle_timeout. Returns how many were closed.
+        """
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for slot in self._slots.values():
+                keep = []
+                for s in slot.idle:
+                    (expired if now - s.last_used > self.idle_timeout else keep).append(s)
+                slot.idle = keep
+            self.stats["evictions"] += len(expired)
+        for s in expired:
+            s.close()
+        return len(expired)
+
+    def close_all(self):
+        with self._lock:
+            sessions = [s for slot in self._slots.values() for s in slot.idle]
+            for slot in self._slots.values():
+                slot.idle = []
+        for s in sessions:
+            s.close()
+
+    # ---------- internals ----------
+
+    def _slot(self, key: PoolKey) -> _HostSlot:
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = _HostSlot(self.max_per_host)
+            return slot
+
+    def _checkout(self, key: PoolKey, slot: _HostSlot, key_path: str) -> _Session:
+        self.evict_idle()
+        while True:
+            with self._lock:
+                sess = slot.idle.pop() if slot.idle else None
+            if sess is None:
+                break
+            if sess.alive():
+                with self._lock:
+                    self.stats["reuses"] += 1
+                return sess
+            logger.info("Dropping dead SFTP session to %s:%s", key[0], key[1])
+            sess.close()
+        return self._connect(key, key_path)
+
+    def _connect(self, key: PoolKey, key_path: str) -> _Session:
+        host, port, username = key
+        logger.debug("Connecting to SFTP %s:%s as %s", host, port, username)
+        sock = socket.create_connection((host, port), timeout=self.connect_timeout)
+        transport = paramiko.Transport(sock)
+        try:
+            transport.banner_timeout = self.connect_timeout
+            transport.connect(username=username, pkey=self._private_key(key_path))
+            transport.set_keepalive(self.keepalive)
+            sftp = paramiko.SFTPClient.from_transport(transport)
+        except BaseException:
+            transport.close()
+            raise
+        with self._lock:
+            self.stats["connects"] += 1
+        logger.info("SFTP connection established to %s:%s", host, port)
+        return _Session(transport, sftp)
+
+    def _private_key(self, key_path: str) -> paramiko.PKey:
+        # Cached per (path, mtime): a rotated key file is picked up, an unchanged one is read once
+        cache_key = (key_path, os.path.getmtime(key_path))
+        with self._lock:
+            pkey = self._keys.get(cache_key)
+        if pkey is None:
+            pkey = paramiko.RSAKey.from_private_key_file(key_path)
+            with self._lock:
+                self._keys[cache_key] = pkey
+        return pkey
+
+
+_default_pool: SFTPSessionPool | None = None
+_default_lock = threading.Lock()
+
+
+def get_pool() -> SFTPSessionPool:
+    """
+    The process-wide pool shared by every SFTPIngestor (configured from env on first use).
+    """
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = SFTPSessionPool(
+                max_per_host=int(os.getenv("SFTP_MAX_SESSIONS_PER_HOST", "4")),
+                idle_timeout=float(os.getenv("SFTP_IDLE_TIMEOUT", "300")),
+                keepalive=int(os.getenv("SFTP_KEEPALIVE", "30")),
+            )
+            atexit.register(_default_pool.close_all)
+        return _default_pool
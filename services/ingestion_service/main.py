@@ -1,21 +1,33 @@
 
 import os
 import json
+import signal
+import threading
 import time
 import logging
 from datetime import datetime
 from typing import List
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
 
 from dotenv import load_dotenv
 from .cluster_manager import ClusterManager
 #import ClusterManager from services.ingestion_service.cluster_manager 
 from .state_manager import StateManager
+from .file_tracker import FileSetTracker
+from .change_index import ChangeIndex
+from .ingestors.line_reader import MATCH_ALL, ReadProgress
+from .multiline import MultilineAssembler
+from .parse_pool import ParsePool
+from .stream_pipeline import STAGE_SECONDS, StreamPipeline
 from .scheduler import Scheduler
-from .parser.regex_parser import RegexParser
+from .watcher import follow_units
+from .write_behind import get_recorder
 from ..analysis_service.pipeline import AnalyzerPipeline
 from ..notifications.notifier import Notifier
+from ..observability.log import setup_logging
+from ..observability.metrics import REGISTRY, start_http_server
+from ..writer.analysis_index import open_index
+from ..writer.segment_store import open_store
 
 load_dotenv()
 
@@ -27,28 +39,12 @@ OUTPUT_BASE = os.getenv(
 )
 OUTPUT_BASE = Path(os.getenv("OUTPUT_BASE", Path.cwd() / "processed_output"))
 OUTPUT_BASE.mkdir(parents=True, exist_ok=True)  # ensure base exists
-# ----------------------------------------------------------------------------
-# Setup Logging start
-# ----------------------------------------------------------------------------
-LOG_DIR = Path(os.getenv("LOG_DIR", "logs"))
-LOG_DIR.mkdir(parents=True, exist_ok=True)
-LOG_FILE = LOG_DIR / "execution.log"
-
+# Search index over every unit's output (see writer/analysis_index.py)
+ANALYSIS_INDEX_PATH = os.getenv("ANALYSIS_INDEX_PATH")
+# Logging is configured by the entry points (main(), the API) via
+# services/observability/log.py; this module only emits records.
 logger = logging.getLogger("ExecutionLogger")
-logger.setLevel(logging.INFO)
-
-
-# Rotating log handler: 5MB per file, keep 5 backups
-handler = RotatingFileHandler(LOG_FILE, maxBytes=5*1024*1024, backupCount=5)
-formatter = logging.Formatter(
-    "%(asctime)s [%(levelname)s] %(name)s: %(message)s", "%Y-%m-%d %H:%M:%S"
-)
-handler.setFormatter(formatter)
-logger.addHandler(handler)
 
-# ----------------------------------------------------------------------------
-# Setup Logging End
-# ----------------------------------------------------------------------------
 DB_CFG = {
     "host": os.getenv("DB_HOST", "host.docker.internal"),
     "port": int(os.getenv("DB_PORT", "3306")),
@@ -57,72 +53,182 @@ DB_CFG = {
     "database": os.getenv("DB_NAME", "asterisk"),
 }
 
+# ----------------------------------------------------------------------------
+# Metrics (served on /metrics by the API, or on METRICS_PORT by main())
+# ----------------------------------------------------------------------------
+BYTES_READ = REGISTRY.counter("ingest_bytes_total", "Bytes of log file consumed", ["unit"])
+LINES_READ = REGISTRY.counter("ingest_lines_total", "Lines passed into the pipeline", ["unit"])
+EVENTS_WRITTEN = REGISTRY.counter("ingest_events_total", "Analysed events written", ["unit"])
+OFFSET_LAG = REGISTRY.gauge("ingest_offset_lag_bytes", "Bytes between the committed offset and the file size",
+                            ["unit", "file"])
+
+
+def analysis_index_path(out_base=OUTPUT_BASE) -> str:
+    return ANALYSIS_INDEX_PATH or str(Path(out_base) / ".cache" / "analysis_index.sqlite")
+
+
 # ----------------------------------------------------------------------------
 # Job Creation
 # ----------------------------------------------------------------------------
-def make_job():
-    cm = ClusterManager(CONFIG_PATH)
-    print("DB_CFG CONFIG:", DB_CFG)
-    logger.info("ClusterManager initialized with config: %s", CONFIG_PATH)
-    logger.info("Database Config: %s", DB_CFG)
-    sm = StateManager(DB_CFG)
-    parser = RegexParser()
-    analyzer = AnalyzerPipeline()     # DI: can swap implementations
-    notifier = Notifier()
+def make_job(config_path: str = CONFIG_PATH, *, state_manager=None, analyzer=None, notifier=None,
+             output_base=None):
+    """
+    Build the ingestion job. Collaborators default to the production ones (MySQL
+    StateManager, OpenAI-backed AnalyzerPipeline, Slack Notifier, OUTPUT_BASE);
+    tests and benchmarks pass their own.
+    """
+    cm = ClusterManager(config_path)
+    logger.info("ClusterManager initialized with config: %s", config_path)
+    if state_manager is None:
+        logger.info("Database Config: %s", DB_CFG)
+    sm = state_manager or StateManager(DB_CFG)
+    analyzer = analyzer or AnalyzerPipeline()     # DI: can swap implementations
+    enricher = analyzer.enricher
+    notifier = notifier or Notifier()
+    out_base = Path(output_base or OUTPUT_BASE)
+    pipeline_cfg = cm.app_cfg.pipeline
+    output_cfg = cm.app_cfg.output
+    parse_pool = (ParsePool(pipeline_cfg.parse_workers, pipeline_cfg.parse_range_bytes)
+                  if pipeline_cfg.parse_workers > 0 else None)
+    change_index = ChangeIndex()
+    ingestors = {}  # cluster name -> ingestor, reused across runs
+    index = open_index(analysis_index_path(out_base))
+    stores = {}     # unit -> segment store of the running unit, feeding the index
+
+    def store_for(cluster, lt):
+        unit = f"{cluster.name}/{lt.name}"
+        store = stores.get(unit)
+        if store is None:
+            store = open_store(out_base / cluster.name / lt.name, segment_bytes=int(output_cfg.segment_mb * 2**20),
+                               member_bytes=output_cfg.member_kb * 1024)
+            index.catch_up(store, cluster.name, lt.name)
+            store.on_block = lambda block, records: index.add_block(cluster.name, lt.name, block, records)
+            stores[unit] = store
+        return store
+
+    def release_store(unit):
+        # The API process writes the same directories: hold a store only for a run
+        store = stores.pop(unit, None)
+        if store is not None:
+            store.close()
+
+    def ingestor_for(cluster):
+        ingestor = ingestors.get(cluster.name)
+        if ingestor is None:
+            ingestor = ingestors[cluster.name] = cm.ingestor_for(cluster)
+            logger.info("Ingestor Initialization ingestor=%s ", ingestor)
+        return ingestor
 
     def process_unit(cluster, lt):
-        print(f"Processing cluster Error writing execution log111: {cluster.name}")
+        unit = f"{cluster.name}/{lt.name}"
+        ingestor = ingestor_for(cluster)
+        # Nothing grew since the last run: done, without touching the DB or any file
+        list_timer = STAGE_SECONDS.labels("list").time()
+        with list_timer:
+            check = change_index.check(unit, ingestor, lt.path, lt.file_glob)
+        if check.idle:
+            logger.debug("Unit %s unchanged; skipping", unit)
+            return
+        # Offsets are read and buffered in memory for the run, written back at its end
+        # (a no-op inside run_all()'s full cycle)
+        with sm.unit_cycle(cluster.name, lt.name):
+            try:
+                process_changes(cluster, lt, ingestor, check)
+            finally:
+                release_store(unit)
+
+    def process_changes(cluster, lt, ingestor, check):
+        unit = f"{cluster.name}/{lt.name}"
         logger.info("Processing cluster=%s, cluster type=%s, log_type=%s", cluster.name, cluster, lt.name)
-        ingestor = cm.ingestor_for(cluster)
-        print(f"Ingestor Initialization : {ingestor}")
-        logger.info("Ingestor Initialization ingestor=%s ",ingestor)
-        # Acceptance Criterion (3): pick most recent file only
-        logger.info("Latest file calling before cluster=%s, path=%s, FileGlob=%s", cluster.name, lt.path, lt.file_glob)
-        latest = ingestor.latest_file(lt.path, lt.file_glob)
-        print(f"latest file checkig: {latest}")
-        logger.info(f"[main] latest file checkig: {latest} ")
-        if not latest:
-            print(f"No log file found for cluster, log_type : {cluster.name} ")
+        # Every file in the glob that grew since its checkpoint, oldest first, so the
+        # unread tail of a rotated file is drained before its successor.
+        logger.info("Planning files for cluster=%s, path=%s, FileGlob=%s", cluster.name, lt.path, lt.file_glob)
+        states = sm.get_file_states(cluster.name, lt.name)
+        with STAGE_SECONDS.labels("list").time():
+            plan = FileSetTracker(ingestor).plan(lt.path, lt.file_glob, states, files=check.files)
+        for item in plan.work:
+            OFFSET_LAG.labels(unit, item.info.name).set(item.info.size - item.start_offset)
+        logger.info("[main] %d file(s) to read, %d stale state(s)", len(plan.work), len(plan.stale))
+        if plan.carry:
+            # e.g. a fully read file rotated to a new name: keep its offset under that name
+            for item in plan.carry:
+                sm.upsert_offset(cluster.name, lt.name, item.info.name, item.start_offset, item.fingerprint)
+            sm.flush()
+        if not plan.work and not states and not plan.stale:
             logger.warning("No log file found for cluster=%s, log_type=%s", cluster.name, lt.name)
+            change_index.record(unit, check, {})
             return
 
-        print(f"you are here for some reason: {cluster.name}")
-        logger.info(f"[main] you are here for some reason: {cluster.name} ")
-        file_ident = str(latest)
-        # Derive a stable file key (same as input filename)
-        file_key = Path(file_ident).name
-        logger.info(f"[main] File key: {file_key} ")
-        logger.info(f"[main] print SM : {sm} ")
-        start_offset = sm.get_offset(cluster.name, lt.name, file_key)
-        logger.info(f"[main] start_offset : {start_offset} ")
-        last_offset = start_offset
-        new_lines_found = 0
-        structured = []
-        logger.info(f"[main] file_ident : {file_ident} start_offset {start_offset} and include_regrex glob {lt.include_regex}")
-        file_path = Path(file_ident)
-        logger.info(f"[main] file_path key: {file_path} ")
+        offsets = {}
         try:
-            for raw, new_offset in ingestor.incremental_read(
-                file_ident, start_offset, lt.include_regex, lt.exclude_regex
-            ):
-                new_lines_found += 1
-                structured.append(parser.parse(raw))
-                last_offset = new_offset
-            logger.info(f"[main] New line found : {new_lines_found} last_offset {last_offset} and new_offset glob {last_offset}")
-            if new_lines_found:
-                logger.info("Parsed %d new lines from %s", new_lines_found, file_key)
-                logger.info(f"[main] Analyzer run calling  : {structured} cluster_name {cluster.name} and log_type glob {lt.name} source_file {file_key}")
-                result_text = analyzer.run(structured, cluster_name=cluster.name, log_type=lt.name, source_file=file_key)
-                # Save output to different folder with SAME filename
-                out_dir = Path(OUTPUT_BASE) / cluster.name / lt.name
-                out_dir.mkdir(parents=True, exist_ok=True)
-                out_path = out_dir / file_key                    # same file name
-                out_path.write_text(result_text, encoding="utf-8")
-                logger.info("Analysis result written to %s", out_path)
-
-            sm.upsert_offset(cluster.name, lt.name, file_key, last_offset)
-            logger.info("Updated offset for cluster=%s, log_type=%s, file=%s", cluster.name, lt.name, file_key)
+            for item in plan.work:
+                offsets[item.info.name] = process_file(cluster, lt, ingestor, item)
+        except Exception:
+            change_index.forget(unit)
+            raise
+
+        if plan.stale:
+            sm.delete_offsets(cluster.name, lt.name, plan.stale)
+            for key in plan.stale:
+                OFFSET_LAG.remove(unit, key)
+            logger.info("Dropped state for vanished files: %s", plan.stale)
+        change_index.record(unit, check, offsets)
+
+    def process_file(cluster, lt, ingestor, item):
+        file_ident = item.info.path
+        # Derive a stable file key (same as input filename)
+        file_key = item.info.name
+        start_offset = item.start_offset
+        logger.info("[main] File key: %s start_offset: %d size: %d", file_key, start_offset, item.info.size)
+        # Output goes to the unit's segment store (JSONL appended per batch, indexed by source file)
+        store = store_for(cluster, lt)
+
+        event_parser = cm.parser_for(cluster, lt)
+        start_pattern = lt.multiline_start or event_parser.START_PATTERN
+        unit = f"{cluster.name}/{lt.name}"
+        lag = OFFSET_LAG.labels(unit, file_key)
 
+        def commit(offset):
+            # Runs after each batch is on disk
+            sm.upsert_offset(cluster.name, lt.name, file_key, offset, item.fingerprint)
+            sm.flush()
+            lag.set(max(item.info.size - offset, 0))
+
+        stages = [
+            ("parse", event_parser.parse_batch),
+            ("enrich", lambda events: enricher.enrich(events, cluster_name=cluster.name, log_type=lt.name)),
+            ("analyze", lambda events: analyzer.analyze_batch(events, cluster.name, lt.name)),
+            ("write", lambda records: store.write_batch(records, source=file_key)),
+        ]
+        # Local single-line formats can be read+parsed in worker processes
+        pooled = parse_pool is not None and cluster.type == "local" and start_pattern is None
+        if pooled:
+            stages = stages[1:]
+        pipeline = StreamPipeline(stages, batch_size=pipeline_cfg.batch_size, queue_size=pipeline_cfg.queue_size)
+        progress = ReadProgress(start_offset)
+        if pooled:
+            source = parse_pool.iter_batches(file_ident, start_offset, item.info.size, lt.parser,
+                                             lt.include_regex, lt.exclude_regex)
+        elif start_pattern is None:
+            source = ingestor.incremental_read(file_ident, start_offset, lt.include_regex, lt.exclude_regex,
+                                               progress=progress)
+        else:
+            # Whole records: the reader passes every line, filters apply per record, and
+            # progress only advances to record boundaries.
+            assembler = MultilineAssembler(start_pattern, lt.include_regex, lt.exclude_regex, lt.max_event_bytes)
+            quiet = time.time() - item.info.mtime >= lt.multiline_flush_seconds
+            source = assembler.assemble(ingestor.incremental_read(file_ident, start_offset, MATCH_ALL, None),
+                                        start_offset, progress,
+                                        flush_at=item.info.size if quiet else None)
+        try:
+            stats = pipeline.run(source, start_offset, commit, progress=progress, prebatched=pooled)
+            BYTES_READ.labels(unit).inc(stats.last_offset - start_offset)
+            LINES_READ.labels(unit).inc(stats.lines)
+            EVENTS_WRITTEN.labels(unit).inc(stats.outputs)
+            logger.info("[main] %s: %d line(s) in %d batch(es), offset %d -> %d, stage seconds %s",
+                        file_key, stats.lines, stats.batches, start_offset, stats.last_offset,
+                        {k: round(v, 3) for k, v in stats.stage_seconds.items()})
+            return stats.last_offset
 
         except Exception as e:
             logger.error(
@@ -133,34 +239,111 @@ def make_job():
             notifier.notify(f"[INGEST ERROR] {cluster.name}/{lt.name} {file_key}: {e}")
             raise
 
+    def units():
+        # One (name, fn, every_minutes) per enabled (cluster, log_type)
+        return [(f"{c.name}/{lt.name}", lambda c=c, lt=lt: process_unit(c, lt), lt.every_minutes)
+                for c in cm.enabled_clusters() for lt in c.log_types]
+
+    def follow_targets():
+        # (unit name, directory, glob) of the local units, for follow mode
+        return [(f"{c.name}/{lt.name}", lt.path, lt.file_glob)
+                for c in cm.enabled_clusters() if c.type == "local" for lt in c.log_types]
+
+    def after_run(report):
+        if analyzer.miner is not None:
+            analyzer.miner.save()
+        cache_stats = analyzer.cache.reset_stats()
+        logger.info("Analysis cache this run: hits=%d misses=%d hit_ratio=%.3f",
+                    cache_stats["hits"], cache_stats["misses"], cache_stats["hit_ratio"])
+        for o in report.outcomes:
+            if o.status != "ok":
+                logger.warning("Unit %s %s after %.1fs: %s", o.name, o.status, o.duration, o.error or "")
+
     def run_all():
         logger.info("Starting run_all()")
-        units = []
-        for c in cm.enabled_clusters():
-            for lt in c.log_types:
-                logger.info("Enable Clusters form config.yml file cluster=%s ",c)
-                logger.info("All log type in  Clusters form config.yml file log types=%s ",lt)
-                units.append(lambda c=c, lt=lt: process_unit(c, lt))
-        Scheduler(cm.app_cfg.schedule.every_minutes, cm.app_cfg.schedule.parallel).run_batch(units)
-        logger.info("Completed run_all() cycle")
-
-    return run_all
+        sched = cm.app_cfg.schedule
+        sm.begin_cycle()
+        try:
+            report = Scheduler(sched.every_minutes, sched.parallel, sched.max_workers).run_batch(
+                [(name, fn) for name, fn, _ in units()])
+        finally:
+            sm.end_cycle()
+        after_run(report)
+        logger.info("Completed run_all() cycle: %s", report.summary())
+        return report
+
+    def close():
+        # Shutdown: release the stores of units cut short, write out queued records
+        for unit in list(stores):
+            release_store(unit)
+        if analyzer.miner is not None:
+            analyzer.miner.save()
+        get_recorder().close()
+
+    return Job(run_all, units, after_run, cm.app_cfg.schedule, follow_targets, cm.app_cfg.follow, close)
+
+
+class Job:
+    """
+    What make_job() returns. Calling it runs every unit once (one full pass) and
+    returns the RunReport; units()/after_run/schedule drive the per-unit Scheduler,
+    follow_targets()/follow the optional file watcher; close() is for shutdown.
+    """
+
+    def __init__(self, run_all, units, after_run, schedule, follow_targets, follow, close=None):
+        self.run_all = run_all
+        self.units = units
+        self.after_run = after_run
+        self.schedule = schedule
+        self.follow_targets = follow_targets
+        self.follow = follow
+        self.close = close or (lambda: None)
+
+    def __call__(self):
+        return self.run_all()
 # ----------------------------------------------------------------------------
 # Main entry
 # ----------------------------------------------------------------------------
 def main():
+    setup_logging()
     logger.info("Starting ingestion service...")
+    if os.getenv("METRICS_PORT"):
+        start_http_server(int(os.getenv("METRICS_PORT")))
     job = make_job()
-    # schedule loop:
-    scheduler = Scheduler(
-        every_minutes=int(os.getenv("SCHEDULE_EVERY_MINUTES", "5")),
-        parallel=os.getenv("PARALLEL", "true").lower() == "true"
-    )
+    sched = job.schedule  # the schedule: block of clusters.yaml
+    scheduler = Scheduler(sched.every_minutes, sched.parallel, sched.max_workers, sched.jitter_seconds)
+    for name, fn, every in job.units():
+        scheduler.add_unit(name, fn, every)
     logger.info(
-        "Scheduler started with every_minutes=%s, parallel=%s",
-        scheduler.every_minutes, scheduler.parallel
+        "Scheduler started with every_minutes=%s, parallel=%s, units=%d",
+        scheduler.every_minutes, scheduler.parallel, len(scheduler.units)
     )
-    scheduler.run_forever(job)
+    watcher = None
+    if job.follow.enabled:
+        follow = job.follow
+        watcher = follow_units(job.follow_targets(), scheduler.trigger, mode=follow.mode,
+                               debounce_seconds=follow.debounce_ms / 1000,
+                               max_delay_seconds=follow.max_delay_ms / 1000,
+                               poll_seconds=follow.poll_seconds).start()
+    # SIGTERM (docker stop) / SIGINT: finish the running units, then shut down;
+    # a second signal exits at once.
+    stop = threading.Event()
+
+    def on_signal(signum, frame):
+        if stop.is_set():
+            raise SystemExit(128 + signum)
+        logger.info("Received %s; stopping after the running units", signal.Signals(signum).name)
+        stop.set()
+
+    signal.signal(signal.SIGTERM, on_signal)
+    signal.signal(signal.SIGINT, on_signal)
+    try:
+        scheduler.run_forever(on_report=job.after_run, stop=stop)
+    finally:
+        if watcher is not None:
+            watcher.stop()
+        job.close()
+        logger.info("Ingestion service stopped")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,98 @@
+# services/ingestion_service/multiline.py
+#
+# Streaming multi-line event assembly (stack traces, wrapped messages).
+# Lines come from an ingestor's incremental_read(); a line matching the
+# start-of-record pattern opens a new event and every other line is appended to
+# the current one. Only completed events are emitted, and the checkpoint only
+# ever moves to an event boundary, so an event still being written when the
+# cycle ends is simply re-read next cycle. Memory is one event, not one file.
+
+import logging
+import re
+from typing import Iterable, Iterator, List, Optional, Pattern, Tuple, Union
+
+from .ingestors.line_reader import ReadProgress
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_EVENT_BYTES = 1024 * 1024
+
+
+def _compile(pattern: Union[str, Pattern[str], None], flags: int = 0) -> Optional[Pattern[str]]:
+    if pattern is None or isinstance(pattern, re.Pattern):
+        return pattern
+    return re.compile(pattern, flags) if pattern else None
+
+
+class MultilineAssembler:
+    """
+    start_pattern:    compiled (or str) regex matched at the start of a line that begins a record
+    include/exclude:  event filters; include is searched in the whole event, exclude in its first line
+    max_event_bytes:  lines past this size are dropped from the event (a marker notes how much)
+    """
+
+    def __init__(self, start_pattern: Union[str, Pattern[str]],
+                 include: Union[str, Pattern[str], None] = None,
+                 exclude: Union[str, Pattern[str], None] = None,
+                 max_event_bytes: int = DEFAULT_MAX_EVENT_BYTES):
+        self.start = _compile(start_pattern)
+        self.include = _compile(include, re.MULTILINE)
+        self.exclude = _compile(exclude)
+        self.max_event_bytes = max_event_bytes
+
+    def assemble(self, lines: Iterable[Tuple[str, int]], start_offset: int,
+                 progress: Optional[ReadProgress] = None,
+                 flush_at: Optional[int] = None) -> Iterator[Tuple[str, int]]:
+        """
+        lines:     (line_without_eol, offset_after_line) from incremental_read() with no filters
+        progress:  kept at the end of the last complete event (emitted or filtered out);
+                   checkpoint this, not the reader's offset
+        flush_at:  emit the trailing event too if it ends at or past this offset
+                   (pass the file size once the file has gone quiet); otherwise it
+                   stays pending and is re-read next cycle
+
+        Yields (event_text, offset_after_event).
+        """
+        match_start = self.start.match
+        buf: List[str] = []
+        size = dropped = 0
+        end = boundary = start_offset
+
+        def finish():
+            text = "\n".join(buf)
+            if dropped:
+                text += f"\n... [truncated {dropped} bytes]"
+            return text
+
+        for line, offset in lines:
+            if buf and match_start(line):
+                text = finish()
+                boundary = end
+                if self._keep(text, buf[0]):
+                    yield text, boundary
+                if progress is not None:
+                    progress.offset = boundary
+                buf, size, dropped = [], 0, 0
+            if size + len(line) <= self.max_event_bytes or not buf:
+                buf.append(line)
+                size += len(line) + 1
+            else:
+                dropped += len(line) + 1
+            end = offset
+
+        if buf and flush_at is not None and end >= flush_at:
+            text = finish()
+            boundary = end
+            if self._keep(text, buf[0]):
+                yield text, boundary
+        elif not buf:
+            boundary = end
+        if progress is not None:
+            progress.offset = boundary
+
+    def _keep(self, text: str, first_line: str) -> bool:
+        if self.include is not None and self.include.search(text) is None:
+            return False
+        if self.exclude is not None and self.exclude.search(first_line) is not None:
+            return False
+        return True
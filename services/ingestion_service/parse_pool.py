@@ -0,0 +1,103 @@
+# services/ingestion_service/parse_pool.py
+#
+# Optional process-pool read+parse stage for local files.
+# Filtering and parsing are pure-Python regex work, so threads share one core.
+# Here the unread part of a file is cut into byte ranges; worker processes read,
+# filter and parse their range into a compact ParsedBatch, and results are
+# consumed in range order so offsets still advance strictly forward.
+
+import logging
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Iterator, Optional, Tuple
+
+from .ingestors.line_reader import ReadProgress, compile_bytes_regex, scan_lines
+from .parser.batch import ParsedBatch
+from .parser.registry import get_parser
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RANGE_BYTES = 8 * 1024 * 1024
+
+
+def _parse_range(path: str, start: int, end: int, first: bool, parser_name: str,
+                 include_regex: Optional[str], exclude_regex: Optional[str]) -> Tuple[Optional[ParsedBatch], int]:
+    """
+    Worker: read, filter and parse the lines that *start* in [start, end).
+    A range that is not the first skips the partial line at its head (the
+    previous range owns it) and every range completes the line crossing its end.
+    Returns (batch, offset after the last complete line), or (None, -1) when the
+    range owns no complete line.
+    """
+    with open(path, "rb") as f:
+        pos = start
+        if not first:
+            f.seek(start - 1)
+            head = f.readline()
+            if not head.endswith(b"\n"):
+                return None, -1
+            pos = start - 1 + len(head)
+            if pos >= end:
+                return None, -1
+        f.seek(pos)
+        data = f.read(end - pos)
+        if data and not data.endswith(b"\n"):
+            data += f.readline()
+
+    progress = ReadProgress(pos)
+    lines = list(scan_lines([data], pos, compile_bytes_regex(include_regex, re.MULTILINE),
+                            compile_bytes_regex(exclude_regex), progress=progress))
+    if progress.offset == pos:
+        return None, -1
+    return get_parser(parser_name).parse_batch([line for line, _ in lines]), progress.offset
+
+
+class ParsePool:
+    """
+    workers:      worker processes (created on first use, shared by every unit)
+    range_bytes:  bytes of file handed to a worker per task
+    Up to 2 x workers ranges are in flight per file; results are yielded in order.
+    """
+
+    def __init__(self, workers: int = os.cpu_count() or 1, range_bytes: int = DEFAULT_RANGE_BYTES):
+        self.workers = workers
+        self.range_bytes = range_bytes
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, not fork: the service runs pipeline and HTTP threads
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("spawn"))
+            logger.info("[ParsePool] started %d parse worker(s)", self.workers)
+        return self._executor
+
+    def iter_batches(self, path: str, start: int, end: int, parser_name: str,
+                     include_regex: Optional[str] = None,
+                     exclude_regex: Optional[str] = None) -> Iterator[Tuple[ParsedBatch, int]]:
+        """
+        Yield (ParsedBatch, offset_after_range) for [start, end) of a local file, in
+        file order. Lines filtered out still advance the offset; an unterminated
+        last line does not.
+        """
+        pool = self._pool()
+        ranges = deque((a, min(a + self.range_bytes, end)) for a in range(start, end, self.range_bytes))
+        pending = deque()
+        parser = get_parser(parser_name)
+        while ranges or pending:
+            while ranges and len(pending) < 2 * self.workers:
+                a, b = ranges.popleft()
+                pending.append(pool.submit(_parse_range, path, a, b, a == start, parser_name,
+                                           include_regex, exclude_regex))
+            batch, offset = pending.popleft().result()
+            if batch is None:
+                continue
+            batch.parser = parser
+            yield batch, offset
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
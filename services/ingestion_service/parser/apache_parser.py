@@ -0,0 +1,18 @@
+import re
+from .base_parser import PrefilteredParser
+
+# 2.4: [Wed Aug 13 10:00:01.123456 2025] [core:error] [pid 1234:tid 5678] [client 10.0.0.1:5050] AH00124: msg
+# 2.2: [Wed Aug 13 10:00:01 2025] [error] [client 10.0.0.1] msg
+PATTERN = re.compile(
+    r"\[(?P<ts>[^\]]+)\] \[(?:(?P<module>[\w-]+):)?(?P<level>\w+)\]"
+    r"(?: \[pid (?P<pid>\d+)(?::tid \d+)?\])?"
+    r"(?: \[client (?P<client>[^\]]+)\])?"
+    r" (?P<msg>.*)"
+)
+
+
+class ApacheErrorParser(PrefilteredParser):
+    PATTERN = PATTERN
+    PREFIX = "["
+    MARKER = "] ["
+    LEVELS = {"emerg": "FATAL", "alert": "FATAL", "crit": "CRITICAL", "warn": "WARNING"}
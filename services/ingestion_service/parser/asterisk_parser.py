@@ -0,0 +1,15 @@
+import re
+from .base_parser import PrefilteredParser
+
+# [Aug 13 10:00:01] WARNING[2346][C-00000001] chan_sip.c: Maximum retries exceeded on call
+# [2025-08-13 10:00:01] NOTICE[1234] chan_sip.c:28066 handle_request_register: Registration failed
+PATTERN = re.compile(
+    r"\[(?P<ts>[^\]]+)\]\s+(?P<level>[A-Z]+)\[(?P<pid>\d+)\](?:\[(?P<call_id>[^\]]+)\])?"
+    r"\s+(?P<source>[\w.-]+(?::\d+ \w+)?):\s*(?P<msg>.*)"
+)
+
+
+class AsteriskParser(PrefilteredParser):
+    PATTERN = PATTERN
+    PREFIX = "["
+    MARKER = "] "
@@ -1,7 +1,135 @@
+import re
 from abc import ABC, abstractmethod
-from typing import Dict
+from typing import Dict, Optional, Pattern, Sequence, Tuple
+
+from .batch import ERROR, Buffer, ParsedBatch, join_lines, level_code
+from .event import LogEvent
 
 class BaseParser(ABC):
+    # First-line pattern for multi-line records (None: one record per line)
+    START_PATTERN: Optional[Pattern[str]] = None
+
     @abstractmethod
     def parse(self, raw_line: str) -> Dict:
         ...
+
+    def parse_event(self, raw_line: str) -> LogEvent:
+        """
+        Compact LogEvent for one line (or record). Format-specific fields are not
+        kept separately: they stay recoverable from the raw text via parse().
+        """
+        return LogEvent.from_dict(self.parse(raw_line))
+
+    def parse_batch(self, lines: Optional[Sequence[str]] = None, *,
+                    buf: Optional[Buffer] = None,
+                    spans: Optional[Sequence[Tuple[int, int]]] = None) -> ParsedBatch:
+        """
+        Parse a block of lines into a columnar ParsedBatch: either a list of
+        lines, or a buffer (str or bytes) plus the (start, end) span of each line.
+        """
+        if lines is not None:
+            buf, spans = join_lines(lines)
+        batch = ParsedBatch(buf, self)
+        self._scan_batch(batch, buf, spans)
+        return batch
+
+    def _scan_batch(self, batch: ParsedBatch, buf: Buffer, spans):
+        # Generic fallback through parse(), for parsers without a columnar scanner.
+        # Spans of ts/msg are recovered by searching the raw line (str buffers only).
+        for s, e in spans:
+            raw = buf[s:e]
+            is_bytes = isinstance(raw, bytes)
+            text = raw.decode("utf-8", errors="replace") if is_bytes else raw
+            d = self.parse(text)
+            ts, msg = d.get("ts"), d.get("msg")
+            i = text.find(msg) if msg and not is_bytes else -1
+            j = text.find(ts) if ts and not is_bytes else -1
+            batch.append(s + j if j >= 0 else -1, s + j + len(ts) if j >= 0 else -1,
+                         level_code((d.get("level") or "ERROR").upper()),
+                         s + i if i >= 0 else s, s + i + len(msg) if i >= 0 else e, s, e)
+
+
+class PrefilteredParser(BaseParser):
+    """
+    Single-format parser: a cheap literal check (PREFIX at the start of the line,
+    MARKER anywhere in it) runs first and the format regex only runs on lines
+    that pass it. Lines that fail either are returned as-is at ERROR level,
+    like RegexParser's fallback.
+    LEVELS maps the format's level names (lower-cased) to our level names.
+    """
+    PATTERN: Pattern[str]
+    PREFIX: str = ""
+    MARKER: str = ""
+    LEVELS: Dict[str, str] = {}
+
+    def __init__(self):
+        # str and bytes variants of pattern/literals, for str and bytes buffers
+        self._variants = {
+            str: (self.PATTERN, self.PREFIX, self.MARKER),
+            bytes: (re.compile(self.PATTERN.pattern.encode("ascii"), self.PATTERN.flags & ~re.UNICODE),
+                    self.PREFIX.encode("ascii"), self.MARKER.encode("ascii")),
+        }
+        self._level_codes: Dict[object, int] = {}
+
+    def prefilter(self, line: str) -> bool:
+        return line.startswith(self.PREFIX) and self.MARKER in line
+
+    def _normalize_level(self, level: str) -> str:
+        level = level.lower()
+        return self.LEVELS.get(level) or level.upper()
+
+    def parse(self, raw_line: str) -> Dict:
+        m = self.PATTERN.match(raw_line) if self.prefilter(raw_line) else None
+        if m is None:
+            return {"raw": raw_line, "msg": raw_line, "level": "ERROR"}
+        d = m.groupdict()
+        d["level"] = self._normalize_level(d["level"])
+        d["raw"] = raw_line
+        return d
+
+    def _code(self, raw_level):
+        code = self._level_codes.get(raw_level)
+        if code is None:
+            text = raw_level.decode("ascii") if isinstance(raw_level, bytes) else raw_level
+            code = self._level_codes[raw_level] = level_code(self._normalize_level(text))
+        return code
+
+    def parse_event(self, raw_line: str) -> LogEvent:
+        m = self.PATTERN.match(raw_line) if self.prefilter(raw_line) else None
+        if m is None:
+            return LogEvent(raw_line)
+        ts_s, ts_e = m.span("ts")
+        msg_s, msg_e = m.span("msg")
+        return LogEvent(raw_line, self._code(m.group("level")), ts_s, ts_e, msg_s, msg_e)
+
+    def _scan_batch(self, batch: ParsedBatch, buf: Buffer, spans):
+        pattern, prefix, marker = self._variants[type(buf)]
+        gi = pattern.groupindex
+        TS, LEVEL, MSG = gi["ts"], gi["level"], gi["msg"]
+        match, startswith, find = pattern.match, buf.startswith, buf.find
+        codes = self._level_codes
+        ts_s, ts_e, levels, msg_s, msg_e, raw_s, raw_e = [], [], [], [], [], [], []
+        for s, e in spans:
+            raw_s.append(s)
+            raw_e.append(e)
+            m = None
+            if startswith(prefix, s, e) and (not marker or find(marker, s, e) >= 0):
+                m = match(buf, s, e)
+            if m is None:
+                ts_s.append(-1)
+                ts_e.append(-1)
+                levels.append(ERROR)
+                msg_s.append(s)
+                msg_e.append(e)
+                continue
+            regs = m.regs  # all group spans in one call
+            ls, le = regs[LEVEL]
+            raw_level = buf[ls:le]
+            code = codes.get(raw_level)
+            levels.append(code if code is not None else self._code(raw_level))
+            t, g = regs[TS], regs[MSG]
+            ts_s.append(t[0])
+            ts_e.append(t[1])
+            msg_s.append(g[0])
+            msg_e.append(g[1])
+        batch.extend(ts_s, ts_e, levels, msg_s, msg_e, raw_s, raw_e)
@@ -0,0 +1,147 @@
+# Columnar parse results.
+#
+# parse_batch() scans a block of lines in one buffer and records, per line, a
+# timestamp span, a level code, a message span and a raw span in parallel
+# arrays, instead of building a dict per line. Text is only sliced out when a
+# consumer asks for it, and a full dict only for the lines that need one
+# (e.g. the representative of an error group).
+
+import threading
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+Buffer = Union[str, bytes]
+
+# Interned level names; a batch stores the index. New names are appended.
+LEVEL_NAMES: List[str] = ["UNKNOWN", "DEBUG", "INFO", "NOTICE", "WARNING", "ERROR", "CRITICAL", "FATAL"]
+_LEVEL_CODES: Dict[str, int] = {name: code for code, name in enumerate(LEVEL_NAMES)}
+_level_lock = threading.Lock()
+
+ERROR = _LEVEL_CODES["ERROR"]
+
+
+def level_code(name: str) -> int:
+    code = _LEVEL_CODES.get(name)
+    if code is None:
+        with _level_lock:
+            code = _LEVEL_CODES.get(name)
+            if code is None:
+                code = _LEVEL_CODES[name] = len(LEVEL_NAMES)
+                LEVEL_NAMES.append(name)
+    return code
+
+
+def join_lines(lines: Sequence[str]) -> Tuple[str, List[Tuple[int, int]]]:
+    """
+    One "\\n"-joined buffer plus the (start, end) span of every line in it.
+    """
+    spans, pos = [], 0
+    for line in lines:
+        end = pos + len(line)
+        spans.append((pos, end))
+        pos = end + 1
+    return "\n".join(lines), spans
+
+
+class ParsedBatch:
+    """
+    Parallel arrays, one entry per line:
+      ts_start/ts_end    timestamp span in buf (-1/-1: no timestamp)
+      level              code into LEVEL_NAMES
+      msg_start/msg_end  message span
+      raw_start/raw_end  whole-line span
+    buf is str, or bytes when parsed from a byte buffer (spans are then byte offsets).
+    cluster/log_type are batch-level tags set by the Enricher.
+    """
+
+    __slots__ = ("buf", "parser", "ts_start", "ts_end", "level", "msg_start", "msg_end",
+                 "raw_start", "raw_end", "cluster", "log_type")
+
+    def __init__(self, buf: Buffer, parser=None):
+        self.buf = buf
+        self.parser = parser
+        self.ts_start, self.ts_end = array("q"), array("q")
+        self.level = array("H")
+        self.msg_start, self.msg_end = array("q"), array("q")
+        self.raw_start, self.raw_end = array("q"), array("q")
+        self.cluster: Optional[str] = None
+        self.log_type: Optional[str] = None
+
+    def append(self, ts_s: int, ts_e: int, level: int, msg_s: int, msg_e: int, raw_s: int, raw_e: int):
+        self.ts_start.append(ts_s)
+        self.ts_end.append(ts_e)
+        self.level.append(level)
+        self.msg_start.append(msg_s)
+        self.msg_end.append(msg_e)
+        self.raw_start.append(raw_s)
+        self.raw_end.append(raw_e)
+
+    def extend(self, ts_s: list, ts_e: list, level: list, msg_s: list, msg_e: list, raw_s: list, raw_e: list):
+        """
+        Append whole columns (plain lists) at once; cheaper than append() per line.
+        """
+        self.ts_start.fromlist(ts_s)
+        self.ts_end.fromlist(ts_e)
+        self.level.fromlist(level)
+        self.msg_start.fromlist(msg_s)
+        self.msg_end.fromlist(msg_e)
+        self.raw_start.fromlist(raw_s)
+        self.raw_end.fromlist(raw_e)
+
+    def __len__(self) -> int:
+        return len(self.level)
+
+    def _text(self, start: int, end: int) -> str:
+        text = self.buf[start:end]
+        return text.decode("utf-8", errors="replace") if isinstance(text, bytes) else text
+
+    def raw(self, i: int) -> str:
+        return self._text(self.raw_start[i], self.raw_end[i])
+
+    def msg(self, i: int) -> str:
+        return self._text(self.msg_start[i], self.msg_end[i])
+
+    def ts(self, i: int) -> Optional[str]:
+        start = self.ts_start[i]
+        return None if start < 0 else self._text(start, self.ts_end[i])
+
+    def level_name(self, i: int) -> str:
+        return LEVEL_NAMES[self.level[i]]
+
+    def event(self, i: int) -> dict:
+        """
+        Full per-line dict (as parser.parse() returns it) for line i.
+        """
+        raw = self.raw(i)
+        if self.parser is not None:
+            d = self.parser.parse(raw)
+        else:
+            d = {"ts": self.ts(i), "level": self.level_name(i), "msg": self.msg(i), "raw": raw}
+        if self.cluster is not None:
+            d.setdefault("cluster", self.cluster)
+        if self.log_type is not None:
+            d.setdefault("type", self.log_type)
+        return d
+
+    def events(self) -> List[dict]:
+        return [self.event(i) for i in range(len(self))]
+
+    def __reduce__(self):
+        # Level codes are process-local (unknown names are interned on first
+        # sight), so ship the names in use and remap on load. The parser is not
+        # pickled; the receiver re-attaches it.
+        names = {code: LEVEL_NAMES[code] for code in set(self.level)}
+        return (_rebuild, (self.buf, self.ts_start, self.ts_end, self.level, self.msg_start, self.msg_end,
+                           self.raw_start, self.raw_end, names, self.cluster, self.log_type))
+
+
+def _rebuild(buf, ts_start, ts_end, level, msg_start, msg_end, raw_start, raw_end, names, cluster, log_type):
+    batch = ParsedBatch(buf)
+    batch.ts_start, batch.ts_end, batch.msg_start, batch.msg_end = ts_start, ts_end, msg_start, msg_end
+    batch.raw_start, batch.raw_end = raw_start, raw_end
+    remap = {code: level_code(name) for code, name in names.items()}
+    if any(code != new for code, new in remap.items()):
+        level = array("H", [remap[code] for code in level])
+    batch.level = level
+    batch.cluster, batch.log_type = cluster, log_type
+    return batch
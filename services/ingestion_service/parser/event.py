@@ -0,0 +1,106 @@
+# Compact per-event representation.
+#
+# A LogEvent keeps the raw line plus spans into it and an interned level code,
+# instead of a dict holding a fresh string per field; msg/ts are sliced out on
+# access. Cluster and log type are stored once on the EventBatch, not copied
+# into every event. Read access mirrors the dict events (e["msg"], e.get("ts"))
+# so existing consumers keep working.
+
+from typing import Dict, Iterable, Optional
+
+from .batch import ERROR, LEVEL_NAMES, level_code
+
+_FIELDS = ("ts", "level", "msg", "raw")
+
+
+class LogEvent:
+    __slots__ = ("raw", "level_code", "ts_start", "ts_end", "msg_start", "msg_end", "extra")
+
+    def __init__(self, raw: str, level_code: int = ERROR, ts_start: int = -1, ts_end: int = -1,
+                 msg_start: int = 0, msg_end: Optional[int] = None, extra: Optional[Dict] = None):
+        self.raw = raw
+        self.level_code = level_code
+        self.ts_start, self.ts_end = ts_start, ts_end
+        self.msg_start = msg_start
+        self.msg_end = len(raw) if msg_end is None else msg_end
+        self.extra = extra  # format-specific fields (module, pid, trace, ...), usually None
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "LogEvent":
+        """
+        Build from a parser dict, locating msg/ts inside raw (fields that are not
+        substrings of raw, and any other keys, go to extra).
+        """
+        raw = d.get("raw") or d.get("msg") or ""
+        msg, ts = d.get("msg") or raw, d.get("ts")
+        extra = {k: v for k, v in d.items() if k not in _FIELDS and v is not None}
+        i = raw.find(msg)
+        if i < 0:
+            extra["msg"] = msg
+            i = 0
+        j = raw.find(ts) if ts else -1
+        if ts and j < 0:
+            extra["ts"] = ts
+        return cls(raw, level_code((d.get("level") or "ERROR").upper()),
+                   j, j + len(ts) if j >= 0 else -1, i, i + len(msg), extra or None)
+
+    @property
+    def msg(self) -> str:
+        if self.extra and "msg" in self.extra:
+            return self.extra["msg"]
+        return self.raw[self.msg_start:self.msg_end]
+
+    @property
+    def ts(self) -> Optional[str]:
+        if self.ts_start < 0:
+            return self.extra.get("ts") if self.extra else None
+        return self.raw[self.ts_start:self.ts_end]
+
+    @property
+    def level(self) -> str:
+        return LEVEL_NAMES[self.level_code]
+
+    def get(self, key: str, default=None):
+        if key in _FIELDS:
+            value = getattr(self, key)
+            return default if value is None else value
+        return self.extra.get(key, default) if self.extra else default
+
+    def __getitem__(self, key: str):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def to_dict(self, cluster: Optional[str] = None, log_type: Optional[str] = None) -> dict:
+        d = {"ts": self.ts, "level": self.level, "msg": self.msg, "raw": self.raw}
+        if self.extra:
+            d.update((k, v) for k, v in self.extra.items() if k not in d or d[k] is None)
+        if cluster is not None:
+            d["cluster"] = cluster
+        if log_type is not None:
+            d["type"] = log_type
+        return d
+
+    def __repr__(self):
+        return f"LogEvent({self.level}, {self.msg!r})"
+
+
+_MISSING = object()
+
+
+class EventBatch(list):
+    """
+    A list of LogEvents sharing one cluster / log type.
+    """
+
+    __slots__ = ("cluster", "log_type")
+
+    def __init__(self, events: Iterable[LogEvent] = (), cluster: Optional[str] = None,
+                 log_type: Optional[str] = None):
+        super().__init__(events)
+        self.cluster = cluster
+        self.log_type = log_type
+
+    def event_dict(self, i: int) -> dict:
+        return self[i].to_dict(self.cluster, self.log_type)
@@ -1,22 +1,45 @@
 import re
-from typing import List, Dict
-from .base_parser import BaseParser
+from typing import Dict, Iterator
+from .base_parser import PrefilteredParser
+from .event import LogEvent
+from ..ingestors.line_reader import DEFAULT_CHUNK_SIZE, iter_chunks, scan_lines
+from ..multiline import MultilineAssembler
 
-class LaravelParser(BaseParser):
-    def parse(self, file_path: str) -> List[Dict]:
-        entries = []
-        with open(file_path, "r", encoding="utf-8") as f:
-            raw_lines = f.readlines()
+# Laravel records start with a timestamp like [2025-08-17 10:12:34]; everything up
+# to the next one (stack trace, context JSON) belongs to the same record.
+START_PATTERN = re.compile(r"\[\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:[+-]\d{2}:?\d{2})?\]")
+HEADER_PATTERN = re.compile(r"\[(?P<ts>[^\]]+)\]\s+(?P<env>[\w.-]+)\.(?P<level>[A-Z]+):\s*(?P<msg>.*)")
 
-        current_entry = []
-        for line in raw_lines:
-            # Laravel log lines often start with a date like [2025-08-17 10:12:34]
-            if re.match(r'^\[\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\]', line):
-                if current_entry:
-                    entries.append({"raw": "".join(current_entry).strip()})
-                    current_entry = []
-            current_entry.append(line)
 
-        if current_entry:
-            entries.append({"raw": "".join(current_entry).strip()})
-        return entries
+class LaravelParser(PrefilteredParser):
+    START_PATTERN = START_PATTERN
+    PATTERN = HEADER_PATTERN  # matches the first line; msg stops at the newline
+    PREFIX = "["
+    MARKER = "] "
+
+    def parse(self, raw_event: str) -> Dict:
+        """
+        Parse one assembled record (header line + continuation lines).
+        """
+        header, _, trace = raw_event.partition("\n")
+        m = HEADER_PATTERN.match(header) if self.prefilter(header) else None
+        if m is None:
+            return {"raw": raw_event, "msg": header.strip(), "level": "ERROR"}
+        d = m.groupdict()
+        d["level"] = self._normalize_level(d["level"])
+        d["raw"] = raw_event
+        if trace:
+            d["trace"] = trace
+        return d
+
+    def parse_file(self, file_path: str, start_offset: int = 0,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[LogEvent]:
+        """
+        Stream the records of a file from start_offset, one compact LogEvent at a time.
+        """
+        assembler = MultilineAssembler(START_PATTERN)
+        with open(file_path, "rb") as fh:
+            fh.seek(start_offset)
+            lines = scan_lines(iter_chunks(fh, chunk_size), start_offset, None, None)
+            for text, _ in assembler.assemble(lines, start_offset, flush_at=0):
+                yield self.parse_event(text)
@@ -0,0 +1,19 @@
+import re
+from .base_parser import PrefilteredParser
+
+# 8.0:     2025-08-13T10:00:01.123456Z 0 [ERROR] [MY-010119] [Server] Aborting
+# 5.7:     2025-08-13T10:00:01.123456Z 0 [ERROR] InnoDB: Unable to lock ./ibdata1
+# MariaDB: 2025-08-13 10:00:01 0 [ERROR] mysqld: Table 'users' is marked as crashed
+# 5.5:     150813 10:00:01 [ERROR] Can't start server
+PATTERN = re.compile(
+    r"(?P<ts>\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:\d{2})?"
+    r"|\d{6} {1,2}\d{1,2}:\d{2}:\d{2})"
+    r"\s+(?:(?P<thread>\d+)\s+)?\[(?P<level>\w+)\]"
+    r"\s+(?:\[(?P<code>MY-\d+)\]\s+)?(?:\[(?P<subsystem>\w+)\]\s+)?(?P<msg>.*)"
+)
+
+
+class MySQLErrorParser(PrefilteredParser):
+    PATTERN = PATTERN
+    MARKER = " ["
+    LEVELS = {"note": "NOTICE", "system": "INFO"}
@@ -2,6 +2,8 @@
 import re
 from typing import Dict
 from .base_parser import BaseParser
+from .batch import ERROR, level_code
+from .event import LogEvent
 
 DEFAULT_PATTERNS = [
     re.compile(r'^(?P<ts>\S+\s+\S+)\s+(?P<level>ERROR|CRITICAL|FATAL|Exception)\s+(?P<msg>.+)$', re.I),
@@ -11,6 +13,11 @@ DEFAULT_PATTERNS = [
 class RegexParser(BaseParser):
     def __init__(self, patterns=None):
         self.patterns = patterns or DEFAULT_PATTERNS
+        # Batch variants: MULTILINE so ^/$ anchor at each line of the joined buffer
+        self._batch_patterns = {
+            str: [re.compile(p.pattern, p.flags | re.M) for p in self.patterns],
+            bytes: [re.compile(p.pattern.encode("utf-8"), (p.flags & ~re.UNICODE) | re.M) for p in self.patterns],
+        }
 
     def parse(self, raw_line: str) -> Dict:
         for pat in self.patterns:
@@ -20,3 +27,32 @@ class RegexParser(BaseParser):
                 d["raw"] = raw_line
                 return d
         return {"raw": raw_line, "msg": raw_line, "level": "ERROR"}
+
+    def parse_event(self, raw_line: str) -> LogEvent:
+        for pat in self.patterns:
+            m = pat.search(raw_line)
+            if m:
+                groups = pat.groupindex
+                ts_s, ts_e = m.span("ts") if "ts" in groups else (-1, -1)
+                level = m.group("level") if "level" in groups else None
+                msg_s, msg_e = m.span("msg") if "msg" in groups else (0, len(raw_line))
+                return LogEvent(raw_line, level_code(level.upper()) if level else ERROR, ts_s, ts_e, msg_s, msg_e)
+        return LogEvent(raw_line)
+
+    def _scan_batch(self, batch, buf, spans):
+        searches = [p.search for p in self._batch_patterns[type(buf)]]
+        append = batch.append
+        for s, e in spans:
+            for search in searches:
+                m = search(buf, s, e)
+                if m is not None:
+                    groups = m.re.groupindex
+                    ts_s, ts_e = m.span("ts") if "ts" in groups else (-1, -1)
+                    level = m.group("level") if "level" in groups else None
+                    if isinstance(level, bytes):
+                        level = level.decode("utf-8", errors="replace")
+                    msg_s, msg_e = m.span("msg") if "msg" in groups else (s, e)
+                    append(ts_s, ts_e, level_code(level.upper()) if level else ERROR, msg_s, msg_e, s, e)
+                    break
+            else:
+                append(-1, -1, ERROR, s, e, s, e)
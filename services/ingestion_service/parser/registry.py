@@ -0,0 +1,40 @@
+# Parser registry: LogType.parser names (clusters.yaml) -> parser classes.
+# Parsers are stateless, so one instance per name is shared by every log type.
+
+from typing import Dict, Type
+
+from .apache_parser import ApacheErrorParser
+from .asterisk_parser import AsteriskParser
+from .base_parser import BaseParser
+from .laravel_parser import LaravelParser
+from .mysql_parser import MySQLErrorParser
+from .regex_parser import RegexParser
+
+PARSERS: Dict[str, Type[BaseParser]] = {
+    "regex_parser": RegexParser,
+    "apache_regex": ApacheErrorParser,
+    "mysql_regex": MySQLErrorParser,
+    "asterisk_regex": AsteriskParser,
+    "laravel": LaravelParser,
+}
+
+_instances: Dict[str, BaseParser] = {}
+
+
+def register(name: str, cls: Type[BaseParser]) -> None:
+    PARSERS[name] = cls
+    _instances.pop(name, None)
+
+
+def get_parser(name: str) -> BaseParser:
+    """
+    Shared parser instance for a configured name; ValueError if unknown.
+    """
+    parser = _instances.get(name)
+    if parser is None:
+        try:
+            cls = PARSERS[name]
+        except KeyError:
+            raise ValueError(f"Unknown parser '{name}' (known: {', '.join(sorted(PARSERS))})") from None
+        parser = _instances[name] = cls()
+    return parser
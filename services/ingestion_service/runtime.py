@@ -0,0 +1,142 @@
+# services/ingestion_service/runtime.py
+#
+# Long-lived job runtime for on-demand runs (POST /ingest/run).
+# The job (config, StateManager and its pool, LLM client, caches) is built once
+# and reused; a trigger only enqueues a run and returns its id, and the units run
+# on a shared worker pool. A unit that is already queued or running in an
+# earlier run is not run twice: the trigger is coalesced into that run.
+
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .scheduler import RunReport, UnitOutcome, run_unit
+
+logger = logging.getLogger(__name__)
+
+
+class UnknownUnitError(ValueError):
+    pass
+
+
+@dataclass
+class RunState:
+    run_id: str
+    units: List[str]                      # units this run executes
+    status: str = "queued"                # queued | running | completed | error
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    outcomes: List[UnitOutcome] = field(default_factory=list)
+    coalesced: Dict[str, str] = field(default_factory=dict)  # unit -> run already doing it
+
+    def to_dict(self) -> dict:
+        outcomes = list(self.outcomes)  # units may still be finishing
+        report = RunReport(self.created, self.finished, outcomes)
+        return {
+            "run_id": self.run_id,
+            "status": self.status,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "progress": {"done": len(outcomes), "total": len(self.units)},
+            "counts": report.counts(),
+            "units": [asdict(o) for o in outcomes],
+            "pending": [u for u in self.units if u not in {o.name for o in outcomes}],
+            "coalesced": self.coalesced,
+        }
+
+
+class JobRuntime:
+    """
+    job:          what make_job() returns (units() and after_run() are used)
+    max_workers:  units run concurrently across all runs
+    max_history:  finished runs kept for GET /ingest/runs/{id}
+    """
+
+    def __init__(self, job, max_workers: int = 4, max_history: int = 200):
+        self.job = job
+        self._fns: Dict[str, Callable[[], object]] = {name: fn for name, fn, _ in job.units()}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="run")
+        self._lock = threading.Lock()
+        self._runs: "OrderedDict[str, RunState]" = OrderedDict()
+        self._active: Dict[str, str] = {}  # unit -> id of the run that will (or does) run it
+        self._ids = itertools.count(1)
+        self.max_history = max_history
+
+    @property
+    def unit_names(self) -> List[str]:
+        return list(self._fns)
+
+    def trigger(self, units: Optional[Sequence[str]] = None) -> Tuple[RunState, Dict[str, str]]:
+        """
+        Enqueue a run of `units` (default: all) and return it at once, with the
+        units coalesced into unfinished runs that already cover them ({unit:
+        run_id}). If that is all of them, the existing run is returned instead.
+        """
+        names = list(dict.fromkeys(units)) if units else list(self._fns)
+        unknown = [u for u in names if u not in self._fns]
+        if unknown:
+            raise UnknownUnitError(f"unknown unit(s): {', '.join(unknown)}")
+
+        with self._lock:
+            coalesced = {u: self._active[u] for u in names if u in self._active}
+            fresh = [u for u in names if u not in coalesced]
+            if not fresh:
+                # everything is already under way: hand back the (latest) run doing it
+                latest = max(coalesced.values(), key=lambda rid: int(rid.split("-")[1]))
+                return self._runs[latest], coalesced
+            run = RunState(f"run-{next(self._ids)}-{int(time.time())}", fresh, coalesced=coalesced)
+            self._runs[run.run_id] = run
+            for u in fresh:
+                self._active[u] = run.run_id
+            self._trim()
+        logger.info("Queued %s: %d unit(s), %d coalesced", run.run_id, len(fresh), len(coalesced))
+        threading.Thread(target=self._execute, args=(run,), name=run.run_id, daemon=True).start()
+        return run, coalesced
+
+    def get(self, run_id: str) -> Optional[RunState]:
+        with self._lock:
+            return self._runs.get(run_id)
+
+    def recent(self, limit: int = 20) -> List[RunState]:
+        with self._lock:
+            return list(self._runs.values())[-limit:][::-1]
+
+    def close(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def _execute(self, run: RunState):
+        futures = [self._pool.submit(self._run_one, run, name) for name in run.units]
+        for f in futures:
+            f.result()
+        with self._lock:
+            run.finished = time.time()
+            run.status = "error" if any(o.status == "error" for o in run.outcomes) else "completed"
+        report = RunReport(run.started or run.created, run.finished, list(run.outcomes))
+        logger.info("Finished %s: %s", run.run_id, report.summary())
+        try:
+            self.job.after_run(report)
+        except Exception:
+            logger.exception("after_run failed for %s", run.run_id)
+
+    def _run_one(self, run: RunState, name: str):
+        with self._lock:
+            if run.started is None:
+                run.started, run.status = time.time(), "running"
+        outcome = run_unit(name, self._fns[name], time.time() - run.created)
+        with self._lock:
+            run.outcomes.append(outcome)
+            if self._active.get(name) == run.run_id:
+                del self._active[name]
+
+    def _trim(self):
+        # drop the oldest finished runs beyond max_history
+        finished = [rid for rid, r in self._runs.items() if r.finished is not None]
+        for rid in finished[:max(0, len(self._runs) - self.max_history)]:
+            del self._runs[rid]
@@ -1,22 +1,206 @@
-import os, time
-import schedule
+# services/ingestion_service/scheduler.py
+#
+# Per-unit scheduling. Every (cluster, log_type) unit has its own cadence and
+# next due time; a unit that is still running when it comes due again is
+# skipped rather than queued, so a slow unit can neither pile up runs nor delay
+# the others. Due units start most-overdue first, next due times carry a random
+# jitter so units don't fire in lockstep, and every run's outcome and duration
+# is collected into a RunReport. trigger() makes a unit due immediately (follow
+# mode); a trigger that arrives while the unit runs queues exactly one rerun.
+
+import logging
+import random
+import threading
+import time
 from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from ..observability.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+UNIT_RUNS = REGISTRY.counter("ingest_unit_runs_total", "Unit runs by outcome", ["unit", "status"])
+
+
+@dataclass
+class UnitOutcome:
+    name: str
+    status: str           # "ok" | "error" | "skipped"
+    started: float        # epoch seconds
+    duration: float = 0.0
+    lag: float = 0.0      # seconds the run started after it was due
+    error: Optional[str] = None
+
+
+@dataclass
+class RunReport:
+    started: float
+    finished: Optional[float] = None
+    outcomes: List[UnitOutcome] = field(default_factory=list)
+
+    def counts(self) -> Dict[str, int]:
+        counts = {"ok": 0, "error": 0, "skipped": 0}
+        for o in self.outcomes:
+            counts[o.status] = counts.get(o.status, 0) + 1
+        return counts
+
+    def to_dict(self) -> dict:
+        return {"started": self.started, "finished": self.finished, "counts": self.counts(),
+                "outcomes": [asdict(o) for o in self.outcomes]}
+
+    def summary(self) -> str:
+        c = self.counts()
+        slowest = max(self.outcomes, key=lambda o: o.duration, default=None)
+        text = f"{c['ok']} ok, {c['error']} error, {c['skipped']} skipped"
+        if slowest is not None and slowest.duration:
+            text += f"; slowest {slowest.name} {slowest.duration:.1f}s"
+        return text
+
+
+@dataclass
+class Unit:
+    name: str
+    fn: Callable[[], object]
+    every_seconds: float
+    next_due: float = 0.0
+    running: bool = False
+    rerun: bool = False
+
+
+def run_unit(name: str, fn: Callable[[], object], lag: float = 0.0) -> UnitOutcome:
+    """
+    Run one unit and record its outcome; exceptions are recorded, not raised.
+    """
+    started, t0 = time.time(), time.perf_counter()
+    try:
+        fn()
+        UNIT_RUNS.labels(name, "ok").inc()
+        return UnitOutcome(name, "ok", started, time.perf_counter() - t0, lag)
+    except Exception as e:
+        logger.error("Unit %s failed: %s", name, e, exc_info=True)
+        UNIT_RUNS.labels(name, "error").inc()
+        return UnitOutcome(name, "error", started, time.perf_counter() - t0, lag, error=str(e))
+
+
+UnitSpec = Union[Callable[[], object], Tuple[str, Callable[[], object]]]
+
 
 class Scheduler:
-    def __init__(self, every_minutes: int, parallel: bool):
-        self.every = every_minutes
+    """
+    every_minutes:   default cadence (and report interval) for run_forever()
+    parallel:        run units concurrently (max_workers threads) or one at a time
+    jitter_seconds:  random delay added to each unit's first and next due time
+    """
+
+    def __init__(self, every_minutes: float, parallel: bool, max_workers: int = 8,
+                 jitter_seconds: float = 0.0):
+        self.every_minutes = every_minutes
         self.parallel = parallel
+        self.max_workers = max_workers if parallel else 1
+        self.jitter_seconds = jitter_seconds
+        self.units: List[Unit] = []
+        self._lock = threading.Lock()
+        self._report: Optional[RunReport] = None
+        self._wake = threading.Event()
 
-    def run_forever(self, job):
-        schedule.every(self.every).minutes.do(job)
-        job()  # run immediately
-        while True:
-            schedule.run_pending()
-            time.sleep(1)
-
-    def run_batch(self, callables):
-        if self.parallel and len(callables) > 1:
-            with ThreadPoolExecutor(max_workers=min(8, len(callables))) as pool:
-                for fn in callables: pool.submit(fn)
+    # ---------- one pass ----------
+
+    def run_batch(self, callables: Sequence[UnitSpec]) -> RunReport:
+        """
+        Run every callable once (bare callables or (name, fn) pairs), wait for all
+        of them and return the report. Exceptions are recorded, not raised.
+        """
+        report = RunReport(started=time.time())
+        named = [c if isinstance(c, tuple) else (getattr(c, "__name__", "unit"), c) for c in callables]
+        if self.parallel and len(named) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(named))) as pool:
+                futures = [pool.submit(run_unit, name, fn, 0.0) for name, fn in named]
+                report.outcomes = [f.result() for f in futures]
         else:
-            for fn in callables: fn()
+            report.outcomes = [run_unit(name, fn, 0.0) for name, fn in named]
+        report.finished = time.time()
+        return report
+
+    # ---------- continuous ----------
+
+    def add_unit(self, name: str, fn: Callable[[], object], every_minutes: Optional[float] = None):
+        every = (every_minutes or self.every_minutes) * 60
+        self.units.append(Unit(name, fn, every, next_due=time.monotonic() + self._jitter()))
+
+    def trigger(self, name: str) -> bool:
+        """
+        Run unit `name` now instead of at its next due time. False if unknown.
+        """
+        with self._lock:
+            unit = next((u for u in self.units if u.name == name), None)
+            if unit is None:
+                return False
+            if unit.running:
+                unit.rerun = True
+            else:
+                unit.next_due = 0.0
+        self._wake.set()
+        return True
+
+    def _jitter(self) -> float:
+        return random.uniform(0, self.jitter_seconds) if self.jitter_seconds > 0 else 0.0
+
+    def run_forever(self, job: Optional[Callable[[], object]] = None,
+                    on_report: Optional[Callable[[RunReport], None]] = None,
+                    stop: Optional[threading.Event] = None, tick: float = 1.0):
+        """
+        Run the registered units on their own cadence until stop is set. A plain
+        job (the old single-callable form) becomes one unit. Every every_minutes
+        the report collected so far is handed to on_report and a new one begins.
+        """
+        if job is not None and not self.units:
+            self.add_unit(getattr(job, "__name__", "job"), job)
+        stop = stop or threading.Event()
+        report_every = self.every_minutes * 60
+        self._report = RunReport(started=time.time())
+        next_report = time.monotonic() + report_every
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="unit") as pool:
+            while not stop.is_set():
+                now = time.monotonic()
+                # most overdue first
+                for unit in sorted((u for u in self.units if u.next_due <= now), key=lambda u: u.next_due):
+                    with self._lock:
+                        lag = now - unit.next_due if unit.next_due else 0.0  # 0: triggered
+                        unit.next_due = now + unit.every_seconds + self._jitter()
+                        if unit.running:
+                            logger.warning("Unit %s still running; skipping this run", unit.name)
+                            UNIT_RUNS.labels(unit.name, "skipped").inc()
+                            self._report.outcomes.append(UnitOutcome(unit.name, "skipped", time.time(), lag=lag))
+                            continue
+                        unit.running = True
+                    pool.submit(self._run_unit, unit, lag)
+
+                if now >= next_report:
+                    next_report = now + report_every
+                    self._rotate_report(on_report)
+                if self._wake.wait(tick):
+                    self._wake.clear()
+        self._rotate_report(on_report)  # after the pool drained: includes the last runs
+
+    def _run_unit(self, unit: Unit, lag: float):
+        outcome = run_unit(unit.name, unit.fn, lag)
+        with self._lock:
+            unit.running = False
+            self._report.outcomes.append(outcome)
+            if unit.rerun:
+                unit.rerun = False
+                unit.next_due = 0.0
+                self._wake.set()
+
+    def _rotate_report(self, on_report):
+        with self._lock:
+            report, self._report = self._report, RunReport(started=time.time())
+        report.finished = time.time()
+        logger.info("Run report: %s", report.summary())
+        if on_report is not None:
+            try:
+                on_report(report)
+            except Exception:
+                logger.exception("Run report callback failed")
@@ -6,62 +6,171 @@ import json
 import os
 import datetime
 import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from .write_behind import WriteBehindRecorder, get_recorder
+
+ER_DUP_FIELDNAME = 1060
+
+UPSERT_OFFSET_SQL = """
+INSERT INTO log_offsets (cluster_name, log_type, file_key, offset_val, fingerprint)
+VALUES (%s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE offset_val = VALUES(offset_val),
+                        fingerprint = COALESCE(VALUES(fingerprint), fingerprint)
+"""
+
+INSERT_EXECUTION_SQL = """
+INSERT INTO execution_log (run_time, execution_time, execution_interval, status, payload_json, response_json)
+VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+
+class _PooledConnection:
+    """
+    Context-manager handle for a pooled connection: returned to the pool on exit,
+    discarded instead if the block raised a DB error (the socket may be dead).
+    """
+
+    def __init__(self, pool: "ConnectionPool", conn):
+        self._pool, self._conn = pool, conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self._conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self._pool.release(self._conn, broken=isinstance(exc, Error))
+        return False
+
+
+class ConnectionPool:
+    """
+    Small blocking connection pool. Idle connections are reused LIFO so the hot
+    one stays warm; callers block (up to timeout) when all size slots are in use.
+    A connection idle for ping_after seconds or more is pinged (and reconnected,
+    or replaced) before it is handed out, since the server may have dropped it
+    (wait_timeout, restart).
+    """
+
+    def __init__(self, connect, size: int = 5, timeout: float = 30.0, ping_after: float = 5.0):
+        self._connect = connect
+        self._idle = queue.LifoQueue()  # (connection, monotonic time it was released)
+        self._slots = threading.BoundedSemaphore(size)
+        self._timeout = timeout
+        self.ping_after = ping_after
+
+    def get(self) -> _PooledConnection:
+        if not self._slots.acquire(timeout=self._timeout):
+            raise Error(msg="Timed out waiting for a pooled DB connection")
+        try:
+            try:
+                conn, released = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            else:
+                if time.monotonic() - released >= self.ping_after:
+                    conn = self._revive(conn)
+        except BaseException:
+            self._slots.release()
+            raise
+        return _PooledConnection(self, conn)
+
+    def _revive(self, conn):
+        try:
+            conn.ping(reconnect=True, attempts=1, delay=0)
+            return conn
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+            return self._connect()
+
+    def release(self, conn, broken: bool = False):
+        try:
+            if broken:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            else:
+                self._idle.put((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait()[0].close()
+            except queue.Empty:
+                return
+            except Exception:
+                continue
 
 
 class StateManager:
     """
     Tracks file offsets in MySQL so ingestion can resume from last processed point.
     Also logs ingestion executions with metadata.
+
+    Connections come from a pool (pool_size=0 connects per call). Between
+    begin_cycle() and end_cycle() offsets are served from one in-memory snapshot
+    and written back as a single batched upsert; a crash mid-cycle only means
+    that cycle's lines are read again (at-least-once).
+
+    The per-unit scheduler has no common cycle (units start and finish at
+    their own times, some concurrently), so each unit run uses unit_cycle():
+    the same in-memory buffering, but loaded with one SELECT of that unit's
+    offsets. The trade-off is one SELECT per unit run instead of one per
+    pass, and units never read offsets another unit has buffered - which
+    they do not need, since no two units share a (cluster, log_type).
     """
 
-    def __init__(self, db_cfg: dict, debug: int = 0, log_dir: str = "logs"):
+    def __init__(self, db_cfg: dict, debug: int = 0, log_dir: str = "logs", pool_size: int = 5,
+                 recorder: Optional[WriteBehindRecorder] = None):
         self.db_cfg = db_cfg
+        self.recorder = recorder  # None: the shared get_recorder()
+        self.pool = ConnectionPool(self._connect, size=pool_size) if pool_size > 0 else None
+        self._lock = threading.Lock()
+        self._snapshot = None  # {(cluster, log_type): {file_key: (offset, fingerprint)}}
+        self._units = {}       # same, for the log types inside a unit_cycle()
+        self._dirty = {}       # {(cluster, log_type, file_key): (offset, fingerprint)}
+        self._deleted = set()  # {(cluster, log_type, file_key)}
         self.debug = debug
         self.log_dir = log_dir
         os.makedirs(self.log_dir, exist_ok=True)
-        print("DB CONFIG:", self.db_cfg)
-        # Setup logger
-         # Create logger for this class
+        # Records go to the root handlers installed by setup_logging()
         self.logger = logging.getLogger("StateManager")
         if self.debug:
             self.logger.setLevel(logging.DEBUG)
-        else:
-            self.logger.setLevel(logging.INFO)
-
-        fh = logging.FileHandler(os.path.join(self.log_dir, "state_manager.log"))
-        fh.setLevel(logging.DEBUG)
-        ch = logging.StreamHandler()
-        ch.setLevel(logging.DEBUG if debug else logging.INFO)
-
-        formatter = logging.Formatter(
-            "%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S"
-        )
-        fh.setFormatter(formatter)
-        ch.setFormatter(formatter)
-
-          # Add handler only if not already added
-        if not self.logger.handlers:
-            ch = logging.StreamHandler()
-            formatter = logging.Formatter("[%(asctime)s] [%(name)s] [%(levelname)s] %(message)s")
-            ch.setFormatter(formatter)
-            self.logger.addHandler(ch)
 
         self.logger.info("Initialized StateManager with DB config: %s", self.db_cfg)
         self._ensure_tables()
 
     def _get_conn(self):
-        print("DB CONFIG 123:", self.db_cfg)
+        if self.pool is not None:
+            return self.pool.get()
+        return self._connect()
+
+    def _connect(self):
         return mysql.connector.connect(
             host=self.db_cfg["host"],
             port=self.db_cfg["port"],
             user=self.db_cfg["user"],
             password=self.db_cfg["password"],
             database=self.db_cfg["database"],
-            ssl_disabled=True
+            ssl_disabled=True,
+            # Pooled connections are reused; autocommit keeps a reused connection's
+            # reads from being pinned to an old REPEATABLE READ snapshot.
+            autocommit=True,
         )
 
-
     def _ensure_tables(self):
         """
         Ensure required tables exist.
@@ -72,6 +181,7 @@ class StateManager:
             log_type       VARCHAR(255) NOT NULL,
             file_key       VARCHAR(255) NOT NULL,
             offset_val     BIGINT NOT NULL,
+            fingerprint    VARCHAR(128) NULL,
             PRIMARY KEY (cluster_name, log_type, file_key)
         )
         """
@@ -91,9 +201,15 @@ class StateManager:
                 with conn.cursor() as cur:
                     cur.execute(create_offsets)
                     cur.execute(create_executions)
+                    try:
+                        # Tables created before file fingerprints existed
+                        cur.execute("ALTER TABLE log_offsets ADD COLUMN fingerprint VARCHAR(128) NULL")
+                    except Error as e:
+                        if e.errno != ER_DUP_FIELDNAME:
+                            raise
                 conn.commit()
         except Error as e:
-            print(f"[StateManager] Error creating table: {e}")
+            self.logger.error("Error creating table: %s", e)
             raise
 
     def get_offset1(self, cluster_name: str, log_type: str, file_key: str) -> int:
@@ -115,11 +231,14 @@ class StateManager:
                     return row[0] if row else 0
         except Error as e:
             self.logger.error("Error reading offset: %s", e)
-            print(f"[StateManager] Error reading offset: {e}")
             return 0
      
     def get_offset(self, cluster_name: str, log_type: str, file_key: str) -> int:
         self.logger.debug("Entering get_offset()")
+        with self._lock:
+            files = self._cached(cluster_name, log_type)
+            if files is not None:
+                return files.get(file_key, (0, None))[0]
         sql = """
         SELECT offset_val FROM log_offsets
         WHERE cluster_name = %s AND log_type = %s AND file_key = %s
@@ -131,28 +250,194 @@ class StateManager:
                     cur.execute(sql, (cluster_name, log_type, file_key))
                     row = cur.fetchone()
                     self.logger.debug("Fetched row: %s", row)
-                    #return row[0] if row else 0
-                    return 111
+                    return row[0] if row else 0
         except Error as e:
             self.logger.error("Error reading offset: %s", e)
             return 0
  
-    def upsert_offset(self, cluster_name: str, log_type: str, file_key: str, offset_val: int):
+    def get_file_states(self, cluster_name: str, log_type: str) -> dict:
         """
-        Inserts or updates offset for given file.
+        Returns {file_key: (offset_val, fingerprint)} for every tracked file of a log type.
+        A DB error is raised, not read as "no state": that would re-read every
+        file from 0, so the unit run fails and is retried instead.
         """
+        with self._lock:
+            files = self._cached(cluster_name, log_type)
+            if files is not None:
+                return dict(files)
+        return self._load_file_states(cluster_name, log_type)
+
+    def _load_file_states(self, cluster_name: str, log_type: str) -> dict:
         sql = """
-        INSERT INTO log_offsets (cluster_name, log_type, file_key, offset_val)
-        VALUES (%s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE offset_val = VALUES(offset_val)
+        SELECT file_key, offset_val, fingerprint FROM log_offsets
+        WHERE cluster_name = %s AND log_type = %s
         """
         try:
             with self._get_conn() as conn:
                 with conn.cursor() as cur:
-                    cur.execute(sql, (cluster_name, log_type, file_key, offset_val))
+                    cur.execute(sql, (cluster_name, log_type))
+                    return {key: (off, fp) for key, off, fp in cur.fetchall()}
+        except Error as e:
+            self.logger.error("Error reading file states: %s", e)
+            raise
+
+    def _cached(self, cluster_name: str, log_type: str) -> Optional[dict]:
+        # The in-memory offsets of a log type inside a cycle, else None (call under _lock)
+        if self._snapshot is not None:
+            return self._snapshot.setdefault((cluster_name, log_type), {})
+        return self._units.get((cluster_name, log_type))
+
+    def upsert_offset(self, cluster_name: str, log_type: str, file_key: str, offset_val: int,
+                      fingerprint: str | None = None):
+        """
+        Inserts or updates offset (and file fingerprint, if given) for given file.
+        Inside a cycle the write is buffered until end_cycle().
+        """
+        with self._lock:
+            files = self._cached(cluster_name, log_type)
+            if files is not None:
+                fingerprint = fingerprint or files.get(file_key, (0, None))[1]
+                files[file_key] = (offset_val, fingerprint)
+                self._dirty[(cluster_name, log_type, file_key)] = (offset_val, fingerprint)
+                self._deleted.discard((cluster_name, log_type, file_key))
+                return
+        try:
+            with self._get_conn() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(UPSERT_OFFSET_SQL, (cluster_name, log_type, file_key, offset_val, fingerprint))
                 conn.commit()
         except Error as e:
-            print(f"[StateManager] Error writing offset: {e}")
+            self.logger.error("Error writing offset: %s", e)
+
+    def delete_offsets(self, cluster_name: str, log_type: str, file_keys: list[str]):
+        """
+        Forgets files that no longer exist (rotated away / deleted).
+        """
+        if not file_keys:
+            return
+        with self._lock:
+            files = self._cached(cluster_name, log_type)
+            if files is not None:
+                for key in file_keys:
+                    files.pop(key, None)
+                    self._dirty.pop((cluster_name, log_type, key), None)
+                    self._deleted.add((cluster_name, log_type, key))
+                return
+        placeholders = ", ".join(["%s"] * len(file_keys))
+        sql = f"""
+        DELETE FROM log_offsets
+        WHERE cluster_name = %s AND log_type = %s AND file_key IN ({placeholders})
+        """
+        try:
+            with self._get_conn() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(sql, (cluster_name, log_type, *file_keys))
+                conn.commit()
+        except Error as e:
+            self.logger.error("Error deleting offsets: %s", e)
+
+    # ---------------- Cycle snapshot ---------------- #
+    def begin_cycle(self):
+        """
+        Load every offset with one SELECT; until end_cycle() reads and writes
+        are served from memory.
+        """
+        snapshot = {}
+        sql = "SELECT cluster_name, log_type, file_key, offset_val, fingerprint FROM log_offsets"
+        try:
+            with self._get_conn() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(sql)
+                    for cluster_name, log_type, file_key, off, fp in cur.fetchall():
+                        snapshot.setdefault((cluster_name, log_type), {})[file_key] = (off, fp)
+        except Error as e:
+            # Fall back to per-call queries rather than resuming everything from 0
+            self.logger.error("Error loading offset snapshot: %s", e)
+            return
+        with self._lock:
+            # Changes from a previous cycle whose flush failed are still pending
+            for (c, lt, key), value in self._dirty.items():
+                snapshot.setdefault((c, lt), {})[key] = value
+            for c, lt, key in self._deleted:
+                snapshot.get((c, lt), {}).pop(key, None)
+            self._snapshot = snapshot
+        self.logger.info("Loaded offset snapshot: %d log type(s)", len(snapshot))
+
+    def flush(self):
+        """
+        Write buffered offset changes: one batched upsert plus one DELETE.
+        Changes stay buffered (and are retried next flush) if the write fails.
+        """
+        with self._lock:
+            dirty = [(c, lt, key, off, fp) for (c, lt, key), (off, fp) in self._dirty.items()]
+            deleted = list(self._deleted)
+            self._dirty.clear()
+            self._deleted.clear()
+        if not dirty and not deleted:
+            return
+        try:
+            with self._get_conn() as conn:
+                with conn.cursor() as cur:
+                    if dirty:
+                        cur.executemany(UPSERT_OFFSET_SQL, dirty)
+                    if deleted:
+                        placeholders = ", ".join(["(%s, %s, %s)"] * len(deleted))
+                        cur.execute(
+                            "DELETE FROM log_offsets WHERE (cluster_name, log_type, file_key) "
+                            f"IN ({placeholders})",
+                            [v for row in deleted for v in row],
+                        )
+            self.logger.info("Flushed %d offset(s), %d deletion(s)", len(dirty), len(deleted))
+        except Error as e:
+            self.logger.error("Error flushing offsets: %s", e)
+            with self._lock:
+                for c, lt, key, off, fp in dirty:
+                    self._dirty.setdefault((c, lt, key), (off, fp))
+                self._deleted.update(k for k in deleted if k not in self._dirty)
+
+    def end_cycle(self):
+        """
+        Flush buffered changes and go back to per-call queries.
+        """
+        self.flush()
+        with self._lock:
+            if not self._dirty and not self._deleted:
+                self._snapshot = None
+
+    @contextmanager
+    def unit_cycle(self, cluster_name: str, log_type: str):
+        """
+        begin_cycle()/end_cycle() for one log type, for units run on their own
+        schedule: its offsets are loaded with one SELECT, served and buffered
+        in memory, and flushed on exit. Inside a full cycle this does nothing.
+        """
+        key = (cluster_name, log_type)
+        with self._lock:
+            own = self._snapshot is None
+            load = own and key not in self._units  # kept after a failed flush
+        if load:
+            try:
+                files = self._load_file_states(cluster_name, log_type)
+            except Error:
+                files = None  # per-call queries, which fail the run if the DB stays down
+            if files is not None:
+                with self._lock:
+                    for (c, lt, file_key), value in self._dirty.items():
+                        if (c, lt) == key:
+                            files[file_key] = value
+                    for c, lt, file_key in self._deleted:
+                        if (c, lt) == key:
+                            files.pop(file_key, None)
+                    self._units[key] = files
+        try:
+            yield
+        finally:
+            if own:
+                self.flush()
+                with self._lock:
+                    pending = any(k[:2] == key for k in self._dirty) or any(k[:2] == key for k in self._deleted)
+                    if not pending:
+                        self._units.pop(key, None)
 
 # ---------------- Execution Logging ---------------- #
     def log_execution(
@@ -164,40 +449,26 @@ class StateManager:
         response: dict = None
     ):
         """
-        Logs each run of ingestion into MySQL and optional file.
+        Logs each run of ingestion into MySQL and optional file. The row and
+        the debug lines are queued on the write-behind recorder; this does not
+        wait for the DB.
         """
         run_time = datetime.datetime.now()
         payload_json = json.dumps(payload or {})
         response_json = json.dumps(response or {})
 
-        sql = """
-        INSERT INTO execution_log (run_time, execution_time, execution_interval, status, payload_json, response_json)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        """
-        # Print the SQL with parameters
-        print("[StateManager] Executing SQL:", sql.strip())
-        print("[StateManager] With values:", values)
-        try:
-            with self._get_conn() as conn:
-                with conn.cursor() as cur:
-                    cur.execute(sql, (run_time, execution_time, execution_interval, status, payload_json, response_json))
-                conn.commit()
-        except Error as e:
-            print(f"[StateManager] Error writing execution log: {e}")
+        values = (run_time, execution_time, execution_interval, status, payload_json, response_json)
+        self.logger.debug("Queueing execution log: %s | values=%s", INSERT_EXECUTION_SQL.strip(), values)
+        recorder = self.recorder or get_recorder()
+        recorder.add_row(self._get_conn, INSERT_EXECUTION_SQL, values)
 
         # Optional debug log to file
         if self.debug:
             log_file = os.path.join(self.log_dir, f"execution_{run_time.date()}.log")
-            with open(log_file, "a", encoding="utf-8") as f:
-                f.write(
-                    f"[{run_time}] status={status}, "
-                    f"execution_time={execution_time}s, interval={execution_interval}s\n"
-                    f"payload={payload_json}\nresponse={response_json}\n\n"
-                )
-
-        # Always print if no logs were found
-        if status.lower() == "no_new_logs":
-            print(f"[ExecutionLog] {run_time}: No new log entries detected.")
-
-
+            recorder.add_line(log_file,
+                              f"[{run_time}] status={status}, "
+                              f"execution_time={execution_time}s, interval={execution_interval}s\n"
+                              f"payload={payload_json}\nresponse={response_json}\n\n")
 
+        if status.lower() == "no_new_logs":
+            self.logger.info("[ExecutionLog] %s: No new log entries detected.", run_time)
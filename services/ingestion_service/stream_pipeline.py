@@ -0,0 +1,199 @@
+# services/ingestion_service/stream_pipeline.py
+#
+# Streaming read -> parse -> enrich -> analyze -> write pipeline.
+# Lines flow in fixed-size micro-batches through one thread per stage, connected
+# by bounded queues (backpressure: a slow analyzer stalls the reader instead of
+# letting the backlog pile up in memory). The offset is committed after each
+# batch has been written, so results appear while the file is still being read
+# and a crash only repeats the batches in flight.
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+from ..observability.metrics import REGISTRY
+from .ingestors.line_reader import ReadProgress
+
+logger = logging.getLogger(__name__)
+
+STAGE_SECONDS = REGISTRY.histogram("ingest_stage_seconds", "Seconds spent per batch in each ingestion stage",
+                                   ["stage"])
+QUEUE_DEPTH = REGISTRY.gauge("ingest_queue_depth", "Batches waiting in front of each pipeline stage", ["stage"])
+
+Stage = Tuple[str, Callable[[list], list]]
+
+_DONE = object()
+
+
+@dataclass
+class Batch:
+    seq: int
+    items: list
+    end_offset: int  # offset just past the last line in (or scanned for) this batch
+    lines: int = 0   # lines read into this batch (items change shape per stage)
+
+
+@dataclass
+class StreamStats:
+    batches: int = 0
+    lines: int = 0
+    outputs: int = 0
+    last_offset: int = 0
+    first_output_s: Optional[float] = None  # seconds from start to the first written batch
+    stage_seconds: dict = field(default_factory=dict)
+
+
+class _Aborted(Exception):
+    pass
+
+
+class StreamPipeline:
+    """
+    stages: ordered (name, fn) pairs; each fn maps a list of items to a new list.
+    The last stage is the writer; commit(end_offset) runs after it returns.
+    """
+
+    def __init__(self, stages: Sequence[Stage], batch_size: int = 200, queue_size: int = 4):
+        if not stages:
+            raise ValueError("StreamPipeline needs at least one stage")
+        self.stages = list(stages)
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+
+    def run(self, source: Iterable[Tuple[object, int]], start_offset: int,
+            commit: Callable[[int], None], progress: Optional[ReadProgress] = None,
+            prebatched: bool = False) -> StreamStats:
+        """
+        source yields (line, offset_after_line), e.g. ingestor.incremental_read(),
+        or with prebatched=True whole batches as (items, offset_after_batch), e.g.
+        ParsePool.iter_batches() (each becomes one Batch as-is).
+        progress (the same object given to the reader) lets the final commit cover
+        trailing lines the reader filtered out.
+        """
+        stats = StreamStats(last_offset=start_offset)
+        stats.stage_seconds = {name: 0.0 for name, _ in self.stages}
+        stop = threading.Event()
+        errors: List[BaseException] = []
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        started = time.monotonic()
+        # Metrics are updated per batch, never per line
+        read_seconds = STAGE_SECONDS.labels("read")
+        stage_hists = [STAGE_SECONDS.labels(name) for name, _ in self.stages]
+        depths = [QUEUE_DEPTH.labels(name) for name, _ in self.stages]
+
+        def put(q, item):
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+            raise _Aborted()
+
+        def get(q):
+            while not stop.is_set():
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            raise _Aborted()
+
+        def fail(exc):
+            errors.append(exc)
+            stop.set()
+
+        def reader():
+            try:
+                seq, items, end, sent = 0, [], start_offset, start_offset
+                t0 = time.perf_counter()
+                for entry, offset in source:
+                    end = offset
+                    if prebatched:
+                        read_seconds.observe(time.perf_counter() - t0)
+                        put(queues[0], Batch(seq, entry, end, len(entry)))
+                        seq, sent = seq + 1, end
+                        t0 = time.perf_counter()
+                    else:
+                        items.append(entry)
+                        if len(items) >= self.batch_size:
+                            read_seconds.observe(time.perf_counter() - t0)
+                            put(queues[0], Batch(seq, items, end, len(items)))
+                            seq, items, sent = seq + 1, [], end
+                            t0 = time.perf_counter()
+                    if stop.is_set():
+                        return
+                if progress is not None:
+                    end = max(end, progress.offset)
+                if items or end > sent:
+                    read_seconds.observe(time.perf_counter() - t0)
+                    put(queues[0], Batch(seq, items, end, len(items)))
+                put(queues[0], _DONE)
+            except _Aborted:
+                pass
+            except BaseException as e:
+                fail(e)
+
+        def worker(idx):
+            name, fn = self.stages[idx]
+            try:
+                while True:
+                    batch = get(queues[idx])
+                    depths[idx].set(queues[idx].qsize())
+                    if batch is _DONE:
+                        put(queues[idx + 1], _DONE)
+                        return
+                    t0 = time.perf_counter()
+                    batch.items = fn(batch.items) if batch.items else []
+                    elapsed = time.perf_counter() - t0
+                    stats.stage_seconds[name] += elapsed
+                    stage_hists[idx].observe(elapsed)
+                    put(queues[idx + 1], batch)
+            except _Aborted:
+                pass
+            except BaseException as e:
+                fail(e)
+
+        # Stages 0..n-2 run in their own threads; the writer runs here so that
+        # commit() happens on the caller's thread, strictly in batch order.
+        threads = [threading.Thread(target=reader, name="stream-reader", daemon=True)]
+        threads += [threading.Thread(target=worker, args=(i,), name=f"stream-{self.stages[i][0]}", daemon=True)
+                    for i in range(len(self.stages) - 1)]
+        for t in threads:
+            t.start()
+
+        write_name, write_fn = self.stages[-1]
+        try:
+            while True:
+                batch = get(queues[-1])
+                depths[-1].set(queues[-1].qsize())
+                if batch is _DONE:
+                    break
+                t0 = time.perf_counter()
+                out = write_fn(batch.items) if batch.items else []
+                elapsed = time.perf_counter() - t0
+                stats.stage_seconds[write_name] += elapsed
+                stage_hists[-1].observe(elapsed)
+                commit(batch.end_offset)
+                stats.batches += 1
+                stats.lines += batch.lines
+                stats.outputs += len(out or [])
+                stats.last_offset = batch.end_offset
+                if stats.first_output_s is None and batch.lines:
+                    stats.first_output_s = time.monotonic() - started
+        except _Aborted:
+            pass
+        except BaseException as e:
+            fail(e)
+        finally:
+            stop.set()
+            for t in threads:
+                t.join()
+
+        if errors:
+            raise errors[0]
+        return stats
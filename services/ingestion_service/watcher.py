@@ -0,0 +1,259 @@
+# services/ingestion_service/watcher.py
+#
+# Follow mode for local clusters: watch the log directories and report changed
+# files within milliseconds instead of waiting for the next scheduled cycle.
+# Linux inotify (called through libc, no extra dependency) is used where it is
+# available; directories it cannot watch (no inotify, watch limit reached, or
+# mode "poll" for mounts written from outside this kernel) are stat-polled.
+# Events are debounced and coalesced per file: a burst of writes is reported
+# once, after the file has been quiet for debounce_seconds (and at least every
+# max_delay_seconds while it keeps being written).
+
+import ctypes
+import ctypes.util
+import errno
+import fnmatch
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, Iterator, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+IN_MODIFY = 0x00000002
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+
+WATCH_MASK = IN_MODIFY | IN_CREATE | IN_MOVED_TO | IN_ONLYDIR
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len (name follows, NUL padded)
+
+# (ino, size, mtime_ns) per file name, for polled directories
+Snapshot = Dict[str, Tuple[int, int, int]]
+
+
+class Inotify:
+    """
+    Minimal inotify binding. Raises OSError where inotify is not available.
+    """
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        try:
+            init1, self._add_watch = libc.inotify_init1, libc.inotify_add_watch
+        except AttributeError:
+            raise OSError(errno.ENOSYS, "inotify is not available on this platform")
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        fd = init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.fd = fd
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int:
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def read_events(self) -> Iterator[Tuple[int, int, str]]:
+        """
+        Yield (wd, mask, name) for the events currently queued.
+        """
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        pos = 0
+        while pos + _EVENT.size <= len(data):
+            wd, mask, _cookie, length = _EVENT.unpack_from(data, pos)
+            pos += _EVENT.size
+            name = data[pos:pos + length].rstrip(b"\0")
+            pos += length
+            yield wd, mask, os.fsdecode(name)
+
+    def close(self):
+        os.close(self.fd)
+
+
+def snapshot(directory: str) -> Snapshot:
+    snap = {}
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    if entry.is_file():
+                        st = entry.stat()
+                        snap[entry.name] = (st.st_ino, st.st_size, st.st_mtime_ns)
+                except FileNotFoundError:
+                    continue
+    except (FileNotFoundError, NotADirectoryError, PermissionError):
+        pass
+    return snap
+
+
+class FileWatcher:
+    """
+    dirs:               directories whose files are watched (not recursive)
+    on_change:          called from the watcher thread with a set of changed paths
+    mode:               "auto" (inotify, polling where it can't) | "inotify" | "poll"
+    debounce_seconds:   quiet time after a file's last event before it is reported
+    max_delay_seconds:  a file written continuously is still reported this often
+    poll_seconds:       stat interval for polled directories
+    """
+
+    def __init__(self, dirs: Iterable[str], on_change: Callable[[Set[str]], None], mode: str = "auto",
+                 debounce_seconds: float = 0.1, max_delay_seconds: float = 2.0, poll_seconds: float = 1.0):
+        self.dirs = sorted({os.path.abspath(d) for d in dirs})
+        self.on_change = on_change
+        self.mode = mode
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.poll_seconds = poll_seconds
+        self._inotify = None
+        self._wds: Dict[int, str] = {}
+        self._polled: Dict[str, Snapshot] = {}
+        self._pending: Dict[str, Tuple[float, float]] = {}  # path -> (first, last event)
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def watched(self) -> List[str]:
+        return sorted(self._wds.values())
+
+    @property
+    def polled(self) -> List[str]:
+        return sorted(self._polled)
+
+    def start(self) -> "FileWatcher":
+        self._setup()
+        logger.info("[FileWatcher] inotify on %d dir(s), polling %d dir(s)", len(self._wds), len(self._polled))
+        self._thread = threading.Thread(target=self._loop, name="file-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _setup(self):
+        if self.mode != "poll":
+            try:
+                self._inotify = Inotify()
+            except OSError as e:
+                if self.mode == "inotify":
+                    raise
+                logger.warning("[FileWatcher] inotify unavailable (%s); polling instead", e)
+        for d in self.dirs:
+            if self._inotify is not None:
+                try:
+                    self._wds[self._inotify.add_watch(d)] = d
+                    continue
+                except OSError as e:
+                    if self.mode == "inotify":
+                        raise
+                    logger.warning("[FileWatcher] cannot watch %s with inotify (%s); polling it", d, e)
+            self._polled[d] = snapshot(d)
+
+    def _loop(self):
+        next_poll = time.monotonic() + self.poll_seconds
+        while not self._stop.is_set():
+            now = time.monotonic()
+            timeout = next_poll - now if self._polled else self.poll_seconds
+            if self._pending:
+                timeout = min(timeout, self._next_deadline() - now)
+            timeout = max(timeout, 0.0)
+            if self._wds:
+                ready, _, _ = select.select([self._inotify.fd], [], [], timeout)
+                if ready:
+                    self._read_inotify()
+            else:
+                self._stop.wait(timeout)
+
+            now = time.monotonic()
+            if self._polled and now >= next_poll:
+                next_poll = now + self.poll_seconds
+                self._poll(now)
+            self._emit_due(now)
+
+    def _read_inotify(self):
+        now = time.monotonic()
+        for wd, mask, name in self._inotify.read_events():
+            if mask & IN_Q_OVERFLOW:
+                # events were dropped: treat every file in every watched dir as changed
+                for d in self._wds.values():
+                    for fname in snapshot(d):
+                        self._touch(os.path.join(d, fname), now)
+                continue
+            d = self._wds.get(wd)
+            if d is None:
+                continue
+            if mask & IN_IGNORED:
+                # directory removed or unmounted: poll it until it comes back
+                del self._wds[wd]
+                self._polled[d] = {}
+                logger.warning("[FileWatcher] lost inotify watch on %s; polling it", d)
+            elif name:
+                self._touch(os.path.join(d, name), now)
+
+    def _poll(self, now: float):
+        for d, before in list(self._polled.items()):
+            after = snapshot(d)
+            for name, sig in after.items():
+                if before.get(name) != sig:
+                    self._touch(os.path.join(d, name), now)
+            self._polled[d] = after
+
+    def _touch(self, path: str, now: float):
+        first = self._pending.get(path, (now, now))[0]
+        self._pending[path] = (first, now)
+
+    def _due(self, first: float, last: float) -> float:
+        return min(last + self.debounce_seconds, first + self.max_delay_seconds)
+
+    def _next_deadline(self) -> float:
+        return min(self._due(first, last) for first, last in self._pending.values())
+
+    def _emit_due(self, now: float):
+        due = {p for p, (first, last) in self._pending.items() if now >= self._due(first, last)}
+        if not due:
+            return
+        for p in due:
+            del self._pending[p]
+        try:
+            self.on_change(due)
+        except Exception:
+            logger.exception("[FileWatcher] change callback failed")
+
+
+def follow_units(targets: Iterable[Tuple[str, str, str]], trigger: Callable[[str], object],
+                 **watcher_kwargs) -> FileWatcher:
+    """
+    Watch the directories of (unit_name, directory, file_glob) targets and call
+    trigger(unit_name) for each unit whose glob matches a changed file.
+    Returns the watcher, not yet started.
+    """
+    routes = defaultdict(list)
+    for unit, directory, file_glob in targets:
+        routes[os.path.abspath(directory)].append((unit, file_glob))
+
+    def on_change(paths: Set[str]):
+        units = set()
+        for path in paths:
+            directory, name = os.path.split(path)
+            units.update(unit for unit, file_glob in routes.get(directory, ()) if fnmatch.fnmatch(name, file_glob))
+        for unit in sorted(units):
+            trigger(unit)
+
+    return FileWatcher(routes, on_change, **watcher_kwargs)
@@ -0,0 +1,206 @@
+# services/ingestion_service/write_behind.py
+#
+# Shared write-behind recorder for execution records. Callers queue DB rows
+# (an INSERT statement plus its parameters) and log-file lines and return at
+# once; one background thread drains the queue and writes in batches - one
+# executemany per statement and connection, one buffered write per file -
+# whenever max_batch items are waiting or the oldest has waited flush_seconds.
+# When the queue is full a caller waits up to put_timeout, then the item is
+# dropped and counted. flush() waits until everything queued so far is written;
+# close() (also run at exit for the shared recorder) flushes and stops.
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..observability.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH = 500
+DEFAULT_FLUSH_SECONDS = 1.0
+DEFAULT_MAX_QUEUE = 10000
+
+RECORDS_WRITTEN = REGISTRY.counter("write_behind_records_total", "Records written by the write-behind recorder",
+                                   ["kind"])
+RECORDS_DROPPED = REGISTRY.counter("write_behind_dropped_total", "Records the write-behind recorder dropped",
+                                   ["kind", "reason"])
+QUEUE_DEPTH = REGISTRY.gauge("write_behind_queue_depth", "Records waiting in the write-behind queue")
+
+_STOP = object()
+
+
+class _Flush:
+    __slots__ = ("done",)
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class WriteBehindRecorder:
+    """
+    max_batch:      write as soon as this many records are waiting
+    flush_seconds:  ... or when the oldest waiting record is this old
+    max_queue:      records held in memory before callers are pushed back
+    put_timeout:    seconds a caller waits for room in a full queue before its
+                    record is dropped (0: drop at once, never block the caller)
+    """
+
+    def __init__(self, max_batch: int = DEFAULT_MAX_BATCH, flush_seconds: float = DEFAULT_FLUSH_SECONDS,
+                 max_queue: int = DEFAULT_MAX_QUEUE, put_timeout: float = 0.0):
+        self.max_batch = max_batch
+        self.flush_seconds = flush_seconds
+        self.put_timeout = put_timeout
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    # ---------------- producers ---------------- #
+    def add_row(self, connect: Callable, sql: str, params: tuple) -> bool:
+        """
+        Queue one row for `sql`. connect() must return a connection usable as
+        a context manager (StateManager._get_conn, ConnectionPool.get). Returns
+        False if the row was dropped.
+        """
+        return self._put(("row", connect, sql, params))
+
+    def add_line(self, path: str, text: str) -> bool:
+        """
+        Queue text (one or more whole lines) to be appended to path.
+        """
+        return self._put(("line", path, text))
+
+    def _put(self, item) -> bool:
+        if self._closed:
+            RECORDS_DROPPED.labels(item[0], "closed").inc()
+            return False
+        try:
+            if self.put_timeout > 0:
+                self._queue.put(item, timeout=self.put_timeout)
+            else:
+                self._queue.put_nowait(item)
+        except queue.Full:
+            RECORDS_DROPPED.labels(item[0], "full").inc()
+            return False
+        QUEUE_DEPTH.set(self._queue.qsize())
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until everything queued before this call is written (or timeout).
+        After close() there is nothing left to wait for.
+        """
+        if self._closed or not self._thread.is_alive():
+            return True
+        marker = _Flush()
+        self._queue.put(marker)  # blocking: a flush is worth waiting for room
+        return marker.done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 30.0):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    # ---------------- worker ---------------- #
+    def _run(self):
+        pending: List[tuple] = []
+        deadline = 0.0
+        while True:
+            wait = max(0.0, deadline - time.monotonic()) if pending else None
+            try:
+                item = self._queue.get(timeout=wait)
+            except queue.Empty:
+                item = None  # the oldest record is due
+            if item is not None and not isinstance(item, _Flush) and item is not _STOP:
+                if not pending:
+                    deadline = time.monotonic() + self.flush_seconds
+                pending.append(item)
+                if len(pending) < self.max_batch:
+                    continue
+            self._write(pending)
+            pending = []
+            QUEUE_DEPTH.set(self._queue.qsize())
+            if isinstance(item, _Flush):
+                item.done.set()
+            elif item is _STOP:
+                self._drain()
+                return
+
+    def _drain(self):
+        # Whatever raced close() into the queue behind _STOP: write it and
+        # release the flush() calls waiting on it
+        items, markers = [], []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, _Flush):
+                markers.append(item)
+            elif item is not _STOP:
+                items.append(item)
+        self._write(items)
+        for marker in markers:
+            marker.done.set()
+        QUEUE_DEPTH.set(0)
+
+    def _write(self, items: List[tuple]):
+        if not items:
+            return
+        rows: Dict[Tuple[Callable, str], List[tuple]] = defaultdict(list)
+        lines: Dict[str, List[str]] = defaultdict(list)
+        for item in items:
+            if item[0] == "row":
+                rows[(item[1], item[2])].append(item[3])
+            else:
+                lines[item[1]].append(item[2])
+
+        for (connect, sql), params in rows.items():
+            try:
+                with connect() as conn:
+                    with conn.cursor() as cur:
+                        cur.executemany(sql, params)
+                    conn.commit()
+                RECORDS_WRITTEN.labels("row").inc(len(params))
+            except Exception as e:
+                RECORDS_DROPPED.labels("row", "error").inc(len(params))
+                logger.error("[WriteBehind] Dropped %d row(s) after a DB error: %s", len(params), e)
+
+        for path, texts in lines.items():
+            try:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("".join(texts))
+                RECORDS_WRITTEN.labels("line").inc(len(texts))
+            except OSError as e:
+                RECORDS_DROPPED.labels("line", "error").inc(len(texts))
+                logger.error("[WriteBehind] Dropped %d line(s) for %s: %s", len(texts), path, e)
+
+
+_default_recorder: Optional[WriteBehindRecorder] = None
+_default_lock = threading.Lock()
+
+
+def get_recorder() -> WriteBehindRecorder:
+    """
+    The process-wide recorder shared by ExecutionLogger and StateManager,
+    flushed and stopped at interpreter exit.
+    """
+    global _default_recorder
+    with _default_lock:
+        if _default_recorder is None:
+            _default_recorder = WriteBehindRecorder(
+                max_batch=int(os.getenv("WRITE_BEHIND_MAX_BATCH", str(DEFAULT_MAX_BATCH))),
+                flush_seconds=float(os.getenv("WRITE_BEHIND_FLUSH_SECONDS", str(DEFAULT_FLUSH_SECONDS))),
+                max_queue=int(os.getenv("WRITE_BEHIND_MAX_QUEUE", str(DEFAULT_MAX_QUEUE))),
+                put_timeout=float(os.getenv("WRITE_BEHIND_PUT_TIMEOUT", "0")),
+            )
+            atexit.register(_default_recorder.close)
+        return _default_recorder
@@ -0,0 +1,163 @@
+# services/observability/log.py
+#
+# Process-wide logging setup shared by every service entry point. Callers only
+# enqueue records: the root logger gets a handler that puts records on a
+# bounded queue, and one background thread formats them and writes them to
+# stderr and a rotating execution.log. Messages are formatted on that thread
+# (so pass %-style args, not f-strings, and do not mutate them afterwards).
+# When the queue is full, records are dropped and counted rather than blocking
+# the ingestion path. Sampler thins out per-line events; payload() caps dumps.
+#
+# Environment: LOG_LEVEL (INFO), LOG_DIR (logs), LOG_SAMPLE_RATE (0.01),
+# LOG_MAX_PAYLOAD (2000 chars), LOG_QUEUE_SIZE (10000).
+
+import atexit
+import itertools
+import logging
+import os
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+
+from .metrics import REGISTRY
+
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+MAX_FILE_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 5
+
+LOG_RECORDS_DROPPED = REGISTRY.counter(
+    "log_records_dropped_total", "Log records dropped because the log queue was full")
+
+_lock = threading.Lock()
+_handler: Optional["AsyncQueueHandler"] = None
+_listener: Optional[QueueListener] = None
+
+sample_rate = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+max_payload = int(os.getenv("LOG_MAX_PAYLOAD", "2000"))
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread and drops
+    records (counting them) instead of blocking when the queue is full.
+    """
+
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The traceback is rendered now, while it still describes this thread's
+        # exception; the message itself is left to the writer thread.
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            LOG_RECORDS_DROPPED.inc()
+
+
+def setup_logging(level: Optional[str] = None, log_dir: Optional[str] = None,
+                  queue_size: Optional[int] = None, stream=sys.stderr) -> AsyncQueueHandler:
+    """
+    Install the queue handler on the root logger and start the writer thread.
+    Idempotent: later calls only adjust the level. log_dir="" disables the file.
+    """
+    global _handler, _listener
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    root = logging.getLogger()
+    with _lock:
+        root.setLevel(level)
+        if _handler is not None:
+            return _handler
+
+        log_dir = (os.getenv("LOG_DIR", "logs") if log_dir is None else log_dir).strip()
+        formatter = logging.Formatter(LOG_FORMAT, DATE_FORMAT)
+        targets = []
+        if stream is not None:
+            targets.append(logging.StreamHandler(stream))
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+            targets.append(RotatingFileHandler(os.path.join(log_dir, "execution.log"),
+                                               maxBytes=MAX_FILE_BYTES, backupCount=BACKUP_COUNT))
+        for t in targets:
+            t.setFormatter(formatter)
+
+        size = queue_size or int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+        _handler = AsyncQueueHandler(queue.Queue(maxsize=size))
+        _listener = QueueListener(_handler.queue, *targets, respect_handler_level=True)
+        _listener.start()
+        root.addHandler(_handler)
+    atexit.register(shutdown_logging)
+    return _handler
+
+
+def shutdown_logging():
+    """
+    Write out what is still queued, stop the writer thread and remove the
+    handler from the root logger.
+    """
+    global _handler, _listener
+    with _lock:
+        handler, listener = _handler, _listener
+        _handler = _listener = None
+    if handler is None:
+        return
+    logging.getLogger().removeHandler(handler)
+    try:
+        listener.stop()  # waits for the queue to drain
+    except queue.Full:
+        listener.queue.put(None)  # sentinel did not fit: retry blocking
+        listener._thread.join()
+        listener._thread = None
+    for h in listener.handlers:
+        h.close()
+
+
+class Sampler:
+    """
+    Lets one in every 1/rate calls through (rate=None: LOG_SAMPLE_RATE), for
+    events logged per line or per record:
+
+        if sample():
+            logger.debug("Analyzing entry %d", idx)
+    """
+
+    def __init__(self, rate: Optional[float] = None):
+        self.rate = rate
+        self._count = itertools.count()
+
+    def __call__(self) -> bool:
+        rate = sample_rate if self.rate is None else self.rate
+        if rate <= 0:
+            return False
+        return next(self._count) % max(1, round(1 / rate)) == 0
+
+
+class payload:
+    """
+    Log argument that renders obj truncated to limit characters (None:
+    LOG_MAX_PAYLOAD), on the writer thread and only if the record is emitted.
+    """
+    __slots__ = ("obj", "limit")
+
+    def __init__(self, obj, limit: Optional[int] = None):
+        self.obj = obj
+        self.limit = limit
+
+    def __str__(self) -> str:
+        text = str(self.obj)
+        limit = max_payload if self.limit is None else self.limit
+        if len(text) <= limit:
+            return text
+        return f"{text[:limit]}... [{len(text) - limit} more chars]"
+
+    __repr__ = __str__
@@ -0,0 +1,253 @@
+# services/writer/analysis_index.py
+#
+# Embedded search index over the analyses in the segment stores. One SQLite
+# file: an `analyses` table (cluster, log type, fingerprint, source, timestamps,
+# where the record lives in its segment) with B-tree indexes for the exact
+# filters, and an external-content FTS5 table over the text (message, summary,
+# fix suggestion, template, log text). A store calls add_block() after every
+# flush, so the index grows a block at a time. Every indexed block is recorded
+# by (segment, offset), so catch_up() finds exactly the blocks that are missing
+# (crash, failed index write, older output), not only those after the newest.
+# Results are newest first with keyset pagination (cursor = last id seen), so
+# deep pages cost the same as the first.
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .segment_store import Block, SegmentStore
+
+logger = logging.getLogger(__name__)
+
+_FIELDS = ("message", "summary", "fix_suggestion")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id             INTEGER PRIMARY KEY,
+    cluster        TEXT NOT NULL,
+    log_type       TEXT NOT NULL,
+    fingerprint    TEXT,
+    source         TEXT,
+    written_at     REAL NOT NULL,
+    first_ts       TEXT,
+    last_ts        TEXT,
+    count          INTEGER,
+    cached         INTEGER,
+    error          TEXT,
+    message        TEXT,
+    summary        TEXT,
+    fix_suggestion TEXT,
+    template       TEXT,
+    log_text       TEXT,
+    segment        TEXT NOT NULL,
+    block_offset   INTEGER NOT NULL,
+    position       INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_cluster ON analyses(cluster, id);
+CREATE INDEX IF NOT EXISTS idx_analyses_unit ON analyses(cluster, log_type, id);
+CREATE INDEX IF NOT EXISTS idx_analyses_fingerprint ON analyses(fingerprint, id);
+CREATE INDEX IF NOT EXISTS idx_analyses_written ON analyses(written_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS analyses_fts USING fts5(
+    message, summary, fix_suggestion, template, log_text,
+    content='analyses', content_rowid='id'
+);
+CREATE TABLE IF NOT EXISTS indexed_blocks (
+    cluster      TEXT NOT NULL,
+    log_type     TEXT NOT NULL,
+    segment      TEXT NOT NULL,
+    block_offset INTEGER NOT NULL,
+    PRIMARY KEY (cluster, log_type, segment, block_offset)
+) WITHOUT ROWID;
+"""
+
+_COLUMNS = ("id", "cluster", "log_type", "fingerprint", "source", "written_at", "first_ts", "last_ts",
+            "count", "cached", "error", "message", "summary", "fix_suggestion", "template",
+            "segment", "block_offset", "position")
+
+
+class InvalidQueryError(ValueError):
+    pass
+
+
+def _analysis_fields(analysis) -> Dict[str, Optional[str]]:
+    """
+    message / summary / fix_suggestion of an LLM answer: a dict, a JSON string
+    (possibly in a ``` fence), or free text (kept whole as the summary).
+    """
+    if isinstance(analysis, str):
+        text = analysis.strip()
+        if text.startswith("```"):
+            text = text.strip("`").removeprefix("json").strip()
+        try:
+            analysis = json.loads(text)
+        except ValueError:
+            return {"message": None, "summary": analysis, "fix_suggestion": None}
+    if not isinstance(analysis, dict):
+        return {f: None for f in _FIELDS}
+    return {f: None if analysis.get(f) is None else str(analysis.get(f)) for f in _FIELDS}
+
+
+def _log_text(entry) -> Optional[str]:
+    if isinstance(entry, dict):
+        return entry.get("msg") or entry.get("message") or entry.get("raw")
+    return None if entry is None else str(entry)
+
+
+class AnalysisIndex:
+
+    def __init__(self, path: str):
+        self.path = path
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        if self._db.execute("SELECT NOT EXISTS (SELECT 1 FROM indexed_blocks)").fetchone()[0]:
+            # index files from before indexed_blocks: take the blocks from the rows
+            self._db.execute("INSERT OR IGNORE INTO indexed_blocks"
+                             " SELECT DISTINCT cluster, log_type, segment, block_offset FROM analyses")
+
+    # ---------------- indexing ---------------- #
+    def add_block(self, cluster: str, log_type: str, block: Block, records: List[dict]):
+        """
+        Index the records of one flushed block (SegmentStore.on_block).
+        """
+        rows = []
+        for pos, r in enumerate(records):
+            fields = _analysis_fields(r.get("analysis"))
+            rows.append((cluster, log_type, r.get("fingerprint"), block.source, block.t_max,
+                         r.get("first_ts"), r.get("last_ts"), r.get("count"),
+                         None if r.get("cached") is None else int(bool(r.get("cached"))), r.get("error"),
+                         fields["message"], fields["summary"], fields["fix_suggestion"], r.get("template"),
+                         _log_text(r.get("log_entry")), block.segment, block.offset, pos))
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                if self._db.execute("SELECT 1 FROM indexed_blocks WHERE cluster = ? AND log_type = ?"
+                                    " AND segment = ? AND block_offset = ?",
+                                    (cluster, log_type, block.segment, block.offset)).fetchone():
+                    self._db.execute("ROLLBACK")
+                    return  # already indexed
+                cur = self._db.execute("SELECT COALESCE(MAX(id), 0) FROM analyses")
+                first_id = cur.fetchone()[0] + 1
+                self._db.executemany(
+                    "INSERT INTO analyses (cluster, log_type, fingerprint, source, written_at, first_ts, last_ts,"
+                    " count, cached, error, message, summary, fix_suggestion, template, log_text,"
+                    " segment, block_offset, position) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)", rows)
+                self._db.execute(
+                    "INSERT INTO analyses_fts (rowid, message, summary, fix_suggestion, template, log_text)"
+                    " SELECT id, message, summary, fix_suggestion, template, log_text FROM analyses WHERE id >= ?",
+                    (first_id,))
+                self._db.execute(
+                    "INSERT INTO indexed_blocks (cluster, log_type, segment, block_offset) VALUES (?, ?, ?, ?)",
+                    (cluster, log_type, block.segment, block.offset))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def catch_up(self, store: SegmentStore, cluster: str, log_type: str) -> int:
+        """
+        Index every block of store that is not indexed yet, wherever it is in
+        the store. Returns the number of blocks added.
+        """
+        with self._lock:
+            done = set(self._db.execute("SELECT segment, block_offset FROM indexed_blocks"
+                                        " WHERE cluster = ? AND log_type = ?", (cluster, log_type)).fetchall())
+        missing = [b for b in store.blocks() if (b.segment, b.offset) not in done]
+        for block in missing:
+            self.add_block(cluster, log_type, block, store.read_block(block))
+        if missing:
+            logger.info("[AnalysisIndex] Indexed %d missed block(s) of %s/%s", len(missing), cluster, log_type)
+        return len(missing)
+
+    # ---------------- querying ---------------- #
+    def search(self, q: Optional[str] = None, cluster: Optional[str] = None, log_type: Optional[str] = None,
+               fingerprint: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+               limit: int = 50, cursor: Optional[int] = None) -> Tuple[List[dict], Optional[int]]:
+        """
+        Analyses matching every given filter, newest first. q is an FTS5 query
+        over the text fields; since/until bound the write time (epoch seconds).
+        Returns (rows, next_cursor); pass next_cursor back for the next page.
+        """
+        where, args = [], []
+        for column, value in (("a.cluster", cluster), ("a.log_type", log_type), ("a.fingerprint", fingerprint)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                args.append(value)
+        if since is not None:
+            where.append("a.written_at >= ?")
+            args.append(since)
+        if until is not None:
+            where.append("a.written_at <= ?")
+            args.append(until)
+        sql = "SELECT " + ", ".join(f"a.{c}" for c in _COLUMNS)
+        if q and fingerprint is None:
+            # Walk the FTS matches newest first (FTS5 yields rowids in order, no sort)
+            sql += " FROM analyses_fts f JOIN analyses a ON a.id = f.rowid"
+            where.insert(0, "analyses_fts MATCH ?")
+            args.insert(0, q)
+            order = "f.rowid"
+        else:
+            # No text, or a fingerprint (few rows): walk its index, text-check each row
+            sql += " FROM analyses a"
+            if q:
+                where.append("EXISTS (SELECT 1 FROM analyses_fts f WHERE analyses_fts MATCH ? AND f.rowid = a.id)")
+                args.append(q)
+            order = "a.id"
+        if cursor is not None:
+            where.append(f"{order} < ?")
+            args.append(cursor)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order} DESC LIMIT ?"
+        args.append(limit + 1)
+
+        t0 = time.perf_counter()
+        with self._lock:
+            try:
+                rows = self._db.execute(sql, args).fetchall()
+            except sqlite3.OperationalError as e:
+                # a bad MATCH expression surfaces as a bare OperationalError
+                # ("fts5: syntax error", "unterminated string", "no such column")
+                if q and "locked" not in str(e):
+                    raise InvalidQueryError(f"invalid search query: {e}") from e
+                raise
+        logger.debug("[AnalysisIndex] search q=%r -> %d row(s) in %.1fms", q, len(rows),
+                     (time.perf_counter() - t0) * 1000)
+        items = [dict(zip(_COLUMNS, row)) for row in rows[:limit]]
+        next_cursor = items[-1]["id"] if len(rows) > limit else None
+        return items, next_cursor
+
+    def get(self, analysis_id: int) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute("SELECT " + ", ".join(_COLUMNS) + " FROM analyses WHERE id = ?",
+                                   (analysis_id,)).fetchone()
+        return dict(zip(_COLUMNS, row)) if row else None
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_indexes: Dict[str, AnalysisIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def open_index(path: str) -> AnalysisIndex:
+    """
+    The process-wide index for a file (created on first use).
+    """
+    key = os.path.abspath(path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = AnalysisIndex(key)
+        return index
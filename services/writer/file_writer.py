@@ -1,5 +1,16 @@
+import os
 import json
 
+from services.ingestion_service.parser.event import LogEvent
+
+
+def _json_default(o):
+    # LogEvents serialize as their dict form; anything else is a genuine error
+    if isinstance(o, LogEvent):
+        return o.to_dict()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
 class FileWriter:
     def __init__(self, output_path: str):
         self.output_path = output_path
@@ -13,3 +24,16 @@ class FileWriter:
                 "log_entry": entry,
                 "analysis": response
             }, ensure_ascii=False) + "\n")
+
+    def write_batch(self, records: list[dict]) -> list[dict]:
+        """
+        Append a batch of {"log_entry", "analysis"} records with a single open/flush/fsync,
+        so the batch is on disk before its offset is committed.
+        """
+        if not records:
+            return records
+        with open(self.output_path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r, ensure_ascii=False, default=_json_default) + "\n" for r in records))
+            f.flush()
+            os.fsync(f.fileno())
+        return records
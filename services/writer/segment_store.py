@@ -0,0 +1,396 @@
+# services/writer/segment_store.py
+#
+# Append-only analysis output for one (cluster, log_type) unit, in rolling
+# segments. Records are buffered and appended as JSONL to the active segment
+# (seg-000001.jsonl); a flush is one write + fsync, then one line in the
+# segment's sidecar index (seg-000001.idx) describing the block just written:
+# byte range, record count, write-time range, event-time range, source file and
+# the fingerprints in it. Once the active segment passes segment_bytes it is
+# closed: compressed to seg-000001.jsonl.gz as a run of independent gzip members
+# (whole blocks, about member_bytes raw each) and its index rewritten with the
+# member positions. Readers pick blocks from the index and inflate only the
+# members holding them.
+#
+# One writer per directory: an open store holds an exclusive flock on the
+# directory's .lock file until close(), and a second opener (another process,
+# e.g. the API's on-demand runs next to the scheduler) waits up to lock_timeout
+# and then fails with StoreLockedError. Writers that share a directory open the
+# store for a run and close it afterwards.
+
+import errno
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from .file_writer import _json_default
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+DEFAULT_MEMBER_BYTES = 256 * 1024
+DEFAULT_BUFFER_RECORDS = 500
+DEFAULT_LOCK_TIMEOUT = 60.0
+LOCK_FILE = ".lock"
+
+
+class StoreLockedError(RuntimeError):
+    pass
+
+
+@dataclass
+class Block:
+    segment: str                  # segment name, e.g. "seg-000001"
+    offset: int                   # raw byte range of the block in the segment
+    length: int
+    records: int
+    t_min: float                  # write time (epoch seconds)
+    t_max: float
+    first_ts: Optional[str] = None    # event time range, as the log had it
+    last_ts: Optional[str] = None
+    source: Optional[str] = None      # input file the records came from
+    fingerprints: List[str] = field(default_factory=list)
+    # Set once the segment is compressed: the gzip member holding this block
+    member_offset: Optional[int] = None
+    member_length: Optional[int] = None
+    member_start: Optional[int] = None  # raw offset the member starts at
+
+    def matches(self, fingerprint=None, since=None, until=None, source=None) -> bool:
+        return ((fingerprint is None or fingerprint in self.fingerprints)
+                and (since is None or self.t_max >= since)
+                and (until is None or self.t_min <= until)
+                and (source is None or self.source == source))
+
+
+def _segment_name(n: int) -> str:
+    return f"seg-{n:06d}"
+
+
+def _load_index(path: Path) -> List[Block]:
+    blocks = []
+    if not path.exists():
+        return blocks
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                blocks.append(Block(**json.loads(line)))
+            except (ValueError, TypeError):
+                break  # torn last line from a crash; what follows is not trusted
+    return blocks
+
+
+def _write_index(path: Path, blocks: List[Block]):
+    tmp = path.with_suffix(".idx.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("".join(json.dumps(asdict(b)) + "\n" for b in blocks))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _block_bytes(directory: Path, block: Block, members: dict) -> bytes:
+    if block.member_offset is None:
+        try:
+            with open(directory / f"{block.segment}.jsonl", "rb") as f:
+                f.seek(block.offset)
+                return f.read(block.length)
+        except FileNotFoundError:
+            # compressed since the block was looked up: take it from the new index
+            block = next((b for b in _load_index(directory / f"{block.segment}.idx")
+                          if b.offset == block.offset), None)
+            if block is None or block.member_offset is None:
+                raise
+    key = (block.segment, block.member_offset)
+    raw = members.get(key)
+    if raw is None:
+        members.clear()
+        with open(directory / f"{block.segment}.jsonl.gz", "rb") as f:
+            f.seek(block.member_offset)
+            raw = members[key] = zlib.decompress(f.read(block.member_length), wbits=31)
+    start = block.offset - block.member_start
+    return raw[start:start + block.length]
+
+
+def read_block_at(directory, segment: str, offset: int) -> Optional[List[dict]]:
+    """
+    Records of the block at (segment, offset) of the store in directory, read
+    from its files only, without taking the writer lock. For readers in another
+    process than the writer (blocks are readable once their index line is).
+    """
+    directory = Path(directory)
+    block = next((b for b in _load_index(directory / f"{segment}.idx") if b.offset == offset), None)
+    if block is None:
+        return None
+    return [json.loads(line) for line in _block_bytes(directory, block, {}).splitlines()]
+
+
+class SegmentStore:
+    """
+    directory:       one store per directory (see open_store())
+    segment_bytes:   the active segment is closed and compressed past this size
+    member_bytes:    raw bytes per gzip member in closed segments (the unit a
+                     reader has to inflate)
+    buffer_records:  write() flushes on its own after this many records
+    on_block:        called with (block, records) after each flush, e.g.
+                     AnalysisIndex.add_block; its errors are logged, not raised
+    lock_timeout:    seconds to wait for another writer to close the directory
+    """
+
+    def __init__(self, directory, segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+                 member_bytes: int = DEFAULT_MEMBER_BYTES, buffer_records: int = DEFAULT_BUFFER_RECORDS,
+                 lock_timeout: float = DEFAULT_LOCK_TIMEOUT):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock_file = self._acquire(lock_timeout)
+        self.segment_bytes = segment_bytes
+        self.member_bytes = member_bytes
+        self.buffer_records = buffer_records
+        self._lock = threading.RLock()
+        self._buffer: List[dict] = []
+        self._buffer_source: Optional[str] = None
+        self._closed: Dict[str, List[Block]] = {}   # compressed segments, oldest first
+        self._active: Optional[str] = None
+        self._active_blocks: List[Block] = []
+        self._active_size = 0
+        self._data = self._index = None             # open handles of the active segment
+        self.on_block: Optional[Callable[[Block, List[dict]], None]] = None
+        self._recover()
+
+    # ---------------- writing ---------------- #
+    def write(self, entry: dict, response, source: Optional[str] = None):
+        """
+        Buffer one {"log_entry", "analysis"} record; flush() makes it durable.
+        """
+        self.append([{"log_entry": entry, "analysis": response}], source)
+        if len(self._buffer) >= self.buffer_records:
+            self.flush()
+
+    def append(self, records: Iterable[dict], source: Optional[str] = None):
+        with self._lock:
+            if self._buffer and source != self._buffer_source:
+                self.flush()  # one source per block
+            self._buffer.extend(records)
+            self._buffer_source = source
+
+    def write_batch(self, records: List[dict], source: Optional[str] = None) -> List[dict]:
+        """
+        Append a batch and flush it, so it is on disk before its offset is
+        committed (the write stage of the stream pipeline).
+        """
+        self.append(records, source)
+        self.flush()
+        return records
+
+    def flush(self):
+        with self._lock:
+            records, self._buffer = self._buffer, []
+            if not records:
+                return
+            data = "".join(json.dumps(r, ensure_ascii=False, default=_json_default) + "\n"
+                           for r in records).encode("utf-8")
+            if self.closed:
+                raise ValueError(f"segment store {self.directory} is closed")
+            if self._active is None:
+                self._open_segment(self._next_segment())
+            now = time.time()
+            block = Block(
+                segment=self._active, offset=self._active_size, length=len(data), records=len(records),
+                t_min=now, t_max=now,
+                first_ts=next((r.get("first_ts") for r in records if r.get("first_ts")), None),
+                last_ts=next((r.get("last_ts") for r in reversed(records) if r.get("last_ts")), None),
+                source=self._buffer_source,
+                fingerprints=sorted({r["fingerprint"] for r in records if r.get("fingerprint")}),
+            )
+            self._data.write(data)
+            self._data.flush()
+            os.fsync(self._data.fileno())
+            # The index line goes last: a block without one is cut off on recovery
+            self._index.write(json.dumps(asdict(block)) + "\n")
+            self._index.flush()
+            os.fsync(self._index.fileno())
+            self._active_size += len(data)
+            self._active_blocks.append(block)
+            if self.on_block is not None:
+                try:
+                    self.on_block(block, records)
+                except Exception:
+                    # the segment is the record; the index catches up on the next start
+                    logger.exception("[SegmentStore] on_block failed for %s/%s", self.directory, block.segment)
+            if self._active_size >= self.segment_bytes:
+                self.roll()
+
+    def roll(self):
+        """
+        Close and compress the active segment; the next flush starts a new one.
+        """
+        with self._lock:
+            if self._active is None:
+                return
+            name = self._active
+            self._data.close()
+            self._index.close()
+            self._data = self._index = None
+            self._active, self._active_size = None, 0
+            blocks, self._active_blocks = self._active_blocks, []
+            self._closed[name] = self._compress(name, blocks)
+
+    def close(self):
+        """
+        Flush, close the active segment and release the directory to other writers.
+        """
+        with self._lock:
+            if self.closed:
+                return
+            self.flush()
+            if self._data is not None:
+                self._data.close()
+                self._index.close()
+                self._data = self._index = None
+            self._lock_file.close()  # drops the flock
+            self._lock_file = None
+
+    @property
+    def closed(self) -> bool:
+        return self._lock_file is None
+
+    def _acquire(self, timeout: float):
+        f = open(self.directory / LOCK_FILE, "a+b")
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return f
+            except OSError as e:
+                if e.errno not in (errno.EAGAIN, errno.EACCES) or time.monotonic() >= deadline:
+                    f.close()
+                    if e.errno in (errno.EAGAIN, errno.EACCES):
+                        raise StoreLockedError(f"segment store {self.directory} is held by another writer") from e
+                    raise
+            time.sleep(0.05)
+
+    # ---------------- reading ---------------- #
+    def blocks(self, fingerprint: Optional[str] = None, since: Optional[float] = None,
+               until: Optional[float] = None, source: Optional[str] = None) -> List[Block]:
+        """
+        Index entries of the blocks that can hold matching records, oldest first.
+        since/until are write times (epoch seconds).
+        """
+        with self._lock:
+            every = [b for blocks in self._closed.values() for b in blocks] + list(self._active_blocks)
+        return [b for b in every if b.matches(fingerprint, since, until, source)]
+
+    def read_block(self, block: Block) -> List[dict]:
+        return [json.loads(line) for line in self._block_bytes(block, {}).splitlines()]
+
+    def read(self, fingerprint: Optional[str] = None, since: Optional[float] = None,
+             until: Optional[float] = None, source: Optional[str] = None) -> Iterator[dict]:
+        members = {}  # consecutive blocks often share a member: inflate it once
+        for block in self.blocks(fingerprint, since, until, source):
+            for line in self._block_bytes(block, members).splitlines():
+                record = json.loads(line)
+                if fingerprint is None or record.get("fingerprint") == fingerprint:
+                    yield record
+
+    def _block_bytes(self, block: Block, members: dict) -> bytes:
+        return _block_bytes(self.directory, block, members)
+
+    # ---------------- segments ---------------- #
+    def _next_segment(self) -> str:
+        names = list(self._closed) + ([self._active] if self._active else [])
+        return _segment_name(max((int(n.split("-")[1]) for n in names), default=0) + 1)
+
+    def _open_segment(self, name: str):
+        self._active = name
+        self._data = open(self.directory / f"{name}.jsonl", "ab")
+        self._index = open(self.directory / f"{name}.idx", "a", encoding="utf-8")
+
+    def _compress(self, name: str, blocks: List[Block]) -> List[Block]:
+        raw_path = self.directory / f"{name}.jsonl"
+        gz_path = self.directory / f"{name}.jsonl.gz"
+        tmp = self.directory / f"{name}.jsonl.gz.tmp"
+        with open(raw_path, "rb") as src, open(tmp, "wb") as dst:
+            i = 0
+            while i < len(blocks):
+                # whole blocks per member, about member_bytes raw
+                j, size = i, 0
+                while j < len(blocks) and (j == i or size + blocks[j].length <= self.member_bytes):
+                    size += blocks[j].length
+                    j += 1
+                src.seek(blocks[i].offset)
+                z = zlib.compressobj(6, zlib.DEFLATED, 31)
+                member = z.compress(src.read(size)) + z.flush()
+                for b in blocks[i:j]:
+                    b.member_offset, b.member_length, b.member_start = dst.tell(), len(member), blocks[i].offset
+                dst.write(member)
+                i = j
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(tmp, gz_path)
+        # Once the index names the members the raw segment is not needed
+        _write_index(self.directory / f"{name}.idx", blocks)
+        raw_path.unlink()
+        raw = sum(b.length for b in blocks)
+        logger.info("[SegmentStore] Closed %s/%s: %d block(s), %d -> %d bytes",
+                    self.directory, name, len(blocks), raw, gz_path.stat().st_size)
+        return blocks
+
+    def _recover(self):
+        """
+        Pick up the segments on disk and finish whatever a crash interrupted.
+        """
+        names = sorted({p.name.split(".")[0] for p in self.directory.glob("seg-*.idx")})
+        for p in self.directory.glob("seg-*.tmp"):
+            p.unlink()
+        for pos, name in enumerate(names):
+            raw = self.directory / f"{name}.jsonl"
+            blocks = _load_index(self.directory / f"{name}.idx")
+            if not blocks and pos < len(names) - 1:
+                # opened but never written to
+                raw.unlink(missing_ok=True)
+                (self.directory / f"{name}.idx").unlink()
+                continue
+            compressed = bool(blocks) and blocks[0].member_offset is not None
+            if compressed:
+                if raw.exists():
+                    raw.unlink()  # crashed right after the index was rewritten
+                self._closed[name] = blocks
+                continue
+            if not raw.exists():
+                logger.warning("[SegmentStore] %s/%s has an index but no data; skipping", self.directory, name)
+                continue
+            # Cut off anything written after the last indexed block (its offset
+            # was never committed, so it will be written again)
+            end = blocks[-1].offset + blocks[-1].length if blocks else 0
+            if raw.stat().st_size != end:
+                with open(raw, "r+b") as f:
+                    f.truncate(end)
+            _write_index(self.directory / f"{name}.idx", blocks)
+            if pos < len(names) - 1 or end >= self.segment_bytes:
+                self._closed[name] = self._compress(name, blocks)
+            else:
+                self._open_segment(name)
+                self._active_blocks, self._active_size = blocks, end
+
+
+_stores: Dict[str, SegmentStore] = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(directory, **kwargs) -> SegmentStore:
+    """
+    The process-wide store for a directory (created on first use, and again
+    after close()), so every writer and reader of a unit's output in this
+    process shares one active segment.
+    """
+    key = os.path.abspath(directory)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None or store.closed:
+            store = _stores[key] = SegmentStore(key, **kwargs)
+        return store
@@ -0,0 +1,61 @@
+import os
+from services.ingestion_service.file_tracker import FileSetTracker
+from services.ingestion_service.ingestors.local_ingestor import LocalIngestor
+
+
+def _checkpoint(plan):
+    # what process_unit would persist after reading every planned file to EOF
+    return {w.info.name: (w.info.size, w.fingerprint) for w in plan.work}
+
+
+def test_rotation_keeps_unread_tail_and_new_file_starts_at_zero(tmp_path):
+    log = tmp_path/"error.log"
+    log.write_text("ERROR a\n", encoding="utf-8")
+    tracker = FileSetTracker(LocalIngestor())
+    states = _checkpoint(tracker.plan(str(tmp_path), "error.log*", {}))
+
+    # tail written, then rotated by rename, then a fresh file with the same name
+    with log.open("a", encoding="utf-8") as f:
+        f.write("ERROR b\n")
+    os.rename(log, tmp_path/"error.log.1")
+    log.write_text("ERROR c\n", encoding="utf-8")
+    os.utime(tmp_path/"error.log.1", (1, 1))  # rotated file is the older one
+
+    plan = tracker.plan(str(tmp_path), "error.log*", states)
+    assert [(w.info.name, w.start_offset) for w in plan.work] == [("error.log.1", 8), ("error.log", 0)]
+    assert plan.stale == []
+
+
+def test_truncation_unchanged_and_vanished_files(tmp_path):
+    (tmp_path/"a.log").write_text("ERROR 1\nERROR 2\n", encoding="utf-8")
+    (tmp_path/"b.log").write_text("ERROR 3\n", encoding="utf-8")
+    tracker = FileSetTracker(LocalIngestor())
+    states = _checkpoint(tracker.plan(str(tmp_path), "*.log", {}))
+    states["gone.log"] = (10, None)
+
+    (tmp_path/"a.log").write_text("ERROR x\n", encoding="utf-8")  # copytruncate-style rewrite
+    plan = tracker.plan(str(tmp_path), "*.log", states)
+    assert [(w.info.name, w.start_offset) for w in plan.work] == [("a.log", 0)]  # b.log unchanged
+    assert plan.stale == ["gone.log"]
+
+
+def test_fully_read_file_rotated_without_new_bytes_is_not_read_again(tmp_path):
+    log = tmp_path/"error.log"
+    log.write_text("ERROR a\n", encoding="utf-8")
+    tracker = FileSetTracker(LocalIngestor())
+    states = _checkpoint(tracker.plan(str(tmp_path), "error.log*", {}))
+
+    # rotated with no unread tail, then a fresh file with the same name
+    os.rename(log, tmp_path/"error.log.1")
+    log.write_text("ERROR c\n", encoding="utf-8")
+    os.utime(tmp_path/"error.log.1", (1, 1))
+
+    plan = tracker.plan(str(tmp_path), "error.log*", states)
+    assert [(w.info.name, w.start_offset) for w in plan.work] == [("error.log", 0)]
+    assert [(c.info.name, c.start_offset) for c in plan.carry] == [("error.log.1", 8)]
+
+    # what process_unit persists: the carried state plus the read file
+    states = _checkpoint(plan)
+    states.update({c.info.name: (c.start_offset, c.fingerprint) for c in plan.carry})
+    plan = tracker.plan(str(tmp_path), "error.log*", states)
+    assert plan.work == [] and plan.carry == []
@@ -15,3 +15,15 @@ def test_incremental(tmp_path):
     last_offset = lines[-1][1]
     lines2 = list(ing.incremental_read(str(log), last_offset, r"ERROR", None))
     assert len(lines2) == 1
+
+def test_incremental_exact_byte_offsets_and_bad_bytes(tmp_path):
+    log = tmp_path/"error.log"
+    log.write_bytes(b"INFO ok\r\nERROR caf\xe9 \xff\nERROR tail-without-newline")
+    ing = LocalIngestor(chunk_size=4)  # force lines to straddle chunk boundaries
+    lines = list(ing.incremental_read(str(log), 0, r"ERROR", None))
+    assert lines == [("ERROR caf� �", 22)]
+    # the unterminated tail is picked up once it is complete
+    with log.open("ab") as f:
+        f.write(b"\n")
+    lines2 = list(ing.incremental_read(str(log), lines[-1][1], r"ERROR", r"INFO"))
+    assert lines2 == [("ERROR tail-without-newline", log.stat().st_size)]
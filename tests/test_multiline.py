@@ -0,0 +1,62 @@
+from services.ingestion_service.ingestors.line_reader import ReadProgress
+from services.ingestion_service.ingestors.local_ingestor import LocalIngestor
+from services.ingestion_service.multiline import MultilineAssembler
+from services.ingestion_service.parser.laravel_parser import LaravelParser
+
+RECORD_1 = ("[2025-08-17 10:12:34] production.ERROR: SQLSTATE[HY000] [2002] Connection refused\n"
+            "#0 /var/www/vendor/laravel/framework/src/Illuminate/Database/Connection.php(671)\n"
+            "#1 {main}\n")
+RECORD_2 = "[2025-08-17 10:12:35] production.INFO: user logged in\n"
+RECORD_3 = ("[2025-08-17 10:12:36] production.ERROR: Undefined index: id\n"
+            "#0 /var/www/app/Http/Controllers/UserController.php(42)\n")
+
+
+def read(path, start, flush_at=None):
+    ing = LocalIngestor(chunk_size=16)
+    assembler = MultilineAssembler(LaravelParser.START_PATTERN, include=r"\.ERROR:")
+    progress = ReadProgress(start)
+    events = list(assembler.assemble(ing.incremental_read(str(path), start, None, None),
+                                     start, progress, flush_at=flush_at))
+    return events, progress.offset
+
+
+def test_records_are_assembled_and_checkpointed_at_boundaries(tmp_path):
+    log = tmp_path/"laravel.log"
+    log.write_text(RECORD_1 + RECORD_2 + RECORD_3, encoding="utf-8")
+
+    events, offset = read(log, 0)
+    assert [e for e, _ in events] == [RECORD_1.rstrip("\n")]  # INFO filtered, last record pending
+    assert offset == len(RECORD_1 + RECORD_2)                 # boundary past the filtered record
+
+    # the trailing record grows across cycles and is only emitted once complete
+    with log.open("a", encoding="utf-8") as f:
+        f.write("#1 {main}\n")
+    events, offset2 = read(log, offset)
+    assert events == []
+    assert offset2 == offset
+
+    size = log.stat().st_size
+    events, offset3 = read(log, offset, flush_at=size)  # file went quiet
+    assert events == [((RECORD_3 + "#1 {main}\n").rstrip("\n"), size)]
+    assert offset3 == size
+
+
+def test_oversized_record_is_truncated():
+    assembler = MultilineAssembler(r"START", max_event_bytes=20)
+    lines = [("START one", 10), ("x" * 8, 19), ("y" * 30, 50), ("START two", 60)]
+    (text, end), = assembler.assemble(lines, 0)
+    assert text == "START one\nxxxxxxxx\n... [truncated 31 bytes]"
+    assert end == 50
+
+
+def test_laravel_parser_splits_header_and_trace(tmp_path):
+    p = LaravelParser()
+    d = p.parse(RECORD_1.rstrip("\n"))
+    assert (d["ts"], d["env"], d["level"]) == ("2025-08-17 10:12:34", "production", "ERROR")
+    assert d["msg"].startswith("SQLSTATE[HY000]")
+    assert d["trace"].startswith("#0 ")
+
+    log = tmp_path/"laravel.log"
+    log.write_text(RECORD_1 + RECORD_2 + RECORD_3, encoding="utf-8")
+    assert [e["level"] for e in p.parse_file(str(log))] == ["ERROR", "INFO", "ERROR"]
+    assert [e["level"] for e in p.parse_file(str(log), len(RECORD_1))] == ["INFO", "ERROR"]
@@ -0,0 +1,18 @@
+import paramiko
+import pytest
+
+from sftp_server_stub import StubSFTPServer
+
+
+@pytest.fixture
+def server(tmp_path):
+    key = paramiko.RSAKey.generate(1024)
+    key_path = tmp_path/"id_rsa"
+    key.write_private_key_file(str(key_path))
+    logs = tmp_path/"logs"
+    logs.mkdir()
+    (logs/"error.log").write_text("INFO ok\nERROR boom\n", encoding="utf-8")
+    srv = StubSFTPServer(logs, key)
+    srv.key_path = str(key_path)
+    yield srv
+    srv.close()
@@ -0,0 +1,100 @@
+# Minimal in-process SFTP server (paramiko) serving a local directory, for tests.
+
+import os
+import socket
+import threading
+
+import paramiko
+
+
+class _Server(paramiko.ServerInterface):
+    def __init__(self, client_key):
+        self.client_key = client_key
+
+    def check_auth_publickey(self, username, key):
+        return paramiko.AUTH_SUCCESSFUL if key == self.client_key else paramiko.AUTH_FAILED
+
+    def get_allowed_auths(self, username):
+        return "publickey"
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED if kind == "session" else paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+
+class _Handle(paramiko.SFTPHandle):
+    def stat(self):
+        return paramiko.SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+
+
+class _SFTPServer(paramiko.SFTPServerInterface):
+    root = "/"
+
+    def _local(self, path):
+        return os.path.join(self.root, path.lstrip("/"))
+
+    def list_folder(self, path):
+        out = []
+        local = self._local(path)
+        for name in sorted(os.listdir(local)):
+            attr = paramiko.SFTPAttributes.from_stat(os.stat(os.path.join(local, name)))
+            attr.filename = name
+            out.append(attr)
+        return out
+
+    def stat(self, path):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.stat(self._local(path)))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    lstat = stat
+
+    def open(self, path, flags, attr):
+        try:
+            f = open(self._local(path), "rb")
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        handle = _Handle(flags)
+        handle.readfile = f
+        handle.filename = self._local(path)
+        return handle
+
+
+class StubSFTPServer:
+    """
+    Serves `root` over SFTP on 127.0.0.1:<port>. Counts accepted SSH connections
+    and keeps the server-side transports so tests can kill them.
+    """
+
+    def __init__(self, root, client_key):
+        self.root = str(root)
+        self.client_key = client_key
+        self.host_key = paramiko.RSAKey.generate(1024)
+        self.accepted = 0
+        self.transports = []
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(16)
+        self.port = self.sock.getsockname()[1]
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        sftp_cls = type("RootedSFTPServer", (_SFTPServer,), {"root": self.root})
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            self.accepted += 1
+            t = paramiko.Transport(conn)
+            t.add_server_key(self.host_key)
+            t.set_subsystem_handler("sftp", paramiko.SFTPServer, sftp_cls)
+            t.start_server(server=_Server(self.client_key))
+            self.transports.append(t)
+
+    def close(self):
+        self.sock.close()
+        for t in self.transports:
+            t.close()
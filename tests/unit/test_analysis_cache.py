@@ -0,0 +1,118 @@
+import time
+
+from services.analysis_service.analysis_cache import AnalysisCache
+from services.analysis_service.fingerprint import error_fingerprint, normalize
+from services.analysis_service.pipeline import AnalyzerPipeline
+from services.analysis_service.template_miner import TemplateMiner
+
+
+def test_normalize_masks_volatile_tokens():
+    a = normalize("2025-08-13 10:00:01 Connection to 10.0.0.12:3306 failed after 3 retries (id=0x7f3a)")
+    b = normalize("2025-08-14 23:59:59 Connection to 192.168.1.5:3306 failed after 12 retries (id=0x1b)")
+    assert a == b == "<TS> Connection to <IP> failed after <NUM> retries (id=<HEX>)"
+    assert error_fingerprint({"level": "ERROR", "msg": a}) != error_fingerprint({"level": "ERROR", "msg": "Disk full"})
+
+
+def test_cache_persists_and_expires(tmp_path):
+    path = str(tmp_path/"cache.sqlite")
+    cache = AnalysisCache(path, ttl_seconds=60)
+    key = AnalysisCache.key("fp", "gpt-4o-mini", "v1")
+    assert cache.get(key) is None
+    cache.put(key, {"summary": "db down"})
+    cache.close()
+
+    reopened = AnalysisCache(path, ttl_seconds=60)
+    assert reopened.get(key) == {"summary": "db down"}
+    assert reopened.get(AnalysisCache.key("fp", "gpt-4o-mini", "v2")) is None  # prompt version is part of the key
+    assert reopened.reset_stats() == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+
+    reopened.ttl = 0
+    time.sleep(0.01)
+    assert reopened.get(key) is None
+
+
+def test_lru_size_cap(tmp_path):
+    cache = AnalysisCache(str(tmp_path/"cache.sqlite"), max_entries=3, memory_entries=1)
+    for i in range(5):
+        cache.put(str(i), i)
+    cache.get("0")  # touch the oldest so it survives
+    cache.evict()
+    cache._mem.clear()
+    assert [k for k in map(str, range(5)) if cache.get(k) is not None] == ["0", "3", "4"]
+
+
+def test_memory_hits_count_as_uses_for_eviction(tmp_path):
+    cache = AnalysisCache(str(tmp_path/"cache.sqlite"), max_entries=3)
+    for i in range(5):
+        cache.put(str(i), i)
+    assert cache.get("0") == 0  # served from memory
+    cache.evict()
+    cache._mem.clear()
+    assert [k for k in map(str, range(5)) if cache.get(k) is not None] == ["0", "3", "4"]
+
+
+class FakeLLM:
+    model = "fake"
+
+    def __init__(self):
+        self.calls = 0
+
+    def analyze_many(self, event_groups, context=None):
+        self.calls += len(event_groups)
+        return [f"analysis #{self.calls}" for _ in event_groups]
+
+
+def test_repeated_errors_cost_one_llm_call(tmp_path):
+    llm = FakeLLM()
+    analyzer = AnalyzerPipeline(llm=llm, cache=AnalysisCache(str(tmp_path/"c.sqlite")),
+                                miner=TemplateMiner())
+    events = [{"level": "ERROR", "msg": f"Timeout after {n}ms talking to 10.0.0.{n}"} for n in range(50)]
+    first = analyzer.analyze_batch(events[:25], "c", "apache")
+    second = analyzer.analyze_batch(events[25:], "c", "apache")
+    assert llm.calls == 1
+    assert [(r["count"], r["cached"]) for r in first + second] == [(25, False), (25, True)]
+    assert analyzer.cache.stats() == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+
+
+def test_columnar_batch_groups_like_dicts(tmp_path):
+    from services.ingestion_service.parser.regex_parser import RegexParser
+
+    lines = [f"2025-08-13 10:00:0{n} ERROR Timeout after {n}ms talking to 10.0.0.{n}" for n in range(5)]
+    analyzer = AnalyzerPipeline(llm=FakeLLM(), cache=AnalysisCache(str(tmp_path/"c.sqlite")), miner=None)
+    (record,) = analyzer.analyze_batch(RegexParser().parse_batch(lines), "c", "apache")
+    assert (record["count"], record["first_ts"], record["last_ts"]) == (5, "2025-08-13 10:00:00", "2025-08-13 10:00:04")
+    assert record["log_entry"]["raw"] == lines[0]
+
+
+def test_transient_llm_failure_fails_the_batch_for_retry(tmp_path):
+    import asyncio
+
+    import pytest
+
+    from services.analysis_service.pipeline import AnalysisUnavailableError
+
+    class FlakyLLM(FakeLLM):
+        def __init__(self, failures):
+            super().__init__()
+            self.failures = failures  # msg -> exception for the first call
+            self.asked = []
+
+        def analyze_many(self, event_groups, context=None):
+            self.asked.append([g[0]["msg"] for g in event_groups])
+            out = super().analyze_many(event_groups, context)
+            return [self.failures.pop(g[0]["msg"], a) for g, a in zip(event_groups, out)]
+
+    events = [{"level": "ERROR", "msg": "Disk full"}, {"level": "ERROR", "msg": "Deadlock found"}]
+    llm = FlakyLLM({"Deadlock found": asyncio.TimeoutError()})
+    analyzer = AnalyzerPipeline(llm=llm, cache=AnalysisCache(str(tmp_path/"c.sqlite")), miner=None)
+    with pytest.raises(AnalysisUnavailableError):
+        analyzer.analyze_batch(events, "c", "mysql")
+    records = analyzer.analyze_batch(events, "c", "mysql")  # the batch read again
+    assert llm.asked == [["Disk full", "Deadlock found"], ["Deadlock found"]]
+    assert [r["cached"] for r in records] == [True, False] and "error" not in records[1]
+
+    # an answer that would fail the same way again is recorded, not retried
+    llm = FlakyLLM({"Disk full": ValueError("400 prompt too long")})
+    analyzer = AnalyzerPipeline(llm=llm, cache=AnalysisCache(str(tmp_path/"d.sqlite")), miner=None)
+    (record,) = analyzer.analyze_batch(events[:1], "c", "mysql")
+    assert record["error"] == "400 prompt too long"
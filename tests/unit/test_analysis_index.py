@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+from services.writer.analysis_index import AnalysisIndex, InvalidQueryError
+from services.writer.segment_store import SegmentStore
+
+
+def _record(fp, message, fix="restart it", fenced=False):
+    analysis = json.dumps({"message": message, "summary": f"{message} happened", "fix_suggestion": fix})
+    return {"fingerprint": fp, "log_entry": {"msg": f"ERROR {message}"}, "template": message,
+            "count": 1, "first_ts": "2025-08-13 10:00:00", "last_ts": "2025-08-13 10:00:01",
+            "analysis": f"```json\n{analysis}\n```" if fenced else analysis, "cached": False}
+
+
+@pytest.fixture
+def indexed(tmp_path):
+    index = AnalysisIndex(str(tmp_path / "index.sqlite"))
+    store = SegmentStore(tmp_path / "c1" / "mysql")
+    store.on_block = lambda block, records: index.add_block("c1", "mysql", block, records)
+    return index, store
+
+
+def test_writes_are_indexed_and_searchable(indexed):
+    index, store = indexed
+    store.write_batch([_record("f1", "deadlock found"), _record("f2", "disk full", fenced=True)], source="a.log")
+    store.write_batch([_record("f1", "deadlock found again")], source="b.log")
+
+    rows, cursor = index.search("deadlock")
+    assert [r["message"] for r in rows] == ["deadlock found again", "deadlock found"]
+    assert cursor is None
+    assert index.search("disk")[0][0]["fix_suggestion"] == "restart it"  # fenced JSON parsed
+    assert [r["source"] for r in index.search(fingerprint="f1")[0]] == ["b.log", "a.log"]
+    assert index.search("deadlock", cluster="c2")[0] == []
+    assert index.search(log_type="mysql", since=0, until=1)[0] == []
+
+
+def test_pagination_with_cursor(indexed):
+    index, store = indexed
+    store.write_batch([_record(f"f{i}", f"error number {i}") for i in range(7)])
+    seen, cursor = [], None
+    while True:
+        rows, cursor = index.search("error", limit=3, cursor=cursor)
+        seen += [r["fingerprint"] for r in rows]
+        if cursor is None:
+            break
+    assert seen == [f"f{i}" for i in reversed(range(7))]
+
+
+def test_invalid_query(indexed):
+    index, _ = indexed
+    with pytest.raises(InvalidQueryError):
+        index.search('"unterminated')
+
+
+def test_catch_up_indexes_missed_blocks_once(tmp_path):
+    store = SegmentStore(tmp_path / "c1" / "app")
+    store.write_batch([_record("f1", "timeout")])
+    store.write_batch([_record("f2", "refused")])
+    index = AnalysisIndex(str(tmp_path / "index.sqlite"))
+    assert index.catch_up(store, "c1", "app") == 2
+    assert index.catch_up(store, "c1", "app") == 0
+    store.roll()  # compressed segments index the same way
+    store.write_batch([_record("f3", "timeout")])
+    assert index.catch_up(store, "c1", "app") == 1
+    assert len(index.search("timeout")[0]) == 2
+
+
+def test_api_search_and_get(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    import services.api.app as api
+
+    index_path = str(tmp_path / "index.sqlite")
+    monkeypatch.setattr(api, "analysis_index_path", lambda: index_path)
+    monkeypatch.setattr(api, "OUTPUT_BASE", tmp_path)
+    index = AnalysisIndex(index_path)
+    store = SegmentStore(tmp_path / "c1" / "mysql")
+    store.write_batch([_record("f1", "deadlock found"), _record("f2", "disk full")])
+    index.catch_up(store, "c1", "mysql")
+    index.close()
+
+    client = TestClient(api.app)
+    body = client.get("/analyses", params={"q": "disk", "cluster": "c1"}).json()
+    assert [r["fingerprint"] for r in body["items"]] == ["f2"]
+    detail = client.get(f"/analyses/{body['items'][0]['id']}").json()
+    assert detail["record"]["log_entry"] == {"msg": "ERROR disk full"}
+    assert client.get("/analyses", params={"q": '"oops'}).status_code == 400
+    assert client.get("/analyses/999").status_code == 404
+
+
+def test_catch_up_indexes_a_block_whose_indexing_failed(indexed):
+    index, store = indexed
+    add, calls = store.on_block, []
+
+    def flaky(block, records):
+        calls.append(block)
+        if len(calls) == 1:
+            raise RuntimeError("index unavailable")
+        add(block, records)
+
+    store.on_block = flaky
+    store.write_batch([_record("f1", "timeout")])   # indexing fails (logged by the store)
+    store.write_batch([_record("f2", "refused")])   # indexed
+    assert index.search(fingerprint="f1")[0] == []
+    assert index.catch_up(store, "c1", "mysql") == 1
+    assert [r["fingerprint"] for r in index.search()[0]] == ["f1", "f2"]
@@ -0,0 +1,153 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services.analysis_service.async_engine import AsyncAnalysisEngine, TokenBucket
+
+
+class FakeOpenAI(ThreadingHTTPServer):
+    """
+    Minimal OpenAI-compatible /v1/chat/completions endpoint.
+    The first `throttle` requests get a 429 with retry-after-ms; prompts starting
+    with "slow" sleep for `delay` seconds before answering.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, throttle=0, delay=0.05):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.throttle = throttle
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.requests = self.in_flight = self.max_in_flight = 0
+        self.bodies = []
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        srv = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = body["messages"][0]["content"]
+        with srv.lock:
+            srv.bodies.append(body)
+            srv.requests += 1
+            throttled = srv.requests <= srv.throttle
+            srv.in_flight += 1
+            srv.max_in_flight = max(srv.max_in_flight, srv.in_flight)
+        try:
+            if throttled:
+                return self._send(429, {"error": {"message": "rate limited", "type": "rate_limit"}},
+                                  {"retry-after-ms": "20"})
+            time.sleep(5 if prompt.startswith("slow") else srv.delay)
+            self._send(200, {
+                "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": body["model"],
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": f" echo: {prompt} "}}],
+                "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5},
+            })
+        finally:
+            with srv.lock:
+                srv.in_flight -= 1
+
+
+@pytest.fixture
+def fake_api():
+    servers = []
+
+    def start(**kw):
+        srv = FakeOpenAI(**kw)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        servers.append(srv)
+        return srv
+
+    yield start
+    for srv in servers:
+        srv.shutdown()
+        srv.server_close()
+
+
+def test_concurrent_dispatch_respects_in_flight_limit(fake_api):
+    srv = fake_api(delay=0.1)
+    engine = AsyncAnalysisEngine("fake-model", api_key="x", base_url=srv.base_url, max_in_flight=4)
+    try:
+        t0 = time.monotonic()
+        out = engine.complete_many([f"p{i}" for i in range(12)])
+        elapsed = time.monotonic() - t0
+    finally:
+        engine.close()
+    assert out == [f"echo: p{i}" for i in range(12)]  # results stay aligned with prompts
+    assert srv.max_in_flight == 4
+    assert elapsed < 12 * 0.1  # overlapped, not sequential
+    assert engine.stats["prompt_tokens"] == 36
+
+
+def test_retries_429_with_retry_after(fake_api):
+    srv = fake_api(throttle=3)
+    engine = AsyncAnalysisEngine("fake-model", api_key="x", base_url=srv.base_url, max_retries=5)
+    try:
+        assert engine.complete_many(["a", "b"]) == ["echo: a", "echo: b"]
+    finally:
+        engine.close()
+    assert engine.stats["retries"] == 3
+    assert engine.stats["errors"] == 0
+
+
+def test_timeout_is_returned_per_prompt(fake_api):
+    srv = fake_api()
+    engine = AsyncAnalysisEngine("fake-model", api_key="x", base_url=srv.base_url,
+                                 timeout=0.3, max_retries=0)
+    try:
+        ok, slow = engine.complete_many(["fast", "slow one"])
+    finally:
+        engine.close()
+    assert ok == "echo: fast"
+    assert isinstance(slow, Exception)
+    assert engine.stats["errors"] == 1
+
+
+def test_token_bucket_paces_requests():
+    import asyncio
+
+    async def take(n):
+        bucket = TokenBucket(rate_per_minute=600, capacity=2)  # 10/s, burst of 2
+        t0 = time.monotonic()
+        for _ in range(n):
+            await bucket.acquire()
+        return time.monotonic() - t0
+
+    assert asyncio.run(take(2)) < 0.05
+    assert asyncio.run(take(5)) >= 0.25
+
+
+def test_completion_is_capped_and_token_budget_settled_on_usage(fake_api):
+    srv = fake_api()
+    engine = AsyncAnalysisEngine("fake-model", api_key="x", base_url=srv.base_url,
+                                 tpm=60, max_output_tokens=20)  # 1 token/s refill
+    try:
+        engine.complete_many(["hi"])
+        tokens = engine._tokens.tokens
+    finally:
+        engine.close()
+    assert srv.bodies[0]["max_tokens"] == 20
+    # 21 reserved ("hi" estimates to 1 + 20), 5 used: 16 handed back
+    assert 60 - 5 - 1 <= tokens <= 60 - 5
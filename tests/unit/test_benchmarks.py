@@ -0,0 +1,38 @@
+from benchmarks.generators import PARSERS, generate
+from benchmarks.suite import compare, run_suite
+from services.ingestion_service.parser.registry import get_parser
+
+
+def test_generators_are_deterministic_and_parseable(tmp_path):
+    for fmt in ("apache", "mysql", "asterisk"):
+        a, b = tmp_path / f"{fmt}.a", tmp_path / f"{fmt}.b"
+        generate(fmt, str(a), records=500, error_ratio=0.3, seed=7)
+        generate(fmt, str(b), records=500, error_ratio=0.3, seed=7)
+        assert a.read_bytes() == b.read_bytes()
+        batch = get_parser(PARSERS[fmt]).parse_batch(a.read_text().splitlines())
+        assert all(batch.ts(i) is not None for i in range(len(batch)))  # every line recognised
+        errors = sum(batch.level_name(i) == "ERROR" for i in range(len(batch)))
+        assert 0.15 * 500 < errors < 0.45 * 500
+
+    path = tmp_path / "laravel.log"
+    assert generate("laravel", str(path), size_bytes=200_000, error_ratio=0.5) > 0
+    assert path.stat().st_size >= 200_000
+    events = list(get_parser("laravel").parse_file(str(path), 0))
+    assert any("[stacktrace]" in e.raw for e in events)
+
+
+def test_compare_flags_regressions():
+    base = {"results": {"a": {"seconds": 1.0}, "b": {"seconds": 1.0}}}
+    cur = {"results": {"a": {"seconds": 1.3}, "b": {"seconds": 0.5}, "c": {"seconds": 1.0}}}
+    rows, regressions = compare(cur, base, threshold=0.15)
+    assert regressions == ["a"]
+    assert [r[-1] for r in rows] == ["REGRESSION", "faster", "new"]
+
+
+def test_suite_runs_full_cycle_offline():
+    data = run_suite(size_mb=0.05, error_ratio=0.2, repeat=1)
+    results = data["results"]
+    assert set(results) == {"incremental_read", "regex_parser", "laravel_parser", "enricher",
+                            "process_unit", "process_unit_idle"}
+    assert results["process_unit"]["items"] > 0
+    assert results["process_unit_idle"]["seconds"] < results["process_unit"]["seconds"]
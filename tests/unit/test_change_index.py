@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+
+from services.ingestion_service.change_index import ChangeIndex
+from services.ingestion_service.ingestors.listing_cache import DirListingCache
+from services.ingestion_service.ingestors.local_ingestor import LocalIngestor
+
+
+class CountingIngestor(LocalIngestor):
+    def __init__(self):
+        super().__init__()
+        self.lists = 0
+
+    def list_files(self, base_path, file_glob):
+        self.lists += 1
+        return super().list_files(base_path, file_glob)
+
+
+def _age_dir(path, seconds=10):
+    t = time.time() - seconds
+    os.utime(path, (t, t))
+
+
+def _run(index, ing, path, committed=None):
+    # what process_unit does around a run: check, read everything, record
+    check = index.check("c/app", ing, str(path), "*.log")
+    if not check.idle:
+        index.record("c/app", check, committed if committed is not None else {f.name: f.size for f in check.files})
+    return check
+
+
+def test_unchanged_unit_is_idle_without_listing(tmp_path):
+    (tmp_path / "a.log").write_text("ERROR one\n")
+    _age_dir(tmp_path)
+    index, ing = ChangeIndex(), CountingIngestor()
+
+    assert not _run(index, ing, tmp_path).idle
+    assert ing.lists == 1
+    for _ in range(3):
+        assert _run(index, ing, tmp_path).idle
+    assert ing.lists == 1  # directory mtime unchanged: known files re-stat'ed only
+
+    with open(tmp_path / "a.log", "a") as f:
+        f.write("ERROR two\n")
+    assert not _run(index, ing, tmp_path).idle
+    assert _run(index, ing, tmp_path).idle
+
+
+def test_new_file_changes_directory_and_is_seen(tmp_path):
+    (tmp_path / "a.log").write_text("ERROR one\n")
+    _age_dir(tmp_path)
+    index, ing = ChangeIndex(), CountingIngestor()
+    _run(index, ing, tmp_path)
+
+    (tmp_path / "b.log").write_text("ERROR two\n")
+    check = _run(index, ing, tmp_path)
+    assert not check.idle
+    assert sorted(f.name for f in check.files) == ["a.log", "b.log"]
+
+
+def test_recent_directory_mtime_is_not_trusted(tmp_path):
+    (tmp_path / "a.log").write_text("ERROR one\n")
+    index, ing = ChangeIndex(), CountingIngestor()
+    _run(index, ing, tmp_path)
+    assert _run(index, ing, tmp_path).idle
+    assert ing.lists == 2
+
+
+def test_unit_with_unread_bytes_is_not_idle(tmp_path):
+    (tmp_path / "a.log").write_text("ERROR one\nERROR partial")
+    _age_dir(tmp_path)
+    index, ing = ChangeIndex(), CountingIngestor()
+    _run(index, ing, tmp_path, committed={"a.log": 10})
+    assert not _run(index, ing, tmp_path, committed={"a.log": 10}).idle  # e.g. capped read / held record
+    _run(index, ing, tmp_path)  # everything committed
+    assert _run(index, ing, tmp_path).idle
+
+
+def test_forget_forces_a_full_run(tmp_path):
+    (tmp_path / "a.log").write_text("ERROR one\n")
+    index, ing = ChangeIndex(), CountingIngestor()
+    _run(index, ing, tmp_path)
+    index.forget("c/app")
+    assert not _run(index, ing, tmp_path).idle
+
+
+def test_listing_cache_shares_one_load_between_callers():
+    cache = DirListingCache(ttl=60)
+    loads, gate = [], threading.Event()
+
+    def load():
+        loads.append(1)
+        gate.wait(1)
+        return ["a.log", "b.sql"]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(("h", 22, "u", "/logs"), load)))
+               for _ in range(4)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert len(loads) == 1
+    assert results == [["a.log", "b.sql"]] * 4
+    assert cache.get(("h", 22, "u", "/logs"), load) == ["a.log", "b.sql"] and len(loads) == 1
+    cache.invalidate(("h", 22, "u", "/logs"))
+    cache.get(("h", 22, "u", "/logs"), load)
+    assert len(loads) == 2
+
+
+def test_listing_cache_does_not_keep_failures():
+    cache = DirListingCache(ttl=60)
+
+    def boom():
+        raise OSError("connection reset")
+
+    try:
+        cache.get("k", boom)
+    except OSError:
+        pass
+    assert cache.get("k", lambda: ["x"]) == ["x"]
+
+
+def test_idle_checks_are_fast(tmp_path):
+    index, ing = ChangeIndex(), LocalIngestor()
+    for i in range(200):
+        d = tmp_path / f"unit{i}"
+        d.mkdir()
+        (d / "app.log").write_text("ERROR x\n")
+        _age_dir(d)
+        check = index.check(f"u{i}", ing, str(d), "*.log")
+        index.record(f"u{i}", check, {})
+    t0 = time.perf_counter()
+    assert all(index.check(f"u{i}", ing, str(tmp_path / f"unit{i}"), "*.log").idle for i in range(200))
+    assert time.perf_counter() - t0 < 0.5
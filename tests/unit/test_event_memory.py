@@ -0,0 +1,56 @@
+import tracemalloc
+
+from services.analysis_service.enricher import Enricher
+from services.ingestion_service.parser.event import EventBatch, LogEvent
+from services.ingestion_service.parser.registry import get_parser
+
+N = 20000
+LINES = [f"[Wed Aug 13 10:00:{i % 60:02d}.{i:06d} 2025] [php7:error] [pid {1000 + i}] [client 10.0.{i % 256}.1:5050] "
+         f"PHP Fatal error:  Uncaught Exception: Invalid URI in /var/www/index.php:{i}" for i in range(N)]
+
+
+def retained(build):
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        result = build()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(result) == N
+    return after - before
+
+
+def test_compact_events_use_several_times_less_memory():
+    parser, enricher = get_parser("apache_regex"), Enricher()
+
+    def as_dicts():
+        # the previous representation: parse() dicts tagged per event
+        events = [parser.parse(line) for line in LINES]
+        for e in events:
+            e.setdefault("cluster", "cluster-a")
+            e.setdefault("type", "apache")
+        return events
+
+    def as_events():
+        return enricher.enrich([parser.parse_event(line) for line in LINES], "cluster-a", "apache")
+
+    dict_bytes, event_bytes = retained(as_dicts), retained(as_events)
+    assert dict_bytes / event_bytes >= 4, (dict_bytes, event_bytes)
+
+
+def test_log_event_reads_like_the_dict_event():
+    parser = get_parser("apache_regex")
+    line = LINES[7]
+    d, e = parser.parse(line), parser.parse_event(line)
+    for key in ("ts", "level", "msg", "raw"):
+        assert e[key] == d[key]
+    assert e.get("nope", 1) == 1
+    assert LogEvent.from_dict(d).to_dict()["pid"] == "1007"
+
+
+def test_event_batch_tags_each_event_dict():
+    batch = Enricher().enrich([{"level": "error", "msg": "disk full", "raw": "x: disk full"}], "c1", "mysql")
+    assert isinstance(batch, EventBatch)
+    assert batch.event_dict(0) == {"ts": None, "level": "ERROR", "msg": "disk full", "raw": "x: disk full",
+                                    "cluster": "c1", "type": "mysql"}
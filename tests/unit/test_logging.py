@@ -0,0 +1,78 @@
+import io
+import logging
+import queue
+import threading
+
+import pytest
+
+from services.observability import log
+from services.observability.log import AsyncQueueHandler, Sampler, payload, setup_logging, shutdown_logging
+
+
+@pytest.fixture
+def logging_to(tmp_path):
+    shutdown_logging()  # importing the API installs the default setup
+    stream = io.StringIO()
+    handler = setup_logging("INFO", log_dir=str(tmp_path), stream=stream)
+    yield stream, handler
+    shutdown_logging()
+
+
+def test_records_are_formatted_and_written_by_the_listener_thread(logging_to, tmp_path):
+    stream, _ = logging_to
+    formatted_on = []
+
+    class Probe:
+        def __str__(self):
+            formatted_on.append(threading.current_thread().name)
+            return "probe"
+
+    logging.getLogger("test.log").info("value=%s", Probe())
+    logging.getLogger("test.log").debug("hidden %s", Probe())
+    shutdown_logging()
+
+    # (pytest's own capture handlers format on the calling thread too)
+    assert any(name != threading.current_thread().name for name in formatted_on)
+    assert "[INFO] test.log: value=probe" in stream.getvalue()
+    assert "hidden" not in stream.getvalue()
+    assert "value=probe" in (tmp_path / "execution.log").read_text()
+
+
+def test_exception_traceback_is_kept(logging_to):
+    stream, _ = logging_to
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        logging.getLogger("test.log").exception("failed")
+    shutdown_logging()
+    assert "RuntimeError: boom" in stream.getvalue()
+
+
+def test_setup_is_idempotent(logging_to):
+    _, handler = logging_to
+    assert setup_logging(stream=None) is handler
+    assert logging.getLogger().handlers.count(handler) == 1
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = AsyncQueueHandler(queue.Queue(maxsize=2))
+    before = log.LOG_RECORDS_DROPPED.labels().value
+    for i in range(5):
+        handler.handle(logging.makeLogRecord({"msg": "line %d", "args": (i,)}))
+    assert handler.queue.get_nowait().msg == "line %d"  # not formatted on enqueue
+    handler.queue.put_nowait(logging.makeLogRecord({"msg": "refill"}))
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+    assert log.LOG_RECORDS_DROPPED.labels().value - before == 3
+
+
+def test_sampler_rate():
+    sample = Sampler(0.25)
+    assert sum(sample() for _ in range(100)) == 25
+    assert not any(Sampler(0)() for _ in range(10))
+    assert all(Sampler(1)() for _ in range(10))
+
+
+def test_payload_is_capped():
+    assert str(payload("x" * 10, limit=20)) == "x" * 10
+    assert str(payload("x" * 50, limit=20)) == "x" * 20 + "... [30 more chars]"
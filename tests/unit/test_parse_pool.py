@@ -0,0 +1,70 @@
+import pickle
+
+import pytest
+
+from services.ingestion_service.ingestors.local_ingestor import LocalIngestor
+from services.ingestion_service.parse_pool import ParsePool, _parse_range
+from services.ingestion_service.parser.batch import level_code
+from services.ingestion_service.parser.registry import get_parser
+from services.ingestion_service.stream_pipeline import StreamPipeline
+
+INCLUDE = r"(error|crit)"
+
+
+@pytest.fixture
+def apache_log(tmp_path):
+    path = tmp_path/"error.log"
+    with path.open("w", encoding="utf-8") as f:
+        for i in range(300):
+            level = ("error", "info", "crit")[i % 3]
+            f.write(f"[Wed Aug 13 10:00:{i % 60:02d} 2025] [core:{level}] [pid {i}] message number {i} "
+                    + "x" * (i % 17) + "\n")
+        f.write("[Wed Aug 13 10:01:00 2025] [core:error] [pid 9] still being writ")  # unterminated
+    return path
+
+
+def in_thread(path, start):
+    return [line for line, _ in LocalIngestor().incremental_read(str(path), start, INCLUDE, None)]
+
+
+def test_ranges_cover_every_line_once_in_order(apache_log):
+    size = apache_log.stat().st_size
+    results = []
+    start = 0
+    for a in range(0, size, 97):  # ranges much smaller than a line, cutting lines anywhere
+        batch, end = _parse_range(str(apache_log), a, min(a + 97, size), a == 0, "apache_regex", INCLUDE, None)
+        if batch is not None:
+            assert end > start
+            start = end
+            results += [batch.raw(i) for i in range(len(batch))]
+    assert results == in_thread(apache_log, 0)
+    assert start == size - len("[Wed Aug 13 10:01:00 2025] [core:error] [pid 9] still being writ")
+
+
+def test_pool_feeds_stream_pipeline(apache_log):
+    pool = ParsePool(workers=2, range_bytes=1024)
+    commits, seen = [], []
+    try:
+        stats = StreamPipeline([("collect", lambda b: seen.extend(b.raw(i) for i in range(len(b))) or [b])],
+                               ).run(pool.iter_batches(str(apache_log), 0, apache_log.stat().st_size,
+                                                       "apache_regex", INCLUDE, None),
+                                     0, commits.append, prebatched=True)
+    finally:
+        pool.close()
+    assert seen == in_thread(apache_log, 0)
+    assert commits == sorted(commits) and commits[-1] == stats.last_offset
+    assert stats.lines == len(seen) == 200
+
+
+def test_batch_pickles_with_level_names():
+    batch = get_parser("regex_parser").parse_batch(["x ERROR - boom"])
+    clone = pickle.loads(pickle.dumps(batch))
+    assert clone.raw(0) == "x ERROR - boom" and clone.level_name(0) == "ERROR"
+
+    # codes are remapped by name on the receiving side (codes of non-standard
+    # names differ between processes)
+    rebuild, args = batch.__reduce__()
+    names = args[8]
+    assert names == {level_code("ERROR"): "ERROR"}
+    args = args[:8] + ({level_code("ERROR"): "ONLY-IN-WORKER"},) + args[9:]
+    assert rebuild(*args).level_name(0) == "ONLY-IN-WORKER"
@@ -5,3 +5,97 @@ def test_regex_parser_basic():
     out = p.parse("2025-08-13 10:00:00 ERROR Connection refused")
     assert out["level"].lower().startswith("error")
     assert "Connection refused" in out["msg"]
+
+import pytest
+
+from services.ingestion_service.parser.registry import get_parser
+
+
+@pytest.mark.parametrize("name, line, expected", [
+    ("apache_regex",
+     "[Wed Aug 13 10:00:01.123456 2025] [core:crit] [pid 1234:tid 5678] [client 10.0.0.1:5050] AH00124: Request exceeded the limit",
+     {"ts": "Wed Aug 13 10:00:01.123456 2025", "module": "core", "level": "CRITICAL", "pid": "1234",
+      "client": "10.0.0.1:5050", "msg": "AH00124: Request exceeded the limit"}),
+    ("apache_regex",
+     "[Wed Aug 13 10:00:01 2025] [error] [client 10.0.0.1] File does not exist: /var/www/favicon.ico",
+     {"level": "ERROR", "module": None, "client": "10.0.0.1", "msg": "File does not exist: /var/www/favicon.ico"}),
+    ("mysql_regex",
+     "2025-08-13T10:00:01.123456Z 0 [ERROR] [MY-010119] [Server] Aborting",
+     {"ts": "2025-08-13T10:00:01.123456Z", "thread": "0", "level": "ERROR", "code": "MY-010119",
+      "subsystem": "Server", "msg": "Aborting"}),
+    ("mysql_regex",
+     "150813 10:00:01 [Note] InnoDB: Shutdown completed",
+     {"ts": "150813 10:00:01", "level": "NOTICE", "msg": "InnoDB: Shutdown completed"}),
+    ("asterisk_regex",
+     "[Aug 13 10:00:01] WARNING[2346][C-00000001] chan_sip.c: Maximum retries exceeded on call",
+     {"ts": "Aug 13 10:00:01", "level": "WARNING", "pid": "2346", "call_id": "C-00000001",
+      "source": "chan_sip.c", "msg": "Maximum retries exceeded on call"}),
+    ("asterisk_regex",
+     "[2025-08-13 10:00:01] NOTICE[1234] chan_sip.c:28066 handle_request_register: Registration failed",
+     {"level": "NOTICE", "call_id": None, "source": "chan_sip.c:28066 handle_request_register",
+      "msg": "Registration failed"}),
+    ("laravel",
+     "[2025-08-17 10:12:34] production.ERROR: Undefined index: id\n#0 app.php(42)",
+     {"ts": "2025-08-17 10:12:34", "env": "production", "level": "ERROR", "msg": "Undefined index: id",
+      "trace": "#0 app.php(42)"}),
+])
+def test_format_parsers(name, line, expected):
+    out = get_parser(name).parse(line)
+    assert out["raw"] == line
+    assert {k: out.get(k) for k in expected} == expected
+
+
+@pytest.mark.parametrize("name", ["apache_regex", "mysql_regex", "asterisk_regex", "laravel"])
+def test_unrecognised_lines_fall_back_to_raw(name):
+    assert get_parser(name).parse("Traceback: boom") == {"raw": "Traceback: boom", "msg": "Traceback: boom",
+                                                         "level": "ERROR"}
+
+
+def test_registry_rejects_unknown_names():
+    assert get_parser("apache_regex") is get_parser("apache_regex")
+    with pytest.raises(ValueError, match="nginx"):
+        get_parser("nginx")
+
+
+BATCH_LINES = {
+    "apache_regex": ["[Wed Aug 13 10:00:01 2025] [php7:error] [pid 12] PHP Fatal error:  Uncaught Exception: café",
+                     "not an apache line"],
+    "mysql_regex": ["2025-08-13T10:00:01.123456Z 0 [Warning] [MY-010068] [Server] CA certificate is self signed."],
+    "asterisk_regex": ["[Aug 13 10:00:01] ERROR[2346][C-00000001] chan_sip.c: Failed to authenticate"],
+    "laravel": ["[2025-08-17 10:12:34] local.ERROR: Undefined index: id\n#0 app.php(42)\n#1 {main}"],
+    "regex_parser": ["2025-08-13 10:00:00 ERROR Connection refused", "db: FATAL - too many connections", "noise"],
+}
+
+
+@pytest.mark.parametrize("name", sorted(BATCH_LINES))
+def test_parse_batch_matches_parse(name):
+    parser = get_parser(name)
+    lines = BATCH_LINES[name]
+    expected = [parser.parse(line) for line in lines]
+
+    batch = parser.parse_batch(lines)
+    assert len(batch) == len(lines)
+    assert [batch.raw(i) for i in range(len(batch))] == lines
+    assert [batch.msg(i) for i in range(len(batch))] == [d["msg"] for d in expected]
+    assert [batch.ts(i) for i in range(len(batch))] == [d.get("ts") for d in expected]
+    assert [batch.level_name(i) for i in range(len(batch))] == [d["level"].upper() for d in expected]
+    assert batch.events() == expected
+
+    # bytes buffer + line spans: same columns, byte offsets
+    data = "\n".join(lines).encode("utf-8")
+    spans, pos = [], 0
+    for line in lines:
+        n = len(line.encode("utf-8"))
+        spans.append((pos, pos + n))
+        pos += n + 1
+    raw_batch = parser.parse_batch(buf=data, spans=spans)
+    assert [raw_batch.msg(i) for i in range(len(lines))] == [d["msg"] for d in expected]
+    assert list(raw_batch.level) == list(batch.level)
+
+
+def test_parsed_batch_carries_batch_level_tags():
+    from services.analysis_service.enricher import Enricher
+
+    batch = Enricher().enrich(get_parser("mysql_regex").parse_batch(BATCH_LINES["mysql_regex"]), "c1", "mysql")
+    assert (batch.cluster, batch.log_type) == ("c1", "mysql")
+    assert batch.event(0)["cluster"] == "c1" and batch.event(0)["type"] == "mysql"
@@ -0,0 +1,84 @@
+import json
+
+from services.analysis_service.llm_client import LLMClient
+from services.analysis_service.prompt_batching import (dump_answer, estimate_tokens, normalize_answer, pack,
+                                                      parse_batch_response, render_entries)
+
+
+def test_estimate_tokens_is_in_the_right_range():
+    assert estimate_tokens("") == 0
+    assert 9 <= estimate_tokens("The quick brown fox jumps over the lazy dog.") <= 12
+    line = "[2025-08-13 10:00:01] production.ERROR: SQLSTATE[HY000] [2002] Connection refused"
+    assert len(line) // 5 <= estimate_tokens(line) <= len(line) // 2
+
+
+def test_pack_respects_budget_and_entry_cap():
+    entries = [(f"e{i}", "PHP Fatal error: Uncaught Exception in /var/www/app.php:42") for i in range(10)]
+    one = estimate_tokens(render_entries(entries[:1]))
+    packs = pack(entries, token_budget=100 + 3 * one, overhead=100)
+    assert [len(p) for p in packs] == [3, 3, 3, 1]
+    assert [len(p) for p in pack(entries, 10 ** 6, 100, max_entries=4)] == [4, 4, 2]
+    assert pack([("big", "x " * 5000)], 100, 50) == [[("big", "x " * 5000)]]  # oversize goes alone
+
+
+def test_parse_batch_response_validates_each_entry():
+    answer = "```json\n" + json.dumps([
+        {"id": "e0", "message": "m", "summary": "s", "fix_suggestion": "f", "resources": []},
+        {"id": "e1", "message": "m", "summary": ""},                                          # incomplete
+        {"id": "zz", "message": "m", "summary": "s", "fix_suggestion": "f"},                  # not asked
+    ]) + "\n```"
+    parsed = parse_batch_response(answer, ["e0", "e1", "e2"])
+    assert list(parsed) == ["e0"]
+    assert parsed["e0"] == {"message": "m", "summary": "s", "fix_suggestion": "f", "resources": []}
+    assert parse_batch_response("not json", ["e0"]) == {}
+
+
+class FakeEngine:
+    """Answers batched prompts for every entry except the one mentioning 'drop-me'."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def complete_many(self, prompts):
+        self.prompts.extend(prompts)
+        out = []
+        for p in prompts:
+            if "Log Entries:" not in p:
+                out.append("single answer")
+                continue
+            rows = [json.loads(line) for line in p.split("Log Entries:\n", 1)[1].strip().splitlines()]
+            out.append(json.dumps([{"id": r["id"], "message": r["log_entry"], "summary": "s", "fix_suggestion": "f"}
+                                   for r in rows if "drop-me" not in r["log_entry"]]))
+        return out
+
+
+def test_analyze_many_packs_and_resubmits_invalid_entries():
+    engine = FakeEngine()
+    llm = LLMClient(api_key="test", model="fake", engine=engine, batch_token_budget=4000)
+    groups = [[{"level": "ERROR", "msg": f"error {i}"}] for i in range(5)]
+    groups[3] = [{"level": "ERROR", "msg": "drop-me"}]
+
+    out = llm.analyze_many(groups)
+
+    assert len(engine.prompts) == 2  # one packed request + one resubmission
+    assert json.loads(out[0])["message"] == "- [ERROR] error 0"
+    assert out[3] == "single answer"
+    assert all(json.loads(out[i])["summary"] == "s" for i in (0, 1, 2, 4))
+
+
+def test_packing_disabled_sends_one_request_per_entry():
+    engine = FakeEngine()
+    llm = LLMClient(api_key="test", model="fake", engine=engine, batch_token_budget=0)
+    assert llm.analyze_many([[{"msg": "a"}], [{"msg": "b"}]]) == ["single answer"] * 2
+    assert len(engine.prompts) == 2
+
+
+def test_single_and_packed_answers_are_stored_alike():
+    class Engine:
+        def complete_many(self, prompts):
+            return ['```json\n{"message": "m", "summary": "s", "fix_suggestion": "f"}\n```'] * len(prompts)
+
+    llm = LLMClient(api_key="test", model="fake", engine=Engine(), batch_token_budget=0)
+    single, = llm.analyze_many([[{"msg": "a"}]])
+    assert single == dump_answer({"message": "m", "summary": "s", "fix_suggestion": "f"})
+    assert normalize_answer("free text") == "free text"
@@ -0,0 +1,108 @@
+import threading
+import time
+
+import pytest
+
+from services.ingestion_service.runtime import JobRuntime, UnknownUnitError
+
+
+class FakeJob:
+    def __init__(self, names):
+        self.gates = {n: threading.Event() for n in names}
+        self.runs = {n: 0 for n in names}
+        self.reports = []
+
+    def _unit(self, name):
+        def fn():
+            self.runs[name] += 1
+            self.gates[name].wait(5)
+            if name == "c/bad":
+                raise RuntimeError("boom")
+        return fn
+
+    def units(self):
+        return [(n, self._unit(n), None) for n in self.gates]
+
+    def after_run(self, report):
+        self.reports.append(report)
+
+    def release(self):
+        for g in self.gates.values():
+            g.set()
+
+
+def _wait(runtime, run_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while runtime.get(run_id).finished is None:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    return runtime.get(run_id).to_dict()
+
+
+def test_trigger_returns_at_once_and_reports_per_unit_timings():
+    job = FakeJob(["c/app", "c/bad"])
+    runtime = JobRuntime(job, max_workers=2)
+    try:
+        t0 = time.monotonic()
+        run, coalesced = runtime.trigger()
+        assert time.monotonic() - t0 < 0.5 and coalesced == {}
+        assert run.to_dict()["progress"] == {"done": 0, "total": 2}
+        job.release()
+        status = _wait(runtime, run.run_id)
+    finally:
+        runtime.close()
+    assert status["status"] == "error"
+    assert status["counts"] == {"ok": 1, "error": 1, "skipped": 0}
+    assert {u["name"]: u["status"] for u in status["units"]} == {"c/app": "ok", "c/bad": "error"}
+    assert all(u["duration"] >= 0 for u in status["units"])
+    assert len(job.reports) == 1
+
+
+def test_concurrent_triggers_coalesce_per_unit():
+    job = FakeJob(["c/app", "c/sql"])
+    runtime = JobRuntime(job, max_workers=2)
+    try:
+        first, _ = runtime.trigger(["c/app"])
+        again, coalesced = runtime.trigger(["c/app"])
+        assert again is first and coalesced == {"c/app": first.run_id}
+
+        second, coalesced = runtime.trigger()  # all units: only c/sql is new
+        assert second is not first
+        assert second.units == ["c/sql"] and coalesced == {"c/app": first.run_id}
+        job.release()
+        _wait(runtime, first.run_id)
+        _wait(runtime, second.run_id)
+
+        third, coalesced = runtime.trigger(["c/app"])  # finished: runs again
+        assert third.run_id not in (first.run_id, second.run_id) and coalesced == {}
+        _wait(runtime, third.run_id)
+    finally:
+        runtime.close()
+    assert job.runs == {"c/app": 2, "c/sql": 1}
+    with pytest.raises(UnknownUnitError):
+        runtime.trigger(["nope"])
+
+
+def test_api_enqueues_and_reports_status():
+    from fastapi.testclient import TestClient
+    from services.api.app import app
+
+    job = FakeJob(["c/app"])
+    app.state.runtime = JobRuntime(job, max_workers=1)
+    try:
+        client = TestClient(app)
+        resp = client.post("/ingest/run", json={"units": ["c/app"]})
+        assert resp.status_code == 202
+        run_id = resp.json()["run_id"]
+        assert client.post("/ingest/run").json()["coalesced"] == {"c/app": run_id}
+        assert client.get(f"/ingest/runs/{run_id}").json()["status"] in ("queued", "running")
+        job.release()
+        _wait(app.state.runtime, run_id)
+        body = client.get(f"/ingest/runs/{run_id}").json()
+        assert body["status"] == "completed" and body["progress"] == {"done": 1, "total": 1}
+        assert client.get("/ingest/runs").json()[0]["run_id"] == run_id
+        assert client.get("/ingest/runs/run-999-0").status_code == 404
+        assert client.post("/ingest/run", json={"units": ["x/y"]}).status_code == 404
+    finally:
+        app.state.runtime.close()
+        app.state.runtime = None
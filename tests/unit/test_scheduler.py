@@ -0,0 +1,66 @@
+import threading
+import time
+
+from services.ingestion_service.scheduler import Scheduler
+
+
+def test_run_batch_collects_outcomes():
+    def boom():
+        raise RuntimeError("db down")
+
+    report = Scheduler(5, parallel=True).run_batch([("a", lambda: time.sleep(0.05)), ("b", boom)])
+    assert [(o.name, o.status) for o in report.outcomes] == [("a", "ok"), ("b", "error")]
+    assert report.outcomes[0].duration >= 0.05
+    assert report.outcomes[1].error == "db down"
+    assert report.counts() == {"ok": 1, "error": 1, "skipped": 0}
+
+
+def test_slow_unit_is_skipped_not_overlapped():
+    active, peak, runs = [0], [0], []
+    lock = threading.Lock()
+
+    def slow():
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.25)
+        with lock:
+            active[0] -= 1
+        runs.append(1)
+
+    reports = []
+    stop = threading.Event()
+    sched = Scheduler(every_minutes=0.05 / 60, parallel=True)  # due every 50ms
+    sched.add_unit("slow", slow)
+    sched.add_unit("fast", lambda: None)
+    t = threading.Thread(target=sched.run_forever, kwargs={"on_report": reports.append, "stop": stop, "tick": 0.01})
+    t.start()
+    time.sleep(0.6)
+    stop.set()
+    t.join()
+
+    outcomes = [o for r in reports for o in r.outcomes]
+    assert peak[0] == 1
+    assert sum(1 for o in outcomes if o.name == "slow" and o.status == "skipped") >= 3
+    assert sum(1 for o in outcomes if o.name == "slow" and o.status == "ok") == len(runs) >= 2
+    assert sum(1 for o in outcomes if o.name == "fast" and o.status == "ok") >= 5
+
+
+def test_most_overdue_unit_runs_first():
+    order = []
+    stop = threading.Event()
+    sched = Scheduler(every_minutes=60, parallel=False)
+    for name in ("recent", "oldest", "middle"):
+        sched.add_unit(name, lambda name=name: order.append(name))
+    now = time.monotonic()
+    for unit, lag in zip(sched.units, (1, 30, 10)):
+        unit.next_due = now - lag
+
+    def stop_after_three():
+        while len(order) < 3:
+            time.sleep(0.01)
+        stop.set()
+
+    threading.Thread(target=stop_after_three).start()
+    sched.run_forever(stop=stop, tick=0.01)
+    assert order == ["oldest", "middle", "recent"]
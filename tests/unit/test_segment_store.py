@@ -0,0 +1,82 @@
+import gzip
+import json
+
+import pytest
+
+from services.writer.segment_store import SegmentStore, StoreLockedError
+
+
+def _records(n, fp, start=0):
+    return [{"fingerprint": fp, "first_ts": f"t{start + i}", "last_ts": f"t{start + i}",
+             "log_entry": {"msg": f"event {start + i}"}, "analysis": "ok"} for i in range(n)]
+
+
+def test_batches_are_appended_and_indexed(tmp_path):
+    store = SegmentStore(tmp_path)
+    store.write_batch(_records(3, "a"), source="x.log")
+    store.write_batch(_records(2, "b"), source="y.log")
+
+    assert [b.fingerprints for b in store.blocks()] == [["a"], ["b"]]
+    assert [r["log_entry"]["msg"] for r in store.read(fingerprint="b")] == ["event 0", "event 1"]
+    assert [b.source for b in store.blocks(source="x.log")] == ["x.log"]
+    assert len((tmp_path / "seg-000001.idx").read_text().splitlines()) == 2
+
+
+def test_write_buffers_until_flush(tmp_path):
+    store = SegmentStore(tmp_path, buffer_records=3)
+    store.write({"msg": "1"}, "a1")
+    store.write({"msg": "2"}, "a2")
+    assert store.blocks() == []
+    store.write({"msg": "3"}, "a3")
+    assert [b.records for b in store.blocks()] == [3]
+
+
+def test_closed_segments_are_compressed_and_seekable(tmp_path):
+    store = SegmentStore(tmp_path, segment_bytes=2000, member_bytes=600)
+    for i in range(10):
+        store.write_batch(_records(2, f"fp{i}", start=2 * i))
+
+    assert (tmp_path / "seg-000001.jsonl.gz").exists()
+    assert not (tmp_path / "seg-000001.jsonl").exists()
+    closed = [b for b in store.blocks() if b.segment == "seg-000001"]
+    assert len({b.member_offset for b in closed}) > 1  # more than one member
+    # the whole file is still a valid gzip stream
+    lines = gzip.decompress((tmp_path / "seg-000001.jsonl.gz").read_bytes()).splitlines()
+    assert len(lines) == sum(b.records for b in closed)
+
+    assert [r["first_ts"] for r in store.read(fingerprint="fp1")] == ["t2", "t3"]
+    assert len(list(store.read())) == 20
+    store.close()
+    # a fresh store picks the segments up from disk
+    assert len(list(SegmentStore(tmp_path, segment_bytes=2000).read())) == 20
+
+
+def test_unindexed_tail_is_cut_on_recovery(tmp_path):
+    store = SegmentStore(tmp_path)
+    store.write_batch(_records(2, "a"))
+    store.close()
+    with open(tmp_path / "seg-000001.jsonl", "a") as f:
+        f.write(json.dumps({"fingerprint": "lost"}) + "\n")  # crash before the index line
+    with open(tmp_path / "seg-000001.idx", "a") as f:
+        f.write('{"segment": "seg-0')  # torn index line
+
+    reopened = SegmentStore(tmp_path)
+    assert [r["fingerprint"] for r in reopened.read()] == ["a", "a"]
+    reopened.write_batch(_records(1, "b"))
+    assert [r["fingerprint"] for r in reopened.read()] == ["a", "a", "b"]
+
+
+def test_second_writer_waits_for_the_directory(tmp_path):
+    first = SegmentStore(tmp_path)
+    first.write_batch(_records(2, "a"))
+    with pytest.raises(StoreLockedError):
+        SegmentStore(tmp_path, lock_timeout=0)
+
+    first.close()
+    second = SegmentStore(tmp_path, lock_timeout=0)
+    second.write_batch(_records(1, "b"))
+    assert [(b.segment, b.offset, b.records) for b in second.blocks()] == [
+        ("seg-000001", 0, 2), ("seg-000001", first.blocks()[0].length, 1)]
+    assert [r["fingerprint"] for r in second.read()] == ["a", "a", "b"]
+    with pytest.raises(ValueError):
+        first.write_batch(_records(1, "c"))
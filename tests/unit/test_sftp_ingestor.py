@@ -0,0 +1,71 @@
+from services.ingestion_service.ingestors.line_reader import MATCH_ALL, ReadProgress
+from services.ingestion_service.ingestors.sftp_ingestor import SFTPIngestor
+from services.ingestion_service.ingestors.sftp_pool import SFTPSessionPool
+from services.ingestion_service.multiline import MultilineAssembler
+from services.ingestion_service.parser.laravel_parser import LaravelParser
+
+
+def test_bulk_read_drains_backlog_in_bounded_slices(server, tmp_path):
+    lines = [f"ERROR event {i:04d}\n" if i % 3 == 0 else f"INFO noise {i:05d}\n" for i in range(3000)]
+    data = "".join(lines).encode()
+    (tmp_path/"logs"/"big.log").write_bytes(data)
+
+    pool = SFTPSessionPool()
+    ing = SFTPIngestor("127.0.0.1", server.port, "loguser", server.key_path, pool=pool,
+                       block_size=4096, max_bytes_per_cycle=20000)
+    got, offset, cycles = [], 0, 0
+    try:
+        while offset < len(data):
+            progress = ReadProgress(offset)
+            out = list(ing.incremental_read("/big.log", offset, "ERROR", None, progress=progress))
+            got += out
+            assert progress.offset - offset <= 20000
+            offset = max([o for _, o in out] + [progress.offset])
+            cycles += 1
+    finally:
+        pool.close_all()
+
+    assert cycles >= len(data) // 20000  # never more than the cap per call
+    assert [l for l, _ in got] == [l.rstrip("\n") for l in lines if l.startswith("ERROR")]
+    # offsets are exact byte positions just past each line
+    for line, off in got:
+        assert data[off - len(line) - 1:off] == (line + "\n").encode()
+
+
+def test_line_longer_than_the_cap_is_read_whole(server, tmp_path):
+    long_line = "ERROR " + "x" * 30000 + "\n"
+    data = (long_line + "ERROR after\n").encode()
+    (tmp_path/"logs"/"long.log").write_bytes(data)
+
+    pool = SFTPSessionPool()
+    ing = SFTPIngestor("127.0.0.1", server.port, "loguser", server.key_path, pool=pool,
+                       block_size=4096, max_bytes_per_cycle=10000)
+    try:
+        first = list(ing.incremental_read("/long.log", 0, "ERROR", None))
+        second = list(ing.incremental_read("/long.log", first[-1][1], "ERROR", None))
+    finally:
+        pool.close_all()
+
+    assert first == [(long_line.rstrip("\n"), len(long_line))]
+    assert second == [("ERROR after", len(data))]
+
+
+def test_multiline_records_keep_their_stack_trace(server, tmp_path):
+    record = ("[2025-08-17 10:12:34] production.ERROR: SQLSTATE[HY000] [2002] Connection refused\n"
+              "Stack trace:\n"
+              "#0 /var/www/vendor/laravel/framework/src/Illuminate/Database/Connection.php(671)\n"
+              "#1 {main}\n")
+    info = "[2025-08-17 10:12:35] production.INFO: user logged in\n"
+    data = (record + info).encode()
+    (tmp_path/"logs"/"laravel.log").write_bytes(data)
+
+    pool = SFTPSessionPool()
+    ing = SFTPIngestor("127.0.0.1", server.port, "loguser", server.key_path, pool=pool)
+    assembler = MultilineAssembler(LaravelParser.START_PATTERN, include=r"\.ERROR:")
+    try:
+        events = list(assembler.assemble(ing.incremental_read("/laravel.log", 0, MATCH_ALL, None), 0,
+                                         flush_at=len(data)))
+    finally:
+        pool.close_all()
+
+    assert events == [(record.rstrip("\n"), len(record))]
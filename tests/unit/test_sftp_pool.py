@@ -0,0 +1,71 @@
+import time
+
+from services.ingestion_service.ingestors.listing_cache import DirListingCache
+from services.ingestion_service.ingestors.sftp_ingestor import SFTPIngestor
+from services.ingestion_service.ingestors.sftp_pool import SFTPSessionPool
+
+
+def _ingestor(srv, pool):
+    # no listing reuse: every call here must go through the session pool
+    return SFTPIngestor("127.0.0.1", srv.port, "loguser", srv.key_path, pool=pool,
+                        listing_cache=DirListingCache(ttl=0))
+
+
+def test_one_handshake_shared_across_calls_and_ingestors(server):
+    pool = SFTPSessionPool()
+    try:
+        files = _ingestor(server, pool).list_files("/", "*.log")
+        heads = _ingestor(server, pool).read_heads([files[0].path], 4)
+        lines = list(_ingestor(server, pool).incremental_read(files[0].path, 0, "ERROR", None))
+        assert heads == {"/error.log": b"INFO"}
+        assert [l for l, _ in lines] == ["ERROR boom"]
+        assert server.accepted == 1
+        assert pool.stats["connects"] == 1 and pool.stats["reuses"] == 2
+    finally:
+        pool.close_all()
+
+
+def test_dead_sessions_are_replaced_and_idle_ones_evicted(server):
+    pool = SFTPSessionPool(idle_timeout=0.05)
+    try:
+        ing = _ingestor(server, pool)
+        ing.list_files("/", "*.log")
+        server.transports[0].close()  # server drops the connection
+        deadline = time.time() + 2
+        while pool._slots[("127.0.0.1", server.port, "loguser")].idle[0].alive() and time.time() < deadline:
+            time.sleep(0.01)
+        assert ing.latest_file("/", "*.log") == "/error.log"
+        assert server.accepted == 2
+
+        time.sleep(0.1)
+        assert pool.evict_idle() == 1
+    finally:
+        pool.close_all()
+
+
+def test_per_host_cap_serialises_borrowers(server):
+    import threading
+    pool = SFTPSessionPool(max_per_host=1)
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def borrow():
+        with pool.session("127.0.0.1", server.port, "loguser", server.key_path) as sftp:
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            sftp.listdir("/")
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+
+    try:
+        threads = [threading.Thread(target=borrow) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert peak[0] == 1
+        assert server.accepted == 1
+    finally:
+        pool.close_all()
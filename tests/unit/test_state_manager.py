@@ -0,0 +1,158 @@
+import pytest
+from mysql.connector import Error
+from services.ingestion_service.state_manager import ConnectionPool, StateManager
+
+
+class FakeDB:
+    def __init__(self):
+        self.rows = [("c", "apache", "error.log", 10, "0:0:4:abcd")]
+        self.calls = []
+        self.connects = 0
+        self.fail = False
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.result = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.db.calls.append(("execute", sql.split()[0], params))
+        if sql.lstrip().startswith("SELECT"):
+            if self.db.fail:
+                raise Error(msg="gone away")
+            self.result = list(self.db.rows)
+
+    def executemany(self, sql, rows):
+        if self.db.fail:
+            raise Error(msg="gone away")
+        self.db.calls.append(("executemany", sql.split()[0], rows))
+
+    def fetchall(self):
+        return self.result
+
+
+class FakeConn:
+    def __init__(self, db):
+        self.db = db
+        db.connects += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return FakeCursor(self.db)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeStateManager(StateManager):
+    def __init__(self, db, tmp_path):
+        self.db = db
+        super().__init__({}, log_dir=str(tmp_path))
+
+    def _connect(self):
+        return FakeConn(self.db)
+
+
+def test_snapshot_cycle_batches_writes_on_one_pooled_connection(tmp_path):
+    db = FakeDB()
+    sm = FakeStateManager(db, tmp_path)
+    db.calls.clear()
+
+    sm.begin_cycle()
+    assert sm.get_file_states("c", "apache") == {"error.log": (10, "0:0:4:abcd")}
+    sm.upsert_offset("c", "apache", "error.log", 20)
+    sm.upsert_offset("c", "mysql", "error.log", 5, "0:0:1:ffff")
+    assert sm.get_offset("c", "apache", "error.log") == 20
+    assert [c[0] for c in db.calls] == ["execute"]  # just the snapshot SELECT
+    sm.end_cycle()
+
+    kind, _, rows = db.calls[-1]
+    assert kind == "executemany"
+    assert sorted(rows) == [("c", "apache", "error.log", 20, "0:0:4:abcd"),
+                            ("c", "mysql", "error.log", 5, "0:0:1:ffff")]
+    assert db.connects == 1
+
+
+def test_failed_flush_keeps_changes_for_next_cycle(tmp_path):
+    db = FakeDB()
+    sm = FakeStateManager(db, tmp_path)
+    sm.begin_cycle()
+    sm.upsert_offset("c", "apache", "error.log", 30)
+    db.fail = True
+    sm.end_cycle()
+
+    db.fail = False
+    sm.begin_cycle()  # reload must not lose the unflushed offset
+    assert sm.get_offset("c", "apache", "error.log") == 30
+    sm.end_cycle()
+    assert db.calls[-1][2] == [("c", "apache", "error.log", 30, "0:0:4:abcd")]
+
+
+def test_unit_cycle_loads_one_unit_and_flushes_on_exit(tmp_path):
+    db = FakeDB()
+    sm = FakeStateManager(db, tmp_path)
+    db.rows = [("error.log", 10, "0:0:4:abcd")]  # what the per-unit SELECT returns
+    db.calls.clear()
+
+    with sm.unit_cycle("c", "apache"):
+        assert sm.get_file_states("c", "apache") == {"error.log": (10, "0:0:4:abcd")}
+        sm.upsert_offset("c", "apache", "error.log", 20)
+        sm.upsert_offset("c", "apache", "access.log", 5, "0:0:1:ffff")
+        assert sm.get_offset("c", "apache", "error.log") == 20
+        assert [c[:2] for c in db.calls] == [("execute", "SELECT")]
+
+    kind, _, rows = db.calls[-1]
+    assert kind == "executemany"
+    assert sorted(rows) == [("c", "apache", "access.log", 5, "0:0:1:ffff"),
+                            ("c", "apache", "error.log", 20, "0:0:4:abcd")]
+    assert sm._units == {}
+
+
+def test_state_query_error_fails_instead_of_reading_from_zero(tmp_path):
+    db = FakeDB()
+    sm = FakeStateManager(db, tmp_path)
+    db.fail = True
+    with pytest.raises(Error):
+        sm.get_file_states("c", "apache")
+    with sm.unit_cycle("c", "apache"):  # no snapshot: the run still sees the error
+        with pytest.raises(Error):
+            sm.get_file_states("c", "apache")
+
+
+def test_pool_replaces_a_connection_dropped_while_idle():
+    class Conn:
+        def __init__(self):
+            self.alive = True
+
+        def ping(self, reconnect=False, attempts=1, delay=0):
+            if not self.alive:
+                raise Error(msg="Lost connection to MySQL server")
+
+        def close(self):
+            self.alive = False
+
+    made = []
+    pool = ConnectionPool(lambda: made.append(Conn()) or made[-1], size=1, ping_after=0)
+    with pool.get() as first:
+        pass
+    first.alive = False  # wait_timeout / server restart while idle
+    with pool.get() as conn:
+        assert conn is not first and conn.alive
+    with pool.get() as again:
+        assert again is conn  # a live one is reused
+    assert len(made) == 2
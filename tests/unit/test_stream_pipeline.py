@@ -0,0 +1,66 @@
+import threading
+
+import pytest
+
+from services.ingestion_service.ingestors.line_reader import ReadProgress
+from services.ingestion_service.stream_pipeline import StreamPipeline
+
+
+def test_batches_flow_in_order_with_commit_after_each_write():
+    written, commits = [], []
+    pipeline = StreamPipeline(
+        [("parse", lambda xs: [x.upper() for x in xs]),
+         ("write", lambda xs: written.append(list(xs)) or xs)],
+        batch_size=2,
+    )
+    source = ((f"l{i}", (i + 1) * 10) for i in range(5))
+    progress = ReadProgress(0)
+    progress.offset = 70  # trailing lines the reader filtered out
+
+    stats = pipeline.run(source, 0, commits.append, progress=progress)
+
+    assert written == [["L0", "L1"], ["L2", "L3"], ["L4"]]
+    assert commits == [20, 40, 70]
+    assert (stats.lines, stats.batches, stats.last_offset) == (5, 3, 70)
+
+
+def test_backpressure_and_first_results_before_read_finishes():
+    read = [0]
+    seen_while_reading = []
+    release = threading.Event()
+
+    def source():
+        for i in range(1000):
+            read[0] += 1
+            if i == 999:
+                release.wait(5)
+            yield f"l{i}", i + 1
+
+    def slow_write(xs):
+        seen_while_reading.append(read[0])
+        if len(seen_while_reading) == 3:
+            release.set()
+        return xs
+
+    pipeline = StreamPipeline([("parse", list), ("write", slow_write)], batch_size=10, queue_size=2)
+    stats = pipeline.run(source(), 0, lambda off: None)
+
+    assert stats.lines == 1000
+    # the writer saw output long before the source was drained, and the reader
+    # was never more than a few queued batches ahead of it
+    assert seen_while_reading[0] < 1000
+    assert max(r - 10 * (i + 1) for i, r in enumerate(seen_while_reading)) <= 10 * (2 * 2 + 3)
+
+
+def test_stage_error_stops_pipeline_without_committing_past_it():
+    commits = []
+
+    def boom(xs):
+        if xs[0] == "l4":
+            raise RuntimeError("analyzer down")
+        return xs
+
+    pipeline = StreamPipeline([("analyze", boom), ("write", list)], batch_size=2)
+    with pytest.raises(RuntimeError, match="analyzer down"):
+        pipeline.run(((f"l{i}", i + 1) for i in range(100)), 0, commits.append)
+    assert commits in ([], [2], [2, 4])  # batches before the failure may or may not be written
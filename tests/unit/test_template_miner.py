@@ -0,0 +1,43 @@
+from services.analysis_service.template_miner import TemplateMiner
+
+
+def _ev(msg, ts=None):
+    return {"level": "ERROR", "msg": msg, "ts": ts}
+
+
+def test_burst_collapses_into_one_template_with_counts_and_samples():
+    miner = TemplateMiner()
+    events = [_ev(f"User user{i} failed login from host web-{i % 3}", ts=f"t{i}") for i in range(10_000)]
+    events.append(_ev("Disk /var is full"))
+    groups = miner.group(events)
+
+    assert [len(members) for _, members, _ in groups] == [10_000, 1]
+    tpl = groups[0][0]
+    assert tpl.text == "User <*> failed login from host <*>"
+    assert (tpl.count, tpl.first_ts, tpl.last_ts) == (10_000, "t0", "t9999")
+    assert tpl.samples[0] == ["user0", "web-0"]
+
+
+def test_templates_persist_across_runs(tmp_path):
+    path = str(tmp_path/"templates.json")
+    miner = TemplateMiner(path)
+    tpl, is_new = miner.add(_ev("Lost connection to MySQL server at 10.0.0.5 during query"))
+    assert is_new
+    miner.save()
+
+    reloaded = TemplateMiner(path)
+    again, is_new = reloaded.add(_ev("Lost connection to MySQL server at 10.0.0.9 during query"))
+    assert not is_new
+    assert again.template_id == tpl.template_id and again.count == 2
+
+
+def test_full_leaf_does_not_merge_dissimilar_events():
+    miner = TemplateMiner(max_children=1)
+    kept, _ = miner.add(_ev("Payment gateway timeout after retry"))
+    overflow, is_new = miner.add(_ev("Payment gateway crashed with segfault"))
+
+    assert is_new and overflow.template_id != kept.template_id
+    assert kept.text == "Payment gateway timeout after retry" and kept.count == 1
+    assert [t.template_id for t in miner.templates()] == [kept.template_id]
+    again, _ = miner.add(_ev("Payment gateway crashed with segfault"))
+    assert again.template_id == overflow.template_id
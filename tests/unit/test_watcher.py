@@ -0,0 +1,131 @@
+import threading
+import time
+
+import pytest
+
+from services.ingestion_service.scheduler import Scheduler
+from services.ingestion_service.watcher import FileWatcher, Inotify, follow_units
+
+
+def _inotify_available():
+    try:
+        Inotify().close()
+        return True
+    except OSError:
+        return False
+
+
+class Collector:
+    def __init__(self):
+        self.calls = []
+        self.event = threading.Event()
+
+    def __call__(self, paths):
+        self.calls.append((time.monotonic(), set(paths)))
+        self.event.set()
+
+
+@pytest.mark.parametrize("mode", [
+    pytest.param("inotify", marks=pytest.mark.skipif(not _inotify_available(), reason="no inotify")),
+    "poll",
+])
+def test_burst_of_writes_is_reported_once(tmp_path, mode):
+    log = tmp_path / "app.log"
+    log.write_text("")
+    got = Collector()
+    watcher = FileWatcher([tmp_path], got, mode=mode, debounce_seconds=0.1, poll_seconds=0.05).start()
+    try:
+        assert (watcher.watched if mode == "inotify" else watcher.polled) == [str(tmp_path)]
+        with open(log, "a") as f:
+            for i in range(20):
+                f.write(f"ERROR {i}\n")
+                f.flush()
+                time.sleep(0.005)
+        assert got.event.wait(2)
+        time.sleep(0.3)
+    finally:
+        watcher.stop()
+    assert [paths for _, paths in got.calls] == [{str(log)}]
+
+
+@pytest.mark.skipif(not _inotify_available(), reason="no inotify")
+def test_created_and_moved_files_are_reported(tmp_path):
+    got = Collector()
+    watcher = FileWatcher([tmp_path], got, mode="inotify", debounce_seconds=0.02).start()
+    try:
+        (tmp_path / "new.log").write_text("x\n")
+        (tmp_path / "tmp").write_text("y\n")
+        (tmp_path / "tmp").rename(tmp_path / "moved.log")
+        deadline = time.monotonic() + 2
+        while time.monotonic() < deadline and not any(str(tmp_path / "moved.log") in p for _, p in got.calls):
+            time.sleep(0.01)
+    finally:
+        watcher.stop()
+    seen = set().union(*(p for _, p in got.calls))
+    assert {str(tmp_path / "new.log"), str(tmp_path / "moved.log")} <= seen
+
+
+def test_missing_directory_falls_back_to_polling(tmp_path):
+    missing = tmp_path / "later"
+    got = Collector()
+    watcher = FileWatcher([missing], got, mode="auto", debounce_seconds=0.02, poll_seconds=0.05).start()
+    try:
+        assert watcher.polled == [str(missing)]
+        missing.mkdir()
+        (missing / "a.log").write_text("ERROR\n")
+        assert got.event.wait(2)
+    finally:
+        watcher.stop()
+    assert got.calls[0][1] == {str(missing / "a.log")}
+
+
+def test_changes_trigger_matching_units_promptly(tmp_path):
+    ran = []
+    done = threading.Event()
+    sched = Scheduler(every_minutes=60, parallel=True)
+    sched.add_unit("c1/app", lambda: (ran.append(("c1/app", time.monotonic())), done.set()))
+    sched.add_unit("c1/sql", lambda: ran.append(("c1/sql", time.monotonic())))
+    for unit in sched.units:
+        unit.next_due = time.monotonic() + 3600  # only a trigger can run them
+
+    watcher = follow_units([("c1/app", str(tmp_path), "*.log"), ("c1/sql", str(tmp_path), "*.sql")],
+                           sched.trigger, mode="poll", debounce_seconds=0.02, poll_seconds=0.02).start()
+    stop = threading.Event()
+    t = threading.Thread(target=sched.run_forever, kwargs={"stop": stop, "tick": 1.0})
+    t.start()
+    try:
+        written = time.monotonic()
+        (tmp_path / "a.log").write_text("ERROR\n")
+        assert done.wait(2)
+    finally:
+        watcher.stop()
+        stop.set()
+        t.join()
+    assert [name for name, _ in ran] == ["c1/app"]
+    assert ran[0][1] - written < 0.5  # not held back by the 1s tick
+
+
+def test_trigger_while_running_reruns_once():
+    release, started = threading.Event(), threading.Semaphore(0)
+    runs = []
+
+    def unit():
+        runs.append(1)
+        started.release()
+        release.wait()
+
+    stop = threading.Event()
+    sched = Scheduler(every_minutes=60, parallel=True)
+    sched.add_unit("u", unit)
+    t = threading.Thread(target=sched.run_forever, kwargs={"stop": stop, "tick": 0.01})
+    t.start()
+    assert started.acquire(timeout=2)
+    for _ in range(5):
+        assert sched.trigger("u")
+    assert not sched.trigger("nope")
+    release.set()
+    assert started.acquire(timeout=2)
+    time.sleep(0.1)
+    stop.set()
+    t.join()
+    assert len(runs) == 2
@@ -0,0 +1,114 @@
+import threading
+import time
+
+from services.ingestion_service.write_behind import RECORDS_DROPPED, WriteBehindRecorder, _Flush
+from test_state_manager import FakeConn, FakeDB, FakeStateManager
+
+
+class Sink:
+    """connect() for the recorder; gate blocks the writer thread while cleared."""
+
+    def __init__(self):
+        self.db = FakeDB()
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self):
+        self.gate.wait()
+        return FakeConn(self.db)
+
+    def batches(self):
+        return [rows for kind, _, rows in self.db.calls if kind == "executemany"]
+
+
+def _wait_for(cond, timeout=5.0):
+    deadline = time.time() + timeout
+    while not cond() and time.time() < deadline:
+        time.sleep(0.01)
+    return cond()
+
+
+def test_rows_are_written_in_batches_on_size():
+    sink = Sink()
+    rec = WriteBehindRecorder(max_batch=3, flush_seconds=60)
+    try:
+        for i in range(6):
+            rec.add_row(sink, "INSERT INTO t VALUES (%s)", (i,))
+        assert _wait_for(lambda: len(sink.batches()) == 2)
+        assert sink.batches() == [[(0,), (1,), (2,)], [(3,), (4,), (5,)]]
+    finally:
+        rec.close()
+
+
+def test_rows_are_written_on_time():
+    sink = Sink()
+    rec = WriteBehindRecorder(max_batch=100, flush_seconds=0.05)
+    try:
+        rec.add_row(sink, "INSERT INTO t VALUES (%s)", (1,))
+        assert _wait_for(lambda: sink.batches() == [[(1,)]])
+    finally:
+        rec.close()
+
+
+def test_lines_are_appended_and_close_flushes(tmp_path):
+    rec = WriteBehindRecorder(max_batch=1000, flush_seconds=60)
+    path = tmp_path / "entries.log"
+    for i in range(50):
+        rec.add_line(str(path), f"line {i}\n")
+    rec.close()
+    assert path.read_text().splitlines() == [f"line {i}" for i in range(50)]
+    assert not rec.add_line(str(path), "late\n")
+
+
+def test_full_queue_drops_and_counts():
+    sink = Sink()
+    rec = WriteBehindRecorder(max_batch=1, flush_seconds=60, max_queue=2)
+    dropped = RECORDS_DROPPED.labels("row", "full")
+    before = dropped.value
+    try:
+        sink.gate.clear()  # writer stuck on the first row
+        rec.add_row(sink, "INSERT INTO t VALUES (%s)", (0,))
+        assert _wait_for(lambda: rec._queue.qsize() == 0)
+        results = [rec.add_row(sink, "INSERT INTO t VALUES (%s)", (i,)) for i in range(1, 6)]
+        assert results == [True, True, False, False, False]
+        assert dropped.value - before == 3
+        sink.gate.set()
+        assert rec.flush(timeout=5)
+        assert [rows[0][0] for rows in sink.batches()] == [0, 1, 2]
+    finally:
+        sink.gate.set()
+        rec.close()
+
+
+def test_state_manager_log_execution_is_queued(tmp_path):
+    db = FakeDB()
+    rec = WriteBehindRecorder(flush_seconds=60)
+    sm = FakeStateManager(db, tmp_path)
+    sm.recorder, sm.debug = rec, 1
+    sm.log_execution(1.5, 300, "ok", {"files": 2}, {"events": 7})
+    rec.close()
+    (rows,) = [rows for kind, verb, rows in db.calls if kind == "executemany" and verb == "INSERT"]
+    assert rows[0][1:] == (1.5, 300, "ok", '{"files": 2}', '{"events": 7}')
+    (log_file,) = tmp_path.glob("execution_*.log")
+    assert "status=ok" in log_file.read_text()
+
+
+def test_flush_after_or_racing_close_does_not_hang(tmp_path):
+    rec = WriteBehindRecorder(max_batch=1000, flush_seconds=60)
+    rec.close()
+    assert rec.flush(timeout=None)
+
+    # a flush whose marker lands behind the stop marker is still released
+    sink = Sink()
+    rec = WriteBehindRecorder(max_batch=1000, flush_seconds=60)
+    sink.gate.clear()
+    rec.add_row(sink, "INSERT INTO t VALUES (%s)", (1,))
+    closer = threading.Thread(target=rec.close)
+    closer.start()
+    assert _wait_for(lambda: rec._closed)
+    marker = _Flush()
+    rec._queue.put(marker)  # what a flush() that passed the closed check queues
+    sink.gate.set()
+    closer.join(5)
+    assert marker.done.wait(5)
+    assert sink.batches() == [[(1,)]]